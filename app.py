@@ -13,6 +13,7 @@ import openpyxl
 from io import BytesIO
 from datetime import datetime, timedelta
 from difflib import SequenceMatcher
+from concurrent.futures import ThreadPoolExecutor
 import json, traceback, time, math, os
 from dotenv import load_dotenv
 load_dotenv()
@@ -48,6 +49,9 @@ ALPHA_VANTAGE_KEY = os.environ.get("ALPHA_VANTAGE_KEY", "")
 FINNHUB_KEY = os.environ.get("FINNHUB_API_KEY", "")
 FRED_KEY = os.environ.get("FRED_API_KEY", "")
 
+# Per-expiration option chain fetches run concurrently here
+_options_pool = ThreadPoolExecutor(max_workers=8)
+
 # ── AI Backend: Ollama (local) with Gemini fallback ──────
 OLLAMA_URL = "http://localhost:11434"
 OLLAMA_MODEL = "llama3.1"  # 8B params, runs well on 3050 GPU
@@ -1006,31 +1010,28 @@ def monte_carlo():
         sigma = np.std(returns)
         last_price = closes[-1]
 
-        # Run simulations
+        # Run simulations: one (simulations, days) draw — same stream as drawing path by path
         np.random.seed(42)
-        all_paths = np.zeros((simulations, days))
-        for i in range(simulations):
-            daily_returns = np.random.normal(mu, sigma, days)
-            price_path = last_price * np.exp(np.cumsum(daily_returns))
-            all_paths[i] = price_path
+        daily_returns = np.random.normal(mu, sigma, (simulations, days))
+        all_paths = last_price * np.exp(np.cumsum(daily_returns, axis=1))
 
         # Calculate percentile bands
-        percentiles = {}
-        for p in [10, 25, 50, 75, 90]:
-            band = np.percentile(all_paths, p, axis=0)
-            percentiles[f"p{p}"] = [round(float(v), 2) for v in band]
+        pcts = [10, 25, 50, 75, 90]
+        bands = np.round(np.percentile(all_paths, pcts, axis=0), 2)
+        percentiles = {f"p{p}": band.tolist() for p, band in zip(pcts, bands)}
 
         final_prices = all_paths[:, -1]
+        p10, median, p90 = np.percentile(final_prices, [10, 50, 90])
         return safe_jsonify(sanitize_for_json({
             "ticker": ticker, "days": days, "simulations": simulations,
             "start_price": round(float(last_price), 2),
             "percentiles": percentiles,
             "final_stats": {
                 "mean": round(float(np.mean(final_prices)), 2),
-                "median": round(float(np.median(final_prices)), 2),
+                "median": round(float(median), 2),
                 "std": round(float(np.std(final_prices)), 2),
-                "p10": round(float(np.percentile(final_prices, 10)), 2),
-                "p90": round(float(np.percentile(final_prices, 90)), 2),
+                "p10": round(float(p10), 2),
+                "p90": round(float(p90), 2),
             }
         }))
     except Exception as e:
@@ -1214,26 +1215,47 @@ def options_chain():
         if exp not in expirations:
             exp = expirations[0]
 
-        chain = stock.option_chain(exp)
-        calls = chain.calls.fillna(0).to_dict(orient="records")
-        puts = chain.puts.fillna(0).to_dict(orient="records")
-
-        # Clean up timestamps
-        for row in calls + puts:
-            for k, v in row.items():
-                if hasattr(v, 'isoformat'):
-                    row[k] = str(v)
+        # Optional extra expirations ("all" or a list) are fetched in parallel
+        extra = data.get("expirations") or []
+        if extra == "all":
+            extra = list(expirations)
+        wanted = [exp] + [e for e in extra if e in expirations and e != exp]
+
+        chain_futures = {e: _options_pool.submit(stock.option_chain, e) for e in wanted}
+        info_future = _options_pool.submit(lambda: stock.info)
+
+        def _records(df, opt_type):
+            # Columnar conversion instead of per-row dicts
+            df = df.fillna(0)
+            for col in df.columns:
+                if pd.api.types.is_datetime64_any_dtype(df[col]):
+                    df[col] = df[col].astype(str)
+            cols = df.to_dict("list")
+            keys = list(cols)
+            return [{**dict(zip(keys, vals)), "_type": opt_type} for vals in zip(*cols.values())]
 
-        info = stock.info
+        try:
+            info = info_future.result(timeout=30) or {}
+        except Exception:
+            info = {}
         current_price = info.get("regularMarketPrice") or info.get("previousClose", 0)
 
-        # Enrich with Greeks
-        for c in calls: c["_type"] = "call"
-        for p in puts: p["_type"] = "put"
-        calls = enrich_chain_with_greeks(calls, current_price, exp)
-        puts = enrich_chain_with_greeks(puts, current_price, exp)
+        chains = {}
+        for e, fut in chain_futures.items():
+            try:
+                chain = fut.result(timeout=30)
+            except Exception:
+                continue
+            # Enrich with Greeks
+            chains[e] = {
+                "calls": enrich_chain_with_greeks(_records(chain.calls, "call"), current_price, e),
+                "puts": enrich_chain_with_greeks(_records(chain.puts, "put"), current_price, e),
+            }
+        if exp not in chains:
+            return safe_jsonify({"error": f"Failed to load options chain for {ticker}", "available": False})
 
-        return safe_jsonify({
+        calls, puts = chains[exp]["calls"], chains[exp]["puts"]
+        result = {
             "ticker": ticker,
             "current_price": current_price,
             "expiration": exp,
@@ -1242,7 +1264,11 @@ def options_chain():
             "puts": puts[:50],
             "call_count": len(calls),
             "put_count": len(puts),
-        })
+        }
+        if len(chains) > 1:
+            result["chains"] = {e: {"calls": c["calls"][:50], "puts": c["puts"][:50]}
+                                for e, c in chains.items()}
+        return safe_jsonify(result)
     except Exception as e:
         traceback.print_exc()
         return safe_jsonify({"error": str(e)}), 500
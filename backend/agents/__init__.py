@@ -1,3 +1,9 @@
 from .analyst_agents import run_full_analysis, AgentEvent
+from .sessions import run_recorded_analysis
+from .broadcast import stream_analysis, collect_analysis
+from .screener import screen_tickers
 
-__all__ = ["run_full_analysis", "AgentEvent"]
+__all__ = [
+    "run_full_analysis", "run_recorded_analysis", "stream_analysis",
+    "collect_analysis", "AgentEvent", "screen_tickers",
+]
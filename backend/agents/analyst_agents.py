@@ -6,16 +6,30 @@ and returns its score.
 """
 import asyncio
 import json
-from typing import AsyncGenerator
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncGenerator, Awaitable
 import yfinance as yf
 import numpy as np
 import pandas as pd
 
 from services.news_service import fetch_news, analyze_sentiment
+from services.alphamath import record_scored_items
 from core import get_settings
 
 settings = get_settings()
 
+# Blocking yfinance / RSS / FinBERT work runs here so the event loop
+# (and every other SSE stream on the worker) stays responsive.
+AGENT_WORKERS = 8
+_executor = ThreadPoolExecutor(max_workers=AGENT_WORKERS)
+
+DATA_TIMEOUT = 15.0
+AGENT_TIMEOUTS = {
+    "Fundamental Analyst": 20.0,
+    "Technical Strategist": 20.0,
+    "Sentiment Analyst": 45.0,
+}
+
 
 class AgentEvent:
     """Structured event from an agent."""
@@ -228,13 +242,17 @@ def compute_technical_score(hist: pd.DataFrame) -> tuple[float, list[AgentEvent]
 
 def compute_sentiment_score(ticker: str) -> tuple[float, list[AgentEvent]]:
     """Compute sentiment score from news."""
+    news_items = fetch_news(ticker, limit=8)
+    sentiment = analyze_sentiment(news_items)
+    return score_sentiment(ticker, news_items, sentiment)
+
+
+def score_sentiment(ticker: str, news_items: list[dict], sentiment: dict) -> tuple[float, list[AgentEvent]]:
+    """Turn already-scored news into the Sentiment Analyst's score and events."""
     events: list[AgentEvent] = []
     events.append(AgentEvent("thinking", "Sentiment Analyst",
                              f"Scanning news feeds for {ticker}..."))
 
-    news_items = fetch_news(ticker, limit=8)
-    sentiment = analyze_sentiment(news_items)
-
     if not news_items:
         events.append(AgentEvent("finding", "Sentiment Analyst", "No recent news — defaulting to neutral"))
         return 5.0, events
@@ -243,6 +261,7 @@ def compute_sentiment_score(ticker: str) -> tuple[float, list[AgentEvent]]:
                              f"Analyzing {len(news_items)} articles with FinBERT NLP..."))
 
     scored = sentiment.get("scored_news", [])
+    record_scored_items(ticker, scored)
     for item in scored[:5]:
         s = item.get("sentiment_score", 0)
         icon = "🟢" if s > 0.1 else "🔴" if s < -0.1 else "⚪"
@@ -262,61 +281,138 @@ def compute_sentiment_score(ticker: str) -> tuple[float, list[AgentEvent]]:
 # DIRECTOR — Orchestrates & Synthesizes
 # ══════════════════════════════════════════════════════════
 
-async def run_full_analysis(ticker: str) -> AsyncGenerator[dict, None]:
-    """Run multi-agent pipeline. Yields SSE events."""
+AGENT_WEIGHTS = {"f": 0.40, "t": 0.35, "s": 0.25}
+
+
+def synthesize_verdict(f_score: float, t_score: float, s_score: float) -> dict:
+    """Director's weighted composite, confidence and BUY/SELL/HOLD verdict."""
+    W = AGENT_WEIGHTS
+    spread = max(f_score, t_score, s_score) - min(f_score, t_score, s_score)
+    total = f_score * W["f"] + t_score * W["t"] + s_score * W["s"]
+    confidence = min(95, max(15, round(100 - spread * 8)))
+    verdict = "BUY" if total >= 6.5 else "SELL" if total <= 4.0 else "HOLD"
+    return {"total": total, "spread": spread, "confidence": confidence, "verdict": verdict}
+
+
+async def _in_executor(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, fn, *args)
+
+
+def _fetch_info(ticker: str) -> dict:
+    return yf.Ticker(ticker).info or {}
+
+
+def _fetch_history(ticker: str) -> pd.DataFrame:
+    return yf.Ticker(ticker).history(period="1y")
+
+
+async def _run_agent(agent: str, work: Awaitable) -> tuple[str, float, list[AgentEvent], bool]:
+    """
+    Await one agent under its own timeout. On timeout or failure the agent
+    contributes a neutral 5.0 so the Director can still conclude; the last
+    element is False in that case so the verdict is marked degraded.
+    """
+    timeout = AGENT_TIMEOUTS[agent]
+    try:
+        score, events = await asyncio.wait_for(work, timeout=timeout)
+        return agent, score, events, True
+    except asyncio.TimeoutError:
+        msg = f"⏱️ Timed out after {timeout:.0f}s — using neutral score 5.0"
+    except Exception as e:
+        msg = f"⚠️ Agent failed ({e}) — using neutral score 5.0"
+    return agent, 5.0, [AgentEvent("finding", agent, msg)], False
+
+
+async def _pause(pace: float, seconds: float) -> None:
+    """Cosmetic delay between events for the dashboard; pace=0 disables it."""
+    if pace > 0:
+        await asyncio.sleep(seconds * pace)
+
+
+async def run_full_analysis(ticker: str, pace: float = 1.0) -> AsyncGenerator[dict, None]:
+    """
+    Run multi-agent pipeline. Yields SSE events.
+    Data fetches and the three agents run concurrently in executors; each
+    agent's events are streamed as soon as it finishes, so time to
+    conclusion is bounded by the slowest agent. `pace` scales the cosmetic
+    delays between events (0 = emit as soon as available).
+    """
     ticker = ticker.upper().strip()
 
     yield AgentEvent("thinking", "Director",
                      f"🎯 Initiating multi-agent analysis for {ticker}").to_sse()
     yield AgentEvent("thinking", "Director",
                      "Dispatching: Fundamental, Technical, Sentiment agents").to_sse()
-    await asyncio.sleep(0.3)
 
-    # Fetch data
+    info_task = asyncio.ensure_future(_in_executor(_fetch_info, ticker))
+    hist_task = asyncio.ensure_future(_in_executor(_fetch_history, ticker))
+
+    async def fundamental():
+        info = await asyncio.shield(info_task)
+        return await _in_executor(compute_fundamental_score, info)
+
+    async def technical():
+        hist = await asyncio.shield(hist_task)
+        return await _in_executor(compute_technical_score, hist)
+
+    agent_tasks = [
+        asyncio.ensure_future(_run_agent("Fundamental Analyst", fundamental())),
+        asyncio.ensure_future(_run_agent("Technical Strategist", technical())),
+        asyncio.ensure_future(_run_agent("Sentiment Analyst",
+                                         _in_executor(compute_sentiment_score, ticker))),
+    ]
+
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info or {}
-        hist = stock.history(period="1y")
-        if hist.empty:
-            yield AgentEvent("error", "Director", f"No data for {ticker}").to_sse()
+        # Price history is required for everything downstream
+        try:
+            hist = await asyncio.wait_for(asyncio.shield(hist_task), timeout=DATA_TIMEOUT)
+            if hist.empty:
+                yield AgentEvent("error", "Director", f"No data for {ticker}").to_sse()
+                return
+        except asyncio.TimeoutError:
+            yield AgentEvent("error", "Director", "Data error: price history timed out").to_sse()
+            return
+        except Exception as e:
+            yield AgentEvent("error", "Director", f"Data error: {e}").to_sse()
             return
-    except Exception as e:
-        yield AgentEvent("error", "Director", f"Data error: {e}").to_sse()
-        return
 
-    price = float(hist["Close"].iloc[-1])
+        price = float(hist["Close"].iloc[-1])
+        yield AgentEvent("thinking", "Director",
+                         f"Loaded: {ticker} at ${price:.2f}").to_sse()
+        await _pause(pace, 0.2)
+
+        scores: dict[str, float] = {}
+        degraded: list[str] = []
+        for next_done in asyncio.as_completed(agent_tasks):
+            agent, score, events, ok = await next_done
+            scores[agent] = score
+            if not ok:
+                degraded.append(agent)
+            yield AgentEvent("thinking", "Director", f"← {agent} reported").to_sse()
+            for ev in events:
+                yield ev.to_sse()
+                await _pause(pace, 0.1)
+    finally:
+        for task in agent_tasks + [info_task, hist_task]:
+            if not task.done():
+                task.cancel()
+
+    f_score = scores["Fundamental Analyst"]
+    t_score = scores["Technical Strategist"]
+    s_score = scores["Sentiment Analyst"]
+
+    info = info_task.result() if info_task.done() and not info_task.cancelled() \
+        and info_task.exception() is None else {}
     name = info.get("longName", ticker)
-    yield AgentEvent("thinking", "Director",
-                     f"Loaded: {name} at ${price:.2f}").to_sse()
-    await asyncio.sleep(0.2)
-
-    # ── Fundamental ───────────────────────────────────────
-    yield AgentEvent("thinking", "Director", "→ Fundamental Analyst...").to_sse()
-    f_score, f_events = compute_fundamental_score(info)
-    for ev in f_events:
-        yield ev.to_sse()
-        await asyncio.sleep(0.12)
-
-    # ── Technical ─────────────────────────────────────────
-    yield AgentEvent("thinking", "Director", "→ Technical Strategist...").to_sse()
-    t_score, t_events = compute_technical_score(hist)
-    for ev in t_events:
-        yield ev.to_sse()
-        await asyncio.sleep(0.1)
-
-    # ── Sentiment ─────────────────────────────────────────
-    yield AgentEvent("thinking", "Director", "→ Sentiment Analyst...").to_sse()
-    s_score, s_events = compute_sentiment_score(ticker)
-    for ev in s_events:
-        yield ev.to_sse()
-        await asyncio.sleep(0.1)
 
     # ── Debate ────────────────────────────────────────────
     yield AgentEvent("debate", "Director",
                      f"⚖️ Scores — F:{f_score} T:{t_score} S:{s_score}").to_sse()
-    await asyncio.sleep(0.3)
+    await _pause(pace, 0.3)
 
-    spread = max(f_score, t_score, s_score) - min(f_score, t_score, s_score)
+    synth = synthesize_verdict(f_score, t_score, s_score)
+    spread = synth["spread"]
     if f_score >= 6.5 and t_score >= 6.5 and s_score >= 6:
         yield AgentEvent("debate", "Director",
                          "✅ ALL agents BULLISH — high-conviction signal").to_sse()
@@ -326,13 +422,11 @@ async def run_full_analysis(ticker: str) -> AsyncGenerator[dict, None]:
     elif spread > 4:
         yield AgentEvent("debate", "Director",
                          "⚠️ Agents DISAGREE significantly — risk-adjusted weighting").to_sse()
-    await asyncio.sleep(0.2)
+    await _pause(pace, 0.2)
 
     # Weighted verdict
-    W = {"f": 0.40, "t": 0.35, "s": 0.25}
-    total = f_score * W["f"] + t_score * W["t"] + s_score * W["s"]
-    confidence = min(95, max(15, round(100 - spread * 8)))
-    verdict = "BUY" if total >= 6.5 else "SELL" if total <= 4.0 else "HOLD"
+    W = AGENT_WEIGHTS
+    total, confidence, verdict = synth["total"], synth["confidence"], synth["verdict"]
 
     report = f"""# {ticker} — Multi-Agent Analysis Report
 ## {name} | ${price:.2f}
@@ -351,7 +445,7 @@ async def run_full_analysis(ticker: str) -> AsyncGenerator[dict, None]:
 
     yield AgentEvent("debate", "Director",
                      f"Composite: {total:.1f}/10").to_sse()
-    await asyncio.sleep(0.2)
+    await _pause(pace, 0.2)
 
     yield AgentEvent("conclusion", "Director", json.dumps({
         "verdict": verdict,
@@ -360,4 +454,5 @@ async def run_full_analysis(ticker: str) -> AsyncGenerator[dict, None]:
         "scores": {"fundamental": f_score, "technical": t_score,
                    "sentiment": s_score, "total": round(total, 1)},
         "ticker": ticker, "price": price, "company": name,
+        "degraded": degraded,  # agents that timed out / failed and scored a neutral 5.0
     })).to_sse()
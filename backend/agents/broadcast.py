@@ -0,0 +1,126 @@
+"""
+FinanceIQ v6 — Shared Agent Runs
+Concurrent subscribers to the same ticker attach to one running analysis:
+the pipeline writes into a per-ticker in-process event buffer and every
+viewer receives the past events followed by live ones. Recent completed
+sessions are replayed straight from the store, without pacing or a
+shared run.
+"""
+import asyncio
+import json
+from typing import AsyncGenerator, Optional
+
+from core import logger
+from .analyst_agents import AgentEvent, _pause
+from .sessions import run_recorded_analysis, replay_events
+
+
+class _SharedRun:
+    """Event buffer for one in-flight analysis."""
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        self.events: list[dict] = []
+        self.done = False
+        self.subscribers = 0
+        self.cond = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+    async def publish(self, ev: dict) -> None:
+        async with self.cond:
+            self.events.append(ev)
+            self.cond.notify_all()
+
+    async def finish(self) -> None:
+        async with self.cond:
+            self.done = True
+            self.cond.notify_all()
+
+    async def subscribe(self) -> AsyncGenerator[dict, None]:
+        i = 0
+        while True:
+            async with self.cond:
+                await self.cond.wait_for(lambda: i < len(self.events) or self.done)
+                batch = self.events[i:]
+                done = self.done
+            i += len(batch)
+            for ev in batch:
+                yield ev
+            if done and i >= len(self.events):
+                return
+
+
+_live_runs: dict[str, _SharedRun] = {}
+
+
+async def _produce(run: _SharedRun) -> None:
+    try:
+        # Replays are served by stream_analysis, so a shared run is always a real one
+        async for ev in run_recorded_analysis(run.ticker, pace=0, reuse_minutes=0):
+            await run.publish(ev)
+    except Exception as e:
+        logger.error(f"Shared agent run failed for {run.ticker}: {e}")
+        await run.publish(AgentEvent("error", "Director", f"Analysis error: {e}").to_sse())
+    finally:
+        # Later requests replay from the stored session instead
+        if _live_runs.get(run.ticker) is run:
+            del _live_runs[run.ticker]
+        await run.finish()
+
+
+def _attach(ticker: str) -> _SharedRun:
+    run = _live_runs.get(ticker)
+    if run is None:
+        run = _SharedRun(ticker)
+        _live_runs[ticker] = run
+        run.task = asyncio.ensure_future(_produce(run))
+    return run
+
+
+async def stream_analysis(
+    ticker: str,
+    pace: float = 1.0,
+    reuse_minutes: Optional[int] = None,
+) -> AsyncGenerator[dict, None]:
+    """
+    Subscribe to the ticker's shared analysis, starting one if none is running.
+    The pipeline itself runs unpaced; `pace` only delays this viewer's events.
+    With no run in flight, a recent completed session (see replay_events)
+    is replayed at once instead. reuse_minutes=0 skips the replay but still
+    joins a run already in flight, since that run is itself a fresh
+    pipeline execution.
+    """
+    ticker = ticker.upper().strip()
+    if ticker not in _live_runs:
+        replay = await replay_events(ticker, reuse_minutes)
+        if replay is not None:
+            for ev in replay:
+                yield ev
+            return
+    run = _attach(ticker)
+    run.subscribers += 1
+    if run.subscribers > 1:
+        yield AgentEvent("thinking", "Director",
+                         f"👥 Joined running analysis ({run.subscribers} viewers)").to_sse()
+    try:
+        async for ev in run.subscribe():
+            yield ev
+            await _pause(pace, 0.1)
+    finally:
+        run.subscribers -= 1
+
+
+async def collect_analysis(ticker: str, reuse_minutes: Optional[int] = None) -> dict:
+    """Run, join or replay the pipeline unpaced and return all events plus the conclusion as JSON."""
+    events = []
+    conclusion = None
+    async for ev in stream_analysis(ticker, pace=0, reuse_minutes=reuse_minutes):
+        data = json.loads(ev["data"])
+        if ev["event"] == "conclusion":
+            conclusion = json.loads(data["content"])
+        events.append({"event": ev["event"], **data})
+    result = {"ticker": ticker.upper().strip(), "events": events, "conclusion": conclusion}
+    if conclusion is None:
+        errors = [e["content"] for e in events if e["event"] == "error"]
+        result["error"] = errors[-1] if errors else "Analysis did not complete"
+    return result
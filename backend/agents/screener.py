@@ -0,0 +1,129 @@
+"""
+FinanceIQ v6 — Batch Agent Screener
+Runs the Fundamental / Technical / Sentiment scorers over many tickers with
+one shared price download per chunk, bounded per-ticker fetch concurrency
+and a single batched FinBERT pass per chunk.
+"""
+import asyncio
+from typing import AsyncGenerator
+import yfinance as yf
+import pandas as pd
+
+from services.news_service import fetch_news, analyze_sentiment_batch
+from .analyst_agents import (
+    compute_fundamental_score, compute_technical_score, score_sentiment,
+    synthesize_verdict, _in_executor, _fetch_info, AGENT_WORKERS,
+)
+
+MAX_SCREEN_TICKERS = 500
+NEWS_PER_TICKER = 8
+
+
+def _download_histories(tickers: list[str]) -> dict[str, pd.DataFrame]:
+    """One yfinance request for the whole chunk's 1y daily bars."""
+    data = yf.download(
+        tickers, period="1y", group_by="ticker", auto_adjust=True,
+        threads=True, progress=False,
+    )
+    out = {}
+    if data is None or data.empty:
+        return out
+    for t in tickers:
+        try:
+            df = data[t] if isinstance(data.columns, pd.MultiIndex) else data
+        except KeyError:
+            continue
+        df = df.dropna(how="all")
+        if not df.empty:
+            out[t] = df
+    return out
+
+
+def _score_row(ticker: str, info: dict, hist: pd.DataFrame | None,
+               news_items: list[dict], sentiment: dict) -> dict:
+    if hist is None or hist.empty:
+        return {"ticker": ticker, "error": f"No data for {ticker}"}
+
+    f_score, _ = compute_fundamental_score(info or {"symbol": ticker})
+    t_score, _ = compute_technical_score(hist)
+    s_score, _ = score_sentiment(ticker, news_items, sentiment)
+    synth = synthesize_verdict(f_score, t_score, s_score)
+
+    return {
+        "ticker": ticker,
+        "company": (info or {}).get("longName", ticker),
+        "price": round(float(hist["Close"].iloc[-1]), 2),
+        "scores": {"fundamental": f_score, "technical": t_score,
+                   "sentiment": s_score, "total": round(synth["total"], 2)},
+        "verdict": synth["verdict"],
+        "confidence": synth["confidence"],
+    }
+
+
+async def screen_tickers(
+    tickers: list[str],
+    concurrency: int = AGENT_WORKERS,
+    chunk_size: int = 25,
+) -> AsyncGenerator[dict, None]:
+    """
+    Screen a universe of tickers. Yields {"type": "result", ...} rows as each
+    chunk completes, then a final {"type": "summary", "ranked": [...]} table
+    sorted by composite score.
+    """
+    tickers = list(dict.fromkeys(t.upper().strip() for t in tickers if t and t.strip()))
+    tickers = tickers[:MAX_SCREEN_TICKERS]
+    # More in flight than executor workers would only queue inside the pool
+    sem = asyncio.Semaphore(max(1, min(concurrency, AGENT_WORKERS)))
+
+    async def guarded(fn, *args, default=None):
+        try:
+            return await _in_executor(fn, *args)
+        except Exception:
+            return default
+
+    async def bounded(fn, *args, default=None):
+        async with sem:
+            return await guarded(fn, *args, default=default)
+
+    rows = []
+    for i in range(0, len(tickers), chunk_size):
+        chunk = tickers[i:i + chunk_size]
+
+        # The shared download runs alongside the per-ticker fetches, outside the semaphore
+        hist_task = asyncio.ensure_future(guarded(_download_histories, chunk))
+        infos, news = await asyncio.gather(
+            asyncio.gather(*(bounded(_fetch_info, t, default={}) for t in chunk)),
+            asyncio.gather(*(bounded(fetch_news, t, NEWS_PER_TICKER, default=[]) for t in chunk)),
+        )
+        news_by_ticker = dict(zip(chunk, news))
+        sentiments, hists = await asyncio.gather(
+            guarded(analyze_sentiment_batch, news_by_ticker, default={}),
+            hist_task,
+        )
+
+        for t, info in zip(chunk, infos):
+            if hists is None:
+                row = {"ticker": t, "error": f"Price download failed for {t}"}
+            else:
+                # Neutral, as analyze_sentiment_batch reports when FinBERT is unavailable
+                sentiment = sentiments.get(t) or {"average_score": 0, "sentiment_label": "Neutral",
+                                                  "scored_news": news_by_ticker[t]}
+                try:
+                    row = _score_row(t, info, hists.get(t), news_by_ticker[t], sentiment)
+                except Exception as e:
+                    row = {"ticker": t, "error": str(e)}
+            rows.append(row)
+            yield {"type": "result", **row}
+
+    ranked = sorted(
+        (r for r in rows if "error" not in r),
+        key=lambda r: r["scores"]["total"], reverse=True,
+    )
+    for rank, r in enumerate(ranked, 1):
+        r["rank"] = rank
+    yield {
+        "type": "summary",
+        "count": len(rows),
+        "failed": [r["ticker"] for r in rows if "error" in r],
+        "ranked": ranked,
+    }
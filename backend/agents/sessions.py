@@ -0,0 +1,153 @@
+"""
+FinanceIQ v6 — Agent Session Persistence
+Records every multi-agent run as an AgentSession row (plus its SSE event log)
+and replays recent completed sessions instead of re-running the pipeline.
+Runs where an agent timed out or failed are stored as "partial" and never
+replayed, since their neutral fallback scores are not a real verdict.
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta
+from typing import AsyncGenerator, Optional
+from sqlalchemy import select
+
+from core import AsyncSessionLocal, get_settings, logger
+from models import AgentSession, AgentSessionLog
+from .analyst_agents import run_full_analysis, AgentEvent
+
+settings = get_settings()
+
+
+async def start_session(ticker: str) -> Optional[int]:
+    """Insert a running session row. Returns its id (None if the DB is unavailable)."""
+    try:
+        async with AsyncSessionLocal() as db:
+            row = AgentSession(ticker=ticker, status="running")
+            db.add(row)
+            await db.commit()
+            return row.id
+    except Exception as e:
+        logger.warning(f"Agent session start failed: {e}")
+        return None
+
+
+async def complete_session(session_id: Optional[int], conclusion: dict, events: list[dict]) -> None:
+    """Store verdict, scores, report and the event log (status "partial" if any agent degraded)."""
+    if session_id is None:
+        return
+    try:
+        async with AsyncSessionLocal() as db:
+            row = await db.get(AgentSession, session_id)
+            if row is None:
+                return
+            scores = conclusion.get("scores", {})
+            row.status = "partial" if conclusion.get("degraded") else "completed"
+            row.verdict = conclusion.get("verdict", "")
+            row.confidence = float(conclusion.get("confidence", 0))
+            row.report_md = conclusion.get("report", "")
+            row.fundamental_score = float(scores.get("fundamental", 0))
+            row.technical_score = float(scores.get("technical", 0))
+            row.sentiment_score = float(scores.get("sentiment", 0))
+            row.completed_at = datetime.utcnow()
+            db.add(AgentSessionLog(session_id=session_id, events_json=json.dumps(events)))
+            await db.commit()
+    except Exception as e:
+        logger.warning(f"Agent session completion failed: {e}")
+
+
+async def fail_session(session_id: Optional[int]) -> None:
+    if session_id is None:
+        return
+    try:
+        async with AsyncSessionLocal() as db:
+            row = await db.get(AgentSession, session_id)
+            if row is not None and row.status == "running":
+                row.status = "failed"
+                row.completed_at = datetime.utcnow()
+                await db.commit()
+    except Exception as e:
+        logger.warning(f"Agent session failure update failed: {e}")
+
+
+async def find_recent_session(ticker: str, max_age_minutes: int) -> Optional[tuple[AgentSession, list[dict]]]:
+    """Latest fully completed (not partial) session for the ticker younger than max_age_minutes, with its events."""
+    if max_age_minutes <= 0:
+        return None
+    cutoff = datetime.utcnow() - timedelta(minutes=max_age_minutes)
+    try:
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(
+                select(AgentSession, AgentSessionLog.events_json)
+                .join(AgentSessionLog, AgentSessionLog.session_id == AgentSession.id)
+                .where(
+                    AgentSession.ticker == ticker,
+                    AgentSession.status == "completed",
+                    AgentSession.completed_at >= cutoff,
+                )
+                .order_by(AgentSession.completed_at.desc())
+                .limit(1)
+            )).first()
+    except Exception as e:
+        logger.warning(f"Agent session lookup failed: {e}")
+        return None
+    if row is None:
+        return None
+    session, events_json = row
+    return session, json.loads(events_json or "[]")
+
+
+async def replay_events(ticker: str, reuse_minutes: Optional[int] = None) -> Optional[list[dict]]:
+    """
+    Event log of a completed session younger than reuse_minutes (default
+    AGENT_SESSION_REUSE_MINUTES), led by a replay notice; None if there is none.
+    """
+    if reuse_minutes is None:
+        reuse_minutes = settings.AGENT_SESSION_REUSE_MINUTES
+    recent = await find_recent_session(ticker, reuse_minutes)
+    if recent is None:
+        return None
+    session, events = recent
+    age_min = (datetime.utcnow() - session.completed_at).total_seconds() / 60
+    return [AgentEvent("thinking", "Director",
+                       f"♻️ Replaying analysis completed {age_min:.0f} min ago").to_sse(), *events]
+
+
+async def run_recorded_analysis(
+    ticker: str,
+    pace: float = 1.0,
+    reuse_minutes: Optional[int] = None,
+) -> AsyncGenerator[dict, None]:
+    """
+    run_full_analysis with persistence. A completed session younger than
+    reuse_minutes (default AGENT_SESSION_REUSE_MINUTES) is replayed
+    instantly; otherwise the pipeline runs and its events are recorded.
+    """
+    ticker = ticker.upper().strip()
+    replay = await replay_events(ticker, reuse_minutes)
+    if replay is not None:
+        for ev in replay:
+            yield ev
+        return
+
+    session_id = await start_session(ticker)
+    events: list[dict] = []
+    conclusion = None
+    try:
+        async for ev in run_full_analysis(ticker, pace=pace):
+            events.append(ev)
+            if ev["event"] == "conclusion":
+                conclusion = json.loads(json.loads(ev["data"])["content"])
+            yield ev
+    except BaseException:
+        # Client went away mid-stream: record without blocking the teardown
+        if conclusion is not None:
+            asyncio.ensure_future(complete_session(session_id, conclusion, events))
+        else:
+            asyncio.ensure_future(fail_session(session_id))
+        raise
+
+    if conclusion is not None:
+        await complete_session(session_id, conclusion, events)
+    else:
+        await fail_session(session_id)
+
@@ -15,6 +15,7 @@ class Settings(BaseSettings):
     REDIS_URL: str = "redis://localhost:6379/0"
     CACHE_TTL_PRICE: int = 300       # 5 minutes
     CACHE_TTL_FUNDAMENTALS: int = 3600  # 1 hour
+    AGENT_SESSION_REUSE_MINUTES: int = 15  # replay completed agent runs younger than this
 
     # ── API Keys ──────────────────────────────────────
     FMP_API_KEY: str = ""
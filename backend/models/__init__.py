@@ -2,7 +2,7 @@
 FinanceIQ v6 — Database ORM Models
 """
 from datetime import datetime
-from sqlalchemy import String, Float, Integer, DateTime, Text, Boolean, ForeignKey, Index
+from sqlalchemy import String, Float, Integer, DateTime, Text, Boolean, ForeignKey, Index, LargeBinary
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from core.database import Base
 
@@ -56,7 +56,7 @@ class AgentSession(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     ticker: Mapped[str] = mapped_column(String(20), index=True)
-    status: Mapped[str] = mapped_column(String(20), default="running")  # running, completed, failed
+    status: Mapped[str] = mapped_column(String(20), default="running")  # running, completed, partial, failed
     verdict: Mapped[str] = mapped_column(String(10), default="")  # BUY, SELL, HOLD
     confidence: Mapped[float] = mapped_column(Float, default=0)
     report_md: Mapped[str] = mapped_column(Text, default="")
@@ -67,6 +67,16 @@ class AgentSession(Base):
     completed_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
 
 
+class AgentSessionLog(Base):
+    """Recorded SSE event log of a completed agent session (for replay)."""
+    __tablename__ = "agent_session_logs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    session_id: Mapped[int] = mapped_column(ForeignKey("agent_sessions.id"), index=True)
+    events_json: Mapped[str] = mapped_column(Text, default="[]")  # JSON array of {event, data}
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
 class Prediction(Base):
     """LSTM price predictions."""
     __tablename__ = "predictions"
@@ -79,3 +89,21 @@ class Prediction(Base):
     confidence_lower: Mapped[str] = mapped_column(Text, default="[]")
     mse: Mapped[float] = mapped_column(Float, default=0)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class BacktestRun(Base):
+    """Stored backtest: summary, parameters and the full columnar result."""
+    __tablename__ = "backtest_runs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    ticker: Mapped[str] = mapped_column(String(20), index=True)
+    kind: Mapped[str] = mapped_column(String(30), default="bidirectional")  # bidirectional, strategy
+    config_hash: Mapped[str] = mapped_column(String(64), unique=True, index=True)  # params + data hash
+    data_hash: Mapped[str] = mapped_column(String(64))
+    params_json: Mapped[str] = mapped_column(Text, default="{}")
+    metrics_json: Mapped[str] = mapped_column(Text, default="{}")
+    report_json: Mapped[str] = mapped_column(Text, default="{}")  # response as first returned
+    bars: Mapped[int] = mapped_column(Integer, default=0)
+    trades: Mapped[int] = mapped_column(Integer, default=0)
+    columns_blob: Mapped[bytes] = mapped_column(LargeBinary)  # compressed npz, see services.backtest_store
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -2,18 +2,67 @@
 FinanceIQ v6 — Agent Router
 Multi-agent analysis with SSE streaming.
 """
+import json
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from sse_starlette.sse import EventSourceResponse
-from agents import run_full_analysis
+from agents import stream_analysis, collect_analysis, screen_tickers
+from agents.analyst_agents import AGENT_WORKERS
 
 router = APIRouter()
 
 
 @router.get("/analyze/{ticker}")
-async def agent_analyze(ticker: str):
+async def agent_analyze(ticker: str, pace: float = 1.0, stream: bool = True, fresh: bool = False):
     """
     Trigger multi-agent analysis with SSE streaming.
     Streams agent thoughts in real-time to the Research Scratchpad.
+    `?pace=0` emits events as soon as they are available; `?stream=false`
+    returns the full event log and conclusion as one JSON response.
+    Recent completed sessions are replayed unless `?fresh=true`; concurrent
+    viewers of the same ticker share one running analysis, and `fresh`
+    requests join it too since it is a new pipeline run.
     """
     ticker = ticker.upper().strip()
-    return EventSourceResponse(run_full_analysis(ticker))
+    reuse_minutes = 0 if fresh else None
+    if not stream:
+        return await collect_analysis(ticker, reuse_minutes=reuse_minutes)
+    return EventSourceResponse(stream_analysis(
+        ticker, pace=max(0.0, min(pace, 5.0)), reuse_minutes=reuse_minutes,
+    ))
+
+
+@router.post("/screen")
+async def agent_screen(data: dict):
+    """
+    Screen many tickers with the agent scorers.
+    Body: {"tickers": [...], "concurrency": 8, "stream": true}
+    concurrency is capped at the agent executor's AGENT_WORKERS threads.
+    Streams NDJSON rows as results arrive, ending with a ranked summary line;
+    with "stream": false returns only the summary.
+    """
+    tickers = data.get("tickers") or []
+    if isinstance(tickers, str):
+        tickers = tickers.split(",")
+    if not tickers:
+        return {"error": "tickers is required"}
+    try:
+        concurrency = int(data.get("concurrency", AGENT_WORKERS))
+    except (TypeError, ValueError):
+        return {"error": "concurrency must be an integer"}
+    if concurrency < 1:
+        return {"error": "concurrency must be at least 1"}
+    concurrency = min(concurrency, AGENT_WORKERS)
+
+    if not data.get("stream", True):
+        summary = {}
+        async for row in screen_tickers(tickers, concurrency=concurrency):
+            if row["type"] == "summary":
+                summary = row
+        return summary
+
+    async def ndjson():
+        async for row in screen_tickers(tickers, concurrency=concurrency):
+            yield json.dumps(row, default=str) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
@@ -7,10 +7,32 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from core import get_db, cache_get, cache_set, get_settings, logger
 from services.news_service import fetch_news, analyze_sentiment
 from services.social_service import aggregate_social_data
-from services.alphamath import apply_signal_decay, calculate_divergence
+from services.alphamath import (
+    apply_signal_decay, calculate_divergence,
+    get_sentiment_series, record_scored_items, align_to_bars,
+)
 from services.contagion_service import analyze_supply_chain_contagion
-from services.options_service import greeks, implied_vol, payoff_diagram, bs_call, bs_put
-from services.backtest_service import run_backtest
+from services.options_service import (
+    greeks, implied_vol, payoff_diagram, bs_call, bs_put, strategy_profile,
+    enrich_chain_frame, years_to_expiry, implied_vol_vec, solve_chain_iv,
+)
+from services.backtest_service import (
+    run_backtest, run_sweep, run_walk_forward, load_history, DEFAULT_PARAMS, ENGINE_VERSION,
+)
+from services.backtest_store import (
+    run_or_load, list_runs, get_run, run_detail, equity_series, trade_page,
+)
+from services.portfolio_backtest import run_portfolio_backtest
+from services.strategies import run_strategy_backtest, describe_strategies
+from services.execution import execution_model
+from services.chain_service import load_chains, frame_columns, columns_to_rows
+from services.vol_surface import build_surface, price_from_surface, surface_grid
+from services.simulation_service import (
+    estimate_gbm_params, paths_from_log_returns, percentile_bands, final_price_stats, TRADING_DAYS,
+    SAMPLING_METHODS, request_seed, band_convergence, stream_simulation, SKETCH_RELATIVE_ACCURACY,
+)
+from services.mc_pricer import price_option_mc
+from services.return_models import RETURN_MODELS, fit_model, simulate_log_returns
 import yfinance as yf
 import pandas as pd
 import numpy as np
@@ -236,6 +258,10 @@ async def get_news(ticker: str, limit: int = 10):
     cache_key = f"alpha_news:{ticker}:{limit}"
     cached = await cache_get(cache_key)
     if cached:
+        # Keep the sentiment series seeded when news is served from cache
+        # (duplicates are ignored). Only decayed items were actually scored;
+        # the FinBERT-timeout fallback caches zero-score placeholders.
+        record_scored_items(ticker, [i for i in cached.get("scored_news", []) if "decay_multiplier" in i])
         return cached
 
     import asyncio
@@ -279,6 +305,7 @@ async def get_news(ticker: str, limit: int = 10):
     # 3. Apply temporal exponential decay
     scored_items = sentiment.get("scored_news", [])
     decayed_items = apply_signal_decay(scored_items, half_life_hours=24.0)
+    record_scored_items(ticker, decayed_items)
     
     # Recalculate average using decayed scores
     if decayed_items:
@@ -316,43 +343,106 @@ async def get_contagion(ticker: str):
     await cache_set(cache_key, analysis, ttl=86400) # 24 hr cache for sec filings
     return analysis
 
+def _bar_epochs(index: pd.DatetimeIndex) -> np.ndarray:
+    """UTC epoch seconds for a yfinance bar index (independent of datetime unit)."""
+    idx = index.tz_localize("UTC") if index.tz is None else index
+    return ((idx - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+
+
 @router.get("/divergence/{ticker}")
-async def get_divergence(ticker: str):
-    """Calculate Teflon/Value Trap divergence based on 3-day price return vs sentiment."""
-    cache_key = f"divergence:{ticker}"
+async def get_divergence(ticker: str, window_hours: int = 72):
+    """
+    Calculate Teflon/Value Trap divergence: trailing price return vs sentiment
+    over the window (default 72h). Sentiment comes from the streaming series,
+    so news is only fetched when the ticker has no history yet.
+    """
+    window_hours = max(1, min(window_hours, 24 * 30))
+    cache_key = f"divergence:{ticker}:{window_hours}"
     cached = await cache_get(cache_key)
     if cached:
         return cached
 
-    # 1. Fetch 3-day price return
+    # 1. Fetch trailing price return over the window
     try:
         stock = yf.Ticker(ticker.upper())
-        hist = stock.history(period="5d")
-        if len(hist) < 2:
+        days = int(np.ceil(window_hours / 24)) + 3
+        hist = stock.history(period=f"{days}d", interval="1h")
+        closes = hist["Close"].values
+        if len(closes) < 2:
             price_return = 0.0
         else:
-            # Trailing 3-day return. 
-            start_price = float(hist["Close"].iloc[-min(4, len(hist))])
-            end_price = float(hist["Close"].iloc[-1])
+            bar_ts = _bar_epochs(hist.index)
+            start_idx = int(np.searchsorted(bar_ts, bar_ts[-1] - window_hours * 3600))
+            start_price = float(closes[min(start_idx, len(closes) - 2)])
+            end_price = float(closes[-1])
             price_return = (end_price - start_price) / start_price * 100
     except:
         price_return = 0.0
 
-    # 2. Fetch decayed sentiment
-    try:
-        news_data = await get_news(ticker, limit=15)
-        sentiment_score = news_data.get("average_score", 0.0)
-    except:
+    # 2. Decayed sentiment over the same window
+    series = get_sentiment_series(ticker)
+    if not len(series):
+        try:
+            await get_news(ticker, limit=15)
+        except:
+            pass
+    sentiment_score = series.window_mean(window_hours)
+    if sentiment_score is None:
         sentiment_score = 0.0
 
     # 3. Calculate Divergence
     result = calculate_divergence(price_return, sentiment_score)
     result["ticker"] = ticker.upper()
+    result["window_hours"] = window_hours
 
     await cache_set(cache_key, result, ttl=1800) # 30 min cache
     return result
 
 
+@router.get("/sentiment/series/{ticker}")
+async def get_sentiment_series_endpoint(ticker: str, days: int = 7, interval: str = "1h"):
+    """
+    Decayed sentiment series aligned with price bars. The series is maintained
+    incrementally as articles are scored; only seeded from news when empty.
+    """
+    ticker = ticker.upper()
+    days = max(1, min(days, 30))
+    if interval not in ("1h", "1d"):
+        interval = "1h"
+
+    series = get_sentiment_series(ticker)
+    if not len(series):
+        await get_news(ticker, limit=15)
+
+    try:
+        import asyncio
+        loop = asyncio.get_event_loop()
+        hist = await loop.run_in_executor(
+            None, lambda: yf.Ticker(ticker).history(period=f"{days}d", interval=interval)
+        )
+        if hist.empty:
+            return {"error": f"No data for {ticker}"}
+
+        bar_ts = _bar_epochs(hist.index)
+        data = series.series(start_ts=float(bar_ts[0]))
+        sentiment = align_to_bars(data, bar_ts)
+
+        return {
+            "ticker": ticker,
+            "interval": interval,
+            "time": bar_ts.tolist(),
+            "close": np.round(hist["Close"].values, 2).tolist(),
+            "sentiment": np.round(sentiment, 4).tolist(),
+            "buckets": {
+                "time": data["time"].tolist(),
+                "sentiment": data["sentiment"].tolist(),
+                "weight": data["weight"].tolist(),
+            },
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+
 # ══════════════════════════════════════════════════════════
 # OPTIONS ANALYTICS
 # ══════════════════════════════════════════════════════════
@@ -375,6 +465,31 @@ async def compute_greeks(data: dict):
         return {"error": str(e)}
 
 
+@router.post("/options/iv")
+async def compute_implied_vols(data: dict):
+    """
+    Solve implied volatility for many contracts at once.
+    Body: spot, strikes[], prices[], expiry_years (scalar or list),
+    types (scalar or list of "call"/"put"), rate.
+    """
+    try:
+        S = float(data["spot"])
+        K = np.asarray(data["strikes"], dtype=float)
+        prices = np.asarray(data["prices"], dtype=float)
+        T = np.asarray(data["expiry_years"], dtype=float)
+        r = float(data.get("rate", 0.05))
+        types = data.get("types", "call")
+        is_call = np.asarray(types) == "call"
+
+        iv, reason = implied_vol_vec(prices, S, K, T, r, is_call)
+        return {
+            "iv": [None if np.isnan(v) else round(float(v), 6) for v in iv.ravel()],
+            "reason": reason.ravel().tolist(),
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+
 @router.post("/options/payoff")
 async def compute_payoff(data: dict):
     """Generate payoff diagram data."""
@@ -388,9 +503,36 @@ async def compute_payoff(data: dict):
         return {"error": str(e)}
 
 
+@router.post("/options/strategy")
+async def compute_strategy(data: dict):
+    """
+    Payoff, P&L curves and net Greeks for a multi-leg strategy.
+    Body: spot, legs[{type, quantity|side, strike, expiry_years|expiry, iv, premium}],
+    rate, points (grid size, default 1000), low, high, horizons[] (years), multiplier.
+    """
+    try:
+        return strategy_profile(
+            data["legs"],
+            float(data["spot"]),
+            r=float(data.get("rate", 0.05)),
+            points=min(int(data.get("points", 1000)), 10_000),
+            low=float(data["low"]) if data.get("low") is not None else None,
+            high=float(data["high"]) if data.get("high") is not None else None,
+            horizons=data.get("horizons"),
+            multiplier=float(data.get("multiplier", 1.0)),
+        )
+    except Exception as e:
+        return {"error": str(e)}
+
+
 @router.get("/options/chain/{ticker}")
-async def get_options_chain(ticker: str):
-    """Get options chain with expiry dates."""
+async def get_options_chain(ticker: str, expiries: str = "", format: str = "rows", limit: int = 20):
+    """
+    Get options chain with expiry dates, Greeks and solved IVs.
+    `expiries`: empty = nearest expiry, "all", or a comma-separated list
+    (fetched in parallel). `format=columns` returns column arrays per side.
+    `limit` caps strikes per side (0 = all).
+    """
     try:
         if ticker.upper().endswith(".NS") or ticker.upper().endswith(".BO"):
             # === ZERODHA KITE CONNECT SKELETON ===
@@ -417,103 +559,546 @@ async def get_options_chain(ticker: str):
                 }
 
         # === DEFAULT YFINANCE BEHAVIOR ===
-        stock = yf.Ticker(ticker.upper())
-        expirations = stock.options
+        import asyncio
+        loop = asyncio.get_event_loop()
+        expirations = await loop.run_in_executor(None, lambda: list(yf.Ticker(ticker.upper()).options or []))
         if not expirations:
             return {"error": f"No options data for {ticker}"}
 
-        # Return first expiry chain
-        exp = expirations[0]
-        chain = stock.option_chain(exp)
+        # First expiry by default; "all" or a comma list fetches in parallel
+        if expiries == "all":
+            selected = expirations
+        elif expiries:
+            selected = [e for e in expiries.split(",") if e in expirations] or expirations[:1]
+        else:
+            selected = expirations[:1]
+
+        spot, _, loaded = await loop.run_in_executor(None, load_chains, ticker, selected)
+        if not loaded:
+            return {"error": f"Failed to load options chain for {ticker}"}
+
+        chains = {}
+        for exp in selected:
+            if exp not in loaded:
+                continue
+            T = years_to_expiry(exp)
+            sides = {}
+            for side, df in zip(("call", "put"), loaded[exp]):
+                if limit:
+                    df = df.head(limit)
+                if spot:
+                    # Greeks + IV for the whole side in one vectorized pass
+                    df = solve_chain_iv(enrich_chain_frame(df, spot, T, opt_type=side), spot, T, opt_type=side)
+                cols = frame_columns(df)
+                sides[side + "s"] = cols if format == "columns" else columns_to_rows(cols, _type=side)
+            chains[exp] = sides
+
+        first = next(iter(chains))
+        result = {
+            "ticker": ticker.upper(),
+            "spot": round(spot, 4) if spot else None,
+            "format": format,
+            "expirations": list(expirations[:8]),  # first 8 expiries
+            "selected_expiry": first,
+            "calls": chains[first]["calls"],
+            "puts": chains[first]["puts"],
+        }
+        if len(chains) > 1:
+            result["chains"] = chains
+        return result
+    except Exception as e:
+        return {"error": str(e)}
+
 
-        calls = [{**row.to_dict(), "_type": "call"} for _, row in chain.calls.iterrows()]
-        puts = [{**row.to_dict(), "_type": "put"} for _, row in chain.puts.iterrows()]
+async def _load_surface(ticker: str, quote_time: int | None = None, refresh: bool = False) -> dict:
+    """Cached fitted surface keyed by underlying and quote time (latest by default)."""
+    ticker = ticker.upper()
+    if quote_time is None and not refresh:
+        quote_time = await cache_get(f"vol_surface:{ticker}:latest")
+    if quote_time is not None and not refresh:
+        cached = await cache_get(f"vol_surface:{ticker}:{quote_time}")
+        if cached:
+            return cached
 
+    import asyncio
+    loop = asyncio.get_event_loop()
+    spot, _, chains = await loop.run_in_executor(None, load_chains, ticker)
+    if not spot or not chains:
+        return {"error": f"No options data for {ticker}"}
+    surface = await loop.run_in_executor(None, build_surface, spot, chains)
+    if not surface["slices"]:
+        return {"error": f"Not enough liquid quotes to fit a surface for {ticker}"}
+    surface["ticker"] = ticker
+
+    ttl = settings.CACHE_TTL_PRICE
+    await cache_set(f"vol_surface:{ticker}:{surface['quote_time']}", surface, ttl=ttl)
+    await cache_set(f"vol_surface:{ticker}:latest", surface["quote_time"], ttl=ttl)
+    return surface
+
+
+@router.get("/options/surface/{ticker}")
+async def get_vol_surface(ticker: str, refresh: bool = False):
+    """Fitted SVI implied-vol surface across all expirations, plus a plotting grid."""
+    try:
+        surface = await _load_surface(ticker, refresh=refresh)
+        if "error" in surface:
+            return surface
+        return {**surface, "grid": surface_grid(surface)}
+    except Exception as e:
+        traceback.print_exc()
+        return {"error": str(e)}
+
+
+@router.post("/options/surface/{ticker}/price")
+async def price_off_surface(ticker: str, data: dict):
+    """
+    Price arbitrary contracts off the cached surface (no chain refetch).
+    Body: strikes[], expiry_years (scalar or list), types, optional quote_time.
+    """
+    try:
+        surface = await _load_surface(ticker, quote_time=data.get("quote_time"))
+        if "error" in surface:
+            return surface
+        K = np.asarray(data["strikes"], dtype=float)
+        T = np.asarray(data["expiry_years"], dtype=float)
+        is_call = np.asarray(data.get("types", "call")) == "call"
+        out = price_from_surface(surface, K, T, is_call)
         return {
             "ticker": ticker.upper(),
-            "expirations": list(expirations[:8]),  # first 8 expiries
-            "selected_expiry": exp,
-            "calls": calls[:20],  # top 20
-            "puts": puts[:20],
+            "spot": surface["spot"],
+            "quote_time": surface["quote_time"],
+            **{k: np.round(v, 6).ravel().tolist() for k, v in out.items()},
         }
     except Exception as e:
         return {"error": str(e)}
 
 
+@router.post("/options/mc_price")
+async def price_option_monte_carlo(data: dict):
+    """
+    Monte Carlo price for European, American (Longstaff-Schwartz), Asian or
+    barrier options. Body: spot, strike, expiry_years, rate, iv (or ticker to
+    estimate spot/vol from 2y history), type, style, paths, steps, barrier,
+    barrier_kind, antithetic, control_variate, seed.
+    """
+    try:
+        import asyncio
+        loop = asyncio.get_event_loop()
+        spot = data.get("spot")
+        sigma = data.get("iv")
+        ticker = data.get("ticker", "").upper()
+        if ticker and (spot is None or sigma is None):
+            hist = await loop.run_in_executor(None, lambda: yf.Ticker(ticker).history(period="2y"))
+            if hist.empty:
+                return {"error": f"No historical data for {ticker}"}
+            closes = hist["Close"].values
+            if spot is None:
+                spot = float(closes[-1])
+            if sigma is None:
+                sigma = estimate_gbm_params(closes)[1] * np.sqrt(TRADING_DAYS)
+        if spot is None or sigma is None:
+            return {"error": "spot and iv are required (or pass a ticker)"}
+
+        kwargs = dict(
+            spot=float(spot),
+            strike=float(data["strike"]),
+            T=float(data["expiry_years"]),
+            rate=float(data.get("rate", 0.05)),
+            sigma=float(sigma),
+            opt_type=data.get("type", "call"),
+            style=data.get("style", "european"),
+            paths=min(int(data.get("paths", 100_000)), 5_000_000),
+            steps=min(int(data.get("steps", 50)), 1000),
+            antithetic=bool(data.get("antithetic", True)),
+            control_variate=bool(data.get("control_variate", True)),
+            barrier=float(data["barrier"]) if data.get("barrier") is not None else None,
+            barrier_kind=data.get("barrier_kind", "up-and-out"),
+            seed=data.get("seed"),
+        )
+        result = await loop.run_in_executor(None, lambda: price_option_mc(**kwargs))
+        result.update({"spot": round(kwargs["spot"], 4), "sigma": round(kwargs["sigma"], 6)})
+        return result
+    except Exception as e:
+        traceback.print_exc()
+        return {"error": str(e)}
+
+
 # ══════════════════════════════════════════════════════════
 # BACKTESTING
 # ══════════════════════════════════════════════════════════
 
 @router.post("/backtest")
 async def backtest(data: dict):
-    """Run bi-directional backtest on a ticker."""
+    """
+    Run bi-directional backtest on a ticker.
+    Optional "execution" (true for defaults, or {fill: close | next_open |
+    vwap, slippage_bps, impact_coef, participation, commission: per_share |
+    percent | flat | none | {per_share, bps, per_order, minimum},
+    min_trade_value}) fills orders with realistic timing, costs and volume
+    limits; without it trades fill at the close for free.
+    The full result is stored (see /backtest/runs); an identical request
+    over unchanged price data returns the stored run.
+    """
     ticker = data.get("ticker", "").upper()
     period = data.get("period", "1y")
     budget = float(data.get("monthly_budget", 300))
 
     if not ticker:
         return {"error": "Ticker is required"}
+    try:
+        execution = execution_model(data["execution"]) if data.get("execution") not in (None, False) else None
+    except (ValueError, TypeError, AttributeError) as e:
+        return {"error": str(e)}
 
-    cache_key = f"backtest:{ticker}:{period}:{budget}"
+    import json, asyncio
+    # The engine version keeps results from an older simulation out of the cache
+    cache_key = f"backtest:v{ENGINE_VERSION}:{ticker}:{period}:{budget}"
+    if execution is not None:
+        cache_key += ":" + json.dumps(execution, sort_keys=True)
     cached = await cache_get(cache_key)
     if cached:
         return cached
 
-    result = run_backtest(ticker, period, budget)
+    loop = asyncio.get_event_loop()
+    try:
+        hist = await loop.run_in_executor(None, load_history, ticker, period)
+    except Exception as e:
+        return {"error": str(e)}
+    config = {"ticker": ticker, "period": period, "monthly_budget": budget, **DEFAULT_PARAMS}
+    if execution is not None:
+        config["execution"] = execution
+    result = await run_or_load("bidirectional", config, hist, lambda: run_backtest(
+        ticker, period, budget, hist=hist, keep_columns=True, execution=execution))
     if "error" not in result:
         await cache_set(cache_key, result, ttl=3600)  # 1-hour cache
     return result
 
+@router.get("/backtest/runs")
+async def backtest_runs(ticker: str = "", kind: str = "", limit: int = 50, offset: int = 0):
+    """Stored backtest runs, newest first."""
+    try:
+        return await list_runs(ticker or None, kind or None, limit, offset)
+    except Exception as e:
+        return {"error": str(e)}
+
+@router.get("/backtest/runs/{run_id}")
+async def backtest_run(run_id: int):
+    """Stored run: parameters, metrics, data hash and the original response."""
+    row = await get_run(run_id)
+    if row is None:
+        return {"error": f"Backtest run {run_id} not found"}
+    return run_detail(row)
+
+@router.get("/backtest/runs/{run_id}/equity")
+async def backtest_run_equity(run_id: int, offset: int = 0, limit: int | None = None, points: int | None = None):
+    """
+    Full-resolution equity curve of a stored run. Page with offset/limit,
+    or pass points to get a min/max-preserving downsample of the range.
+    """
+    row = await get_run(run_id)
+    if row is None:
+        return {"error": f"Backtest run {run_id} not found"}
+    # Decoding the stored columns is CPU work; keep it off the event loop
+    import asyncio
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, equity_series, row, offset, limit, points)
+
+@router.get("/backtest/runs/{run_id}/trades")
+async def backtest_run_trades(run_id: int, offset: int = 0, limit: int = 500):
+    """Paged trade log of a stored run."""
+    row = await get_run(run_id)
+    if row is None:
+        return {"error": f"Backtest run {run_id} not found"}
+    import asyncio
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, trade_page, row, offset, limit)
+
+@router.post("/backtest/sweep")
+async def backtest_sweep(data: dict):
+    """
+    Grid-search the backtest parameters.
+    Body: ticker, period, monthly_budget, ema_span / bb_window / hedge_threshold
+    (each a value, list, or {start, stop, step}), rank_by (sharpe, roi,
+    max_drawdown), heatmap ([x_param, y_param]), top.
+    """
+    ticker = data.get("ticker", "").upper()
+    if not ticker:
+        return {"error": "Ticker is required"}
+    heatmap = data.get("heatmap", ["ema_span", "bb_window"])
+    params = ("ema_span", "bb_window", "hedge_threshold")
+    if len(heatmap) != 2 or heatmap[0] == heatmap[1] or not set(heatmap) <= set(params):
+        return {"error": f"heatmap must name two of {params}"}
+
+    import json, asyncio
+    cache_key = f"backtest_sweep:v{ENGINE_VERSION}:" + json.dumps(data, sort_keys=True)
+    cached = await cache_get(cache_key)
+    if cached:
+        return cached
+
+    loop = asyncio.get_event_loop()
+    result = await loop.run_in_executor(None, lambda: run_sweep(
+        ticker,
+        period=data.get("period", "1y"),
+        monthly_budget=float(data.get("monthly_budget", 300)),
+        ema_span=data.get("ema_span", {"start": 3, "stop": 30, "step": 1}),
+        bb_window=data.get("bb_window", {"start": 10, "stop": 40, "step": 2}),
+        hedge_threshold=data.get("hedge_threshold", [0.04, 0.06, 0.08, 0.1, 0.12, 1.0]),
+        rank_by=data.get("rank_by", "sharpe"),
+        heatmap=tuple(heatmap),
+        top=int(data.get("top", 50)),
+    ))
+    if "error" not in result:
+        await cache_set(cache_key, result, ttl=3600)
+    return result
+
+@router.post("/backtest/walk_forward")
+async def backtest_walk_forward(data: dict):
+    """
+    Walk-forward optimization with a stitched out-of-sample equity curve.
+    Body: ticker, period, monthly_budget, train_bars, test_bars, anchored,
+    ema_span / bb_window / hedge_threshold ranges (as for /backtest/sweep), rank_by.
+    """
+    ticker = data.get("ticker", "").upper()
+    if not ticker:
+        return {"error": "Ticker is required"}
+
+    import json, asyncio
+    cache_key = f"backtest_walk_forward:v{ENGINE_VERSION}:" + json.dumps(data, sort_keys=True)
+    cached = await cache_get(cache_key)
+    if cached:
+        return cached
+
+    loop = asyncio.get_event_loop()
+    result = await loop.run_in_executor(None, lambda: run_walk_forward(
+        ticker,
+        period=data.get("period", "5y"),
+        monthly_budget=float(data.get("monthly_budget", 300)),
+        train_bars=int(data.get("train_bars", 252)),
+        test_bars=int(data.get("test_bars", 63)),
+        anchored=bool(data.get("anchored", False)),
+        ema_span=data.get("ema_span", {"start": 3, "stop": 20, "step": 1}),
+        bb_window=data.get("bb_window", {"start": 10, "stop": 40, "step": 5}),
+        hedge_threshold=data.get("hedge_threshold", [0.06, 0.08, 0.1, 1.0]),
+        rank_by=data.get("rank_by", "sharpe"),
+    ))
+    if "error" not in result:
+        await cache_set(cache_key, result, ttl=3600)
+    return result
+
+@router.post("/backtest/portfolio")
+async def backtest_portfolio(data: dict):
+    """
+    Multi-ticker backtest with shared cash and periodic rebalancing.
+    Body: tickers[], period, allocation (equal, inverse_vol, momentum),
+    rebalance (weekly, monthly, quarterly or bar count), lookback, top_n,
+    initial_cash, slippage_bps, commission_per_share, min_commission,
+    min_trade_value (skip rebalance orders smaller than this notional).
+    """
+    tickers = data.get("tickers") or []
+    if isinstance(tickers, str):
+        tickers = tickers.split(",")
+    if not tickers:
+        return {"error": "tickers is required"}
+
+    import json, asyncio
+    cache_key = "backtest_portfolio:" + json.dumps(data, sort_keys=True)
+    cached = await cache_get(cache_key)
+    if cached:
+        return cached
+
+    loop = asyncio.get_event_loop()
+    result = await loop.run_in_executor(None, lambda: run_portfolio_backtest(
+        tickers,
+        period=data.get("period", "2y"),
+        allocation=data.get("allocation", "equal"),
+        rebalance=data.get("rebalance", "monthly"),
+        lookback=int(data.get("lookback", 63)),
+        top_n=int(data["top_n"]) if data.get("top_n") else None,
+        initial_cash=float(data.get("initial_cash", 100_000)),
+        slippage_bps=float(data.get("slippage_bps", 5)),
+        commission_per_share=float(data.get("commission_per_share", 0.005)),
+        min_commission=float(data.get("min_commission", 1.0)),
+        min_trade_value=float(data.get("min_trade_value", 0.0)),
+    ))
+    if "error" not in result:
+        await cache_set(cache_key, result, ttl=3600)
+    return result
+
+@router.get("/backtest/strategies")
+async def backtest_strategies():
+    """Registered strategies plus the functions and bar fields usable in rule expressions."""
+    return describe_strategies()
+
+@router.post("/backtest/strategy")
+async def backtest_strategy(data: dict):
+    """
+    Backtest a pluggable strategy through the standard engine.
+    Body: ticker, period, monthly_budget, strategy — a registered name,
+    {"name", "params"}, or rule expressions {"long", "short", "hedge"}
+    such as {"long": "close > sma(close, 50)", "short": "rsi(close, 14) > 70"}.
+    Bars where no rule fires are held flat (in cash). Optional "execution"
+    as for /backtest. Results are stored like /backtest runs.
+    """
+    ticker = data.get("ticker", "").upper()
+    strategy = data.get("strategy")
+    if not ticker:
+        return {"error": "Ticker is required"}
+    if not strategy:
+        return {"error": "strategy is required"}
+    try:
+        execution = execution_model(data["execution"]) if data.get("execution") not in (None, False) else None
+    except (ValueError, TypeError, AttributeError) as e:
+        return {"error": str(e)}
+
+    import json, asyncio
+    cache_key = f"backtest_strategy:v{ENGINE_VERSION}:" + json.dumps(data, sort_keys=True)
+    cached = await cache_get(cache_key)
+    if cached:
+        return cached
+
+    period = data.get("period", "1y")
+    budget = float(data.get("monthly_budget", 300))
+    loop = asyncio.get_event_loop()
+    try:
+        hist = await loop.run_in_executor(None, load_history, ticker, period)
+    except Exception as e:
+        return {"error": str(e)}
+    config = {"ticker": ticker, "period": period, "monthly_budget": budget, "strategy": strategy}
+    if execution is not None:
+        config["execution"] = execution
+    result = await run_or_load("strategy", config, hist, lambda: run_strategy_backtest(
+        ticker, strategy, period, budget, hist=hist, keep_columns=True, execution=execution))
+    if "error" not in result:
+        await cache_set(cache_key, result, ttl=3600)
+    return result
+
 # ══════════════════════════════════════════════════════════
 # MONTE CARLO SIMULATION
 # ══════════════════════════════════════════════════════════
 
+MC_MAX_RAW_PATHS = 1000
+MC_MAX_SIMS = 100_000
+MC_MAX_STREAM_SIMS = 2_000_000
+MC_MAX_DAYS = 504  # two trading years; bounds the per-day bands and stream sketches
+
+
+async def _load_return_model(ticker: str, model: str) -> dict:
+    """Fitted return model for a ticker's 2y closes, cached so repeat runs only sample."""
+    cache_key = f"return_model:{ticker.upper()}:{model}"
+    cached = await cache_get(cache_key)
+    if cached:
+        return cached
+
+    import asyncio
+    loop = asyncio.get_event_loop()
+    hist = await loop.run_in_executor(None, lambda: yf.Ticker(ticker.upper()).history(period="2y"))
+    if hist.empty:
+        return {"error": f"No historical data for {ticker}"}
+    fit = await loop.run_in_executor(None, fit_model, model, hist["Close"].values)
+    await cache_set(cache_key, fit, ttl=settings.CACHE_TTL_FUNDAMENTALS)
+    return fit
+
+
 @router.get("/analyze/monte_carlo/{ticker}")
-async def monte_carlo(ticker: str, days: int = 30, sims: int = 100):
-    """Simulate 100 future price paths using Geometric Brownian Motion (GBM)."""
-    # 100 paths is optimal payload limit for rendering in SVG canvas
-    cache_key = f"monte_carlo:{ticker}:{days}:{sims}"
+async def monte_carlo(ticker: str, days: int = 30, sims: int = 100, mode: str = "auto", dtype: str = "float64",
+                      method: str = "pseudo", seed: int | None = None, model: str = "gbm"):
+    """
+    Simulate future price paths under a return model: gbm (default),
+    bootstrap (block bootstrap of history), garch (GARCH(1,1) volatility) or
+    jump (Merton jump diffusion). Fits are cached per ticker.
+    mode=paths returns raw paths (capped at 1000, the SVG rendering limit);
+    mode=bands returns per-day percentile bands, so 10k+ simulations stay a
+    small payload; mode=stream simulates in chunks into per-day quantile
+    sketches (constant memory, up to 2M sims, bands within 0.1% relative
+    error); auto picks paths up to 1000 sims, bands up to 100k, then stream.
+    days is capped at 504 in every mode. dtype=float32 halves memory.
+    method: pseudo, antithetic, sobol or halton (quasi-random with Brownian
+    bridge; stable bands from far fewer paths; sobol rounds sims down to a
+    power of two). The seed used is returned so
+    a run can be reproduced (bootstrap resamples history and ignores method).
+    """
+    sims = max(1, min(sims, MC_MAX_STREAM_SIMS))
+    days = max(2, min(days, MC_MAX_DAYS))
+    if mode == "auto":
+        mode = "paths" if sims <= MC_MAX_RAW_PATHS else "bands" if sims <= MC_MAX_SIMS else "stream"
+    if mode not in ("paths", "bands", "stream"):
+        return {"error": "mode must be auto, paths, bands or stream"}
+    if method not in SAMPLING_METHODS:
+        return {"error": f"method must be one of {', '.join(SAMPLING_METHODS)}"}
+    if model not in RETURN_MODELS:
+        return {"error": f"model must be one of {', '.join(RETURN_MODELS)}"}
+    if mode == "paths":
+        sims = min(sims, MC_MAX_RAW_PATHS)
+    elif mode == "bands":
+        sims = min(sims, MC_MAX_SIMS)
+    if method == "sobol":
+        # Sobol rounds up to a power of two; round down instead to stay under the cap
+        sims = 1 << (sims.bit_length() - 1)
+    np_dtype = np.float32 if dtype == "float32" else np.float64
+
+    cache_key = f"monte_carlo:{ticker}:{days}:{sims}:{mode}:{np_dtype.__name__}:{method}:{model}:{seed}"
     cached = await cache_get(cache_key)
     if cached: return cached
+    seed = request_seed(seed)
 
     try:
-        stock = yf.Ticker(ticker.upper())
-        hist = stock.history(period="2y")
-        if hist.empty:
-            return {"error": f"No historical data for {ticker}"}
-        
-        closes = hist["Close"].values
-        current_price = float(closes[-1])
-        
-        returns = np.diff(closes) / closes[:-1]
-        log_returns = np.log(1 + returns)
-        
-        u = log_returns.mean()
-        var = log_returns.var()
-        drift = u - (0.5 * var)
-        stdev = log_returns.std()
-        
-        Z = np.random.normal(0, 1, (days, sims))
-        daily_returns = np.exp(drift + stdev * Z)
-        
-        price_paths = np.zeros_like(daily_returns)
-        price_paths[0] = current_price
-        
-        for t in range(1, days):
-            price_paths[t] = price_paths[t-1] * daily_returns[t]
-
-        paths = price_paths.T.tolist()
-
-        final_prices = [p[-1] for p in paths]
-        mean_final = float(np.mean(final_prices))
-        pct_up = float(sum(1 for p in final_prices if p > current_price) / sims * 100)
+        fit = await _load_return_model(ticker, model)
+        if "error" in fit:
+            return fit
+        current_price = fit["S0"]
+        rng = np.random.default_rng(seed)
+
+        if mode == "stream":
+            def simulate_chunk(size):
+                log_returns = simulate_log_returns(fit, days - 1, size, rng, method=method, dtype=np_dtype)
+                return paths_from_log_returns(current_price, log_returns)
+
+            import asyncio
+            loop = asyncio.get_event_loop()
+            sketch = await loop.run_in_executor(None, lambda: stream_simulation(
+                simulate_chunk, sims, days, current_price, power_of_two=method == "sobol"))
+            stats = sketch.final_stats(current_price)
+            result = {
+                "mode": mode,
+                "model": model,
+                "model_params": {k: v for k, v in fit.items() if k not in ("returns", "model")},
+                "method": method,
+                "seed": seed,
+                "simulations": sketch.n,
+                "mean_final_price": stats["mean"],
+                "pct_chance_up": stats["pct_up"],
+                "current_price": round(current_price, 2),
+                "final_stats": stats,
+                "bands": sketch.bands(),
+                "mean_path": np.round(sketch.mean, 2).tolist(),
+                "std_path": np.round(sketch.std(), 2).tolist(),
+                "quantile_relative_error": SKETCH_RELATIVE_ACCURACY,
+                "clamped": sketch.clamped,
+            }
+            await cache_set(cache_key, result, ttl=3600)
+            return result
+
+        # (sims, days) paths starting at the last close, built in one cumsum
+        log_returns = simulate_log_returns(fit, days - 1, sims, rng, method=method, dtype=np_dtype)
+        price_paths = paths_from_log_returns(current_price, log_returns)
+        stats = final_price_stats(price_paths, current_price)
 
         result = {
-            "paths": paths,
-            "mean_final_price": round(mean_final, 2),
-            "pct_chance_up": round(pct_up, 2),
-            "current_price": round(current_price, 2)
+            "mode": mode,
+            "model": model,
+            "model_params": {k: v for k, v in fit.items() if k not in ("returns", "model")},
+            "method": method,
+            "seed": seed,
+            "simulations": price_paths.shape[0],
+            "mean_final_price": stats["mean"],
+            "pct_chance_up": stats["pct_up"],
+            "current_price": round(current_price, 2),
+            "final_stats": stats,
         }
+        if mode == "paths":
+            result["paths"] = np.round(price_paths, 4).tolist()
+        else:
+            result["bands"] = percentile_bands(price_paths)
         await cache_set(cache_key, result, ttl=3600) # 1 hour
         return result
     except Exception as e:
@@ -521,6 +1106,35 @@ async def monte_carlo(ticker: str, days: int = 30, sims: int = 100):
         return {"error": str(e)}
 
 
+@router.get("/analyze/monte_carlo/{ticker}/convergence")
+async def monte_carlo_convergence(ticker: str, days: int = 30, reps: int = 8, seed: int = 0):
+    """
+    Benchmark the sampling methods on the ticker's fitted GBM: relative error
+    of the terminal p10/p50/p90 versus exact lognormal quantiles by path count.
+    """
+    cache_key = f"monte_carlo_convergence:{ticker}:{days}:{reps}:{seed}"
+    cached = await cache_get(cache_key)
+    if cached: return cached
+
+    try:
+        import asyncio
+        loop = asyncio.get_event_loop()
+        hist = await loop.run_in_executor(None, lambda: yf.Ticker(ticker.upper()).history(period="2y"))
+        if hist.empty:
+            return {"error": f"No historical data for {ticker}"}
+        drift, stdev = estimate_gbm_params(hist["Close"].values)
+        reps = max(1, min(reps, 32))
+        result = await loop.run_in_executor(
+            None, lambda: band_convergence(drift, stdev, max(1, days - 1), reps=reps, seed=seed)
+        )
+        result["ticker"] = ticker.upper()
+        await cache_set(cache_key, result, ttl=3600)
+        return result
+    except Exception as e:
+        traceback.print_exc()
+        return {"error": str(e)}
+
+
 # ══════════════════════════════════════════════════════════
 # DEDICATED ENDPOINTS FOR FRONTEND DASHBOARD
 # ══════════════════════════════════════════════════════════
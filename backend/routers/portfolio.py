@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from core import get_db
 from models import PortfolioPosition, PortfolioTransaction
+from services.portfolio_risk import portfolio_risk
 import yfinance as yf
 
 router = APIRouter()
@@ -124,3 +125,31 @@ async def execute_trade(data: dict, db: AsyncSession = Depends(get_db)):
 
     except Exception as e:
         return {"error": str(e)}
+
+
+@router.get("/portfolio/risk")
+async def get_portfolio_risk(
+    horizon_days: int = 10,
+    paths: int = 100_000,
+    period: str = "2y",
+    use_drift: bool = False,
+    seed: int | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Correlated Monte Carlo VaR / CVaR and drawdown distribution for current positions."""
+    positions = (await db.execute(select(PortfolioPosition))).scalars().all()
+    holdings = [{"ticker": p.ticker, "shares": p.shares, "side": p.side} for p in positions if p.shares > 0]
+
+    try:
+        import asyncio
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, lambda: portfolio_risk(
+            holdings,
+            horizon_days=max(1, min(horizon_days, 252)),
+            n_paths=max(1000, min(paths, 1_000_000)),
+            period=period,
+            use_drift=use_drift,
+            seed=seed,
+        ))
+    except Exception as e:
+        return {"error": str(e)}
@@ -1,3 +1,3 @@
-from . import news_service, options_service, backtest_service, ai_service, contagion_service, alphamath, social_service
+from . import news_service, options_service, backtest_service, ai_service, contagion_service, alphamath, social_service, chain_service, vol_surface, simulation_service, mc_pricer, return_models, portfolio_risk, execution, portfolio_backtest, strategies, backtest_store
 
-__all__ = ["news_service", "options_service", "backtest_service", "ai_service", "contagion_service", "alphamath", "social_service"]
+__all__ = ["news_service", "options_service", "backtest_service", "ai_service", "contagion_service", "alphamath", "social_service", "chain_service", "vol_surface", "simulation_service", "mc_pricer", "return_models", "portfolio_risk", "execution", "portfolio_backtest", "strategies", "backtest_store"]
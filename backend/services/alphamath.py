@@ -2,8 +2,81 @@
 FinanceIQ v6 — AlphaMath: Signal Decay Engine (Temporal Exponential Decay)
 """
 from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Optional
 from core.logging import logger
 import math
+import threading
+import time
+import numpy as np
+
+MAX_SIGNAL_AGE_HOURS = 72.0
+
+# Fallback formats for sources that are not RFC-822 (Nitter, ISO feeds).
+# Naive results are interpreted as UTC.
+_FALLBACK_FORMATS = [
+    "%Y-%m-%dT%H:%M:%SZ",
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%b %d, %Y · %I:%M %p UTC",  # Nitter
+    "%a, %d %b %Y %H:%M:%S",
+]
+
+
+@lru_cache(maxsize=4096)
+def _parse_fallback(published_time_str: str) -> Optional[float]:
+    """Memoized strptime fallback. Returns epoch seconds or None."""
+    clean_str = published_time_str.replace(" GMT", "").strip()
+    for fmt in _FALLBACK_FORMATS:
+        try:
+            dt = datetime.strptime(clean_str, fmt)
+        except ValueError:
+            continue
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    return None
+
+
+def parse_published_ts(published_time_str: str) -> Optional[float]:
+    """
+    Parse a publish timestamp into UTC epoch seconds.
+    RFC-822 dates (RSS, Reddit) go through email.utils; everything else
+    hits the memoized strptime fallback. Returns None if unparsable.
+    """
+    if not published_time_str:
+        return None
+    try:
+        dt = parsedate_to_datetime(published_time_str)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    except (TypeError, ValueError, IndexError):
+        return _parse_fallback(published_time_str)
+
+
+def _item_ts(item: dict) -> Optional[float]:
+    """Epoch seconds for an item, preferring the value stamped at ingestion."""
+    ts = item.get("published_ts")
+    if ts is None:
+        ts = parse_published_ts(item.get("published", ""))
+    return ts
+
+
+def decay_multipliers(ages_hours: np.ndarray, half_life_hours: float = 24.0) -> np.ndarray:
+    """
+    Vectorized exponential decay: M(t) = (0.5)^(t / half_life).
+    NaN ages (unparsable timestamps) map to 1.0, future timestamps are
+    clamped to age 0 and anything older than 72 hours is zeroed.
+    """
+    ages = np.asarray(ages_hours, dtype=float)
+    unknown = np.isnan(ages)
+    ages = np.clip(np.where(unknown, 0.0, ages), 0.0, None)
+    mult = np.power(0.5, ages / half_life_hours)
+    mult[ages > MAX_SIGNAL_AGE_HOURS] = 0.0
+    mult[unknown] = 1.0
+    return np.round(mult, 4)
+
 
 def calculate_time_decay(published_time_str: str, half_life_hours: float = 24.0) -> float:
     """
@@ -13,50 +86,11 @@ def calculate_time_decay(published_time_str: str, half_life_hours: float = 24.0)
     We return the multiplier (0.0 to 1.0) based on age.
     """
     try:
-        dt = None
-        formats = [
-            "%a, %d %b %Y %H:%M:%S %Z",
-            "%a, %d %b %Y %H:%M:%S GMT",
-            "%Y-%m-%dT%H:%M:%SZ",
-            "%b %d, %Y · %I:%M %p UTC", # Nitter
-            "%a, %d %b %Y %H:%M:%S"
-        ]
-        
-        for fmt in formats:
-            try:
-                # Remove GMT text if present for fallback
-                clean_str = published_time_str.replace(" GMT", "")
-                dt = datetime.strptime(clean_str, fmt.replace(" %Z", "").replace(" GMT", ""))
-                break
-            except ValueError:
-                # Also try original
-                try:
-                    dt = datetime.strptime(published_time_str, fmt)
-                    break
-                except ValueError:
-                    continue
-                
-        if not dt:
+        ts = parse_published_ts(published_time_str)
+        if ts is None:
             return 1.0 # Fallback if unparsable
-            
-        now = datetime.now() # Assume local/naive
-        # Timezone stripping hack if needed
-        if dt.tzinfo:
-            dt = dt.replace(tzinfo=None)
-            
-        age_delta = now - dt
-        age_hours = age_delta.total_seconds() / 3600.0
-        
-        if age_hours < 0:
-            age_hours = 0
-            
-        multiplier = math.pow(0.5, age_hours / half_life_hours)
-        
-        # Hard cap if older than 72 hours
-        if age_hours > 72:
-            return 0.0
-            
-        return round(multiplier, 4)
+        age_hours = (time.time() - ts) / 3600.0
+        return float(decay_multipliers(np.array([age_hours]), half_life_hours)[0])
     except Exception as e:
         logger.error(f"Time decay error: {e}")
         return 1.0
@@ -65,21 +99,174 @@ def apply_signal_decay(scored_items: list[dict], half_life_hours: float = 24.0)
     """
     Given a list of items with 'sentiment_score' and 'published',
     return a new list where 'decayed_score' is calculated.
+    Uses 'published_ts' (epoch seconds) when the ingesting service set it.
     """
-    decayed_list = []
-    
+    if not scored_items:
+        return []
+
+    now = time.time()
+    ts = np.array([_item_ts(item) for item in scored_items], dtype=float)
+    scores = np.array([item.get("sentiment_score", 0.0) for item in scored_items], dtype=float)
+
+    multipliers = decay_multipliers((now - ts) / 3600.0, half_life_hours)
+    decayed = np.round(scores * multipliers, 4)
+
+    for item, m, d in zip(scored_items, multipliers.tolist(), decayed.tolist()):
+        item["decay_multiplier"] = m
+        item["decayed_score"] = d
+
+    return scored_items
+
+# ══════════════════════════════════════════════════════════
+# STREAMING SENTIMENT SERIES
+# ══════════════════════════════════════════════════════════
+
+class SentimentSeries:
+    """
+    Per-ticker decayed sentiment, bucketed by time (hourly by default).
+
+    Each bucket keeps the decayed score mass and decayed article weight
+    referenced to the bucket's end, so adding an article is O(1). The
+    level at bucket b is the recursive filter
+        S_b = S_{b-1} * 0.5^(bucket / half_life) + c_b
+    and the reported sentiment is S_b / W_b (decay-weighted mean score).
+    Unlike the snapshot decay there is no 72h hard cut-off. Buckets also
+    count their articles so window_mean can report the snapshot average.
+    """
+
+    def __init__(self, bucket_seconds: int = 3600, half_life_hours: float = 24.0,
+                 retention_hours: float = 24 * 30):
+        self.bucket_seconds = bucket_seconds
+        self.half_life_seconds = half_life_hours * 3600.0
+        self.retention_seconds = retention_hours * 3600.0
+        self._buckets: dict[int, list[float]] = {}  # bucket start -> [score mass, weight, count]
+        self._oldest: Optional[int] = None          # earliest bucket start, for O(1) pruning checks
+        self._seen: dict[str, float] = {}           # article key -> published_ts
+        self._lock = threading.Lock()
+
+    def _decay(self, seconds: float) -> float:
+        return math.pow(0.5, seconds / self.half_life_seconds)
+
+    def add(self, published_ts: float, score: float, key: str = "") -> bool:
+        """Fold one scored article into its bucket. Returns False for duplicates."""
+        with self._lock:
+            if key:
+                if key in self._seen:
+                    return False
+                self._seen[key] = published_ts
+            start = int(published_ts // self.bucket_seconds) * self.bucket_seconds
+            f = self._decay(start + self.bucket_seconds - published_ts)
+            bucket = self._buckets.setdefault(start, [0.0, 0.0, 0])
+            bucket[0] += score * f
+            bucket[1] += f
+            bucket[2] += 1
+            if self._oldest is None or start < self._oldest:
+                self._oldest = start
+            self._prune(time.time())
+            return True
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.retention_seconds
+        if self._oldest is not None and self._oldest < cutoff:
+            self._buckets = {b: v for b, v in self._buckets.items() if b >= cutoff}
+            self._seen = {k: ts for k, ts in self._seen.items() if ts >= cutoff}
+            self._oldest = min(self._buckets) if self._buckets else None
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def series(self, start_ts: Optional[float] = None, end_ts: Optional[float] = None) -> dict:
+        """
+        Dense decayed series between start_ts and end_ts (epoch seconds).
+        Returns arrays: 'time' (bucket end), 'sentiment', 'weight'.
+        """
+        with self._lock:
+            buckets = dict(self._buckets)
+        end_ts = time.time() if end_ts is None else end_ts
+        if not buckets:
+            return {"time": np.array([]), "sentiment": np.array([]), "weight": np.array([])}
+
+        bs = self.bucket_seconds
+        first = min(buckets)
+        last = int(end_ts // bs) * bs
+        starts = np.arange(first, last + bs, bs, dtype=np.int64)
+        mass = np.array([buckets.get(int(b), (0.0, 0.0, 0))[0] for b in starts])
+        weight = np.array([buckets.get(int(b), (0.0, 0.0, 0))[1] for b in starts])
+
+        f = self._decay(bs)
+        S = np.empty_like(mass)
+        W = np.empty_like(weight)
+        s_level = w_level = 0.0
+        for i in range(len(starts)):
+            s_level = s_level * f + mass[i]
+            w_level = w_level * f + weight[i]
+            S[i], W[i] = s_level, w_level
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sentiment = np.where(W > 1e-9, S / W, 0.0)
+        ends = starts + bs
+        mask = np.ones(len(ends), dtype=bool)
+        if start_ts is not None:
+            mask &= ends >= start_ts
+        return {"time": ends[mask], "sentiment": np.round(sentiment[mask], 4),
+                "weight": np.round(W[mask], 4)}
+
+    def window_mean(self, window_hours: float, end_ts: Optional[float] = None) -> Optional[float]:
+        """
+        Mean decayed article score over the trailing window: each article's
+        score times 0.5^(age / half_life), averaged over the articles whose
+        bucket falls in the window. This is the news endpoint's average_score
+        (over its 72h horizon), which calculate_divergence is calibrated to.
+        None without articles in the window.
+        """
+        end_ts = time.time() if end_ts is None else end_ts
+        cutoff = end_ts - window_hours * 3600.0
+        with self._lock:
+            rows = [(b, v[0], v[2]) for b, v in self._buckets.items()
+                    if b + self.bucket_seconds > cutoff and b <= end_ts]
+        count = sum(r[2] for r in rows)
+        if not count:
+            return None
+        # Bucket mass is decayed to the bucket end; carry it on to end_ts
+        total = sum(mass * self._decay(end_ts - (b + self.bucket_seconds)) for b, mass, _ in rows)
+        return round(total / count, 4)
+
+
+_sentiment_series: dict[str, SentimentSeries] = {}
+_series_lock = threading.Lock()
+
+
+def get_sentiment_series(ticker: str) -> SentimentSeries:
+    """Return (creating if needed) the in-process sentiment series for a ticker."""
+    ticker = ticker.upper()
+    with _series_lock:
+        if ticker not in _sentiment_series:
+            _sentiment_series[ticker] = SentimentSeries()
+        return _sentiment_series[ticker]
+
+
+def record_scored_items(ticker: str, scored_items: list[dict]) -> int:
+    """Fold freshly scored articles into the ticker's series. Returns count added."""
+    series = get_sentiment_series(ticker)
+    added = 0
     for item in scored_items:
-        pub_str = item.get("published", "")
-        raw_score = item.get("sentiment_score", 0.0)
-        
-        multiplier = calculate_time_decay(pub_str, half_life_hours)
-        decayed_score = raw_score * multiplier
-        
-        item["decay_multiplier"] = multiplier
-        item["decayed_score"] = round(decayed_score, 4)
-        decayed_list.append(item)
-        
-    return decayed_list
+        ts = _item_ts(item)
+        if ts is None:
+            continue
+        key = item.get("link") or f"{item.get('title', '')}|{ts}"
+        if series.add(ts, float(item.get("sentiment_score", 0.0)), key):
+            added += 1
+    return added
+
+
+def align_to_bars(series: dict, bar_times: np.ndarray) -> np.ndarray:
+    """As-of join: sentiment of the latest completed bucket at each bar time."""
+    if len(series["time"]) == 0:
+        return np.zeros(len(bar_times))
+    idx = np.searchsorted(series["time"], bar_times, side="right") - 1
+    values = np.where(idx >= 0, series["sentiment"][np.clip(idx, 0, None)], 0.0)
+    return values
+
 
 def calculate_divergence(price_return: float, sentiment_score: float) -> dict:
     """
@@ -1,124 +1,804 @@
 """
 FinanceIQ v6 — Backtesting Service
 Ported from legacy backtester.py. Bi-directional long/short/hedge strategy.
+
+The engine works on plain arrays: indicators and signals are computed
+vectorized, and the path-dependent cash/position accounting runs as one
+tight loop over contiguous float lists, returning the equity curve as an
+array. Dates are only formatted for the points actually returned.
 """
+import hashlib
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 import yfinance as yf
 
+from services.execution import execution_arrays, order_costs
+
+ENGINE_VERSION = 3  # bump when simulation results change, so stored runs are not reused
+SIGNAL_SHORT, SIGNAL_HEDGE, SIGNAL_LONG, SIGNAL_FLAT = -1, 0, 1, 2
+SIGNAL_NAMES = {SIGNAL_SHORT: "SHORT", SIGNAL_HEDGE: "HEDGE", SIGNAL_LONG: "LONG", SIGNAL_FLAT: "FLAT"}
+
+DEFAULT_PARAMS = {"ema_span": 5, "bb_window": 20, "hedge_threshold": 0.08}
+INJECT_EVERY = 20      # trading days between monthly budget injections
+MIN_CASH_TO_TRADE = 10
+TRADING_DAYS = 252
+
+SWEEP_METRICS = ("sharpe", "roi", "max_drawdown")
+MAX_SWEEP_COMBOS = 5000
+SWEEP_INLINE_COMBOS = 64   # below this the process pool costs more than it saves
+SWEEP_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+_process_pool = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=SWEEP_WORKERS)
+    return _process_pool
+
+
+def ema(close: np.ndarray, span: int) -> np.ndarray:
+    """Exponential moving average (adjust=False), as pandas ewm computes it."""
+    return pd.Series(close).ewm(span=span, adjust=False).mean().to_numpy()
+
+
+def bb_width(close: np.ndarray, window: int) -> np.ndarray:
+    """Bollinger Band width (4 * std / mean) over `window` bars; NaN during warm-up."""
+    s = pd.Series(close)
+    return ((4 * s.rolling(window).std()) / s.rolling(window).mean()).to_numpy()
+
+
+def bidirectional_signals(close, ema_values, width, hedge_threshold: float = 0.08) -> np.ndarray:
+    """HEDGE when BB width exceeds the threshold, else LONG above the EMA, else SHORT."""
+    return np.where(
+        width > hedge_threshold, SIGNAL_HEDGE,
+        np.where(close > ema_values, SIGNAL_LONG, SIGNAL_SHORT),
+    ).astype(np.int8)
+
+
+def simulate_bidirectional(
+    close: np.ndarray,
+    signals: np.ndarray,
+    monthly_budget: float,
+    inject_every: int = INJECT_EVERY,
+    initial_cash: float = 0.0,
+    positions: bool = False,
+    blend_shorts: bool = True,
+) -> dict:
+    """
+    Account cash, long shares and a short position bar by bar, starting flat
+    with `initial_cash`. Returns equity (array), total_invested (injections
+    only) and final_value; with `positions`, also the long / short share
+    counts held after each bar (for the trade log).
+    A SHORT bar with free cash adds to an open short at a blended entry;
+    blend_shorts=False replaces the open short instead, as engines before
+    ENGINE_VERSION 2 did (its value was lost, so use it only to reproduce
+    old results).
+    """
+    prices = np.asarray(close, dtype=float).tolist()
+    sigs = np.asarray(signals).tolist()
+    equity = np.empty(len(prices))
+    if positions:
+        long_pos = np.empty(len(prices))
+        short_pos = np.empty(len(prices))
+
+    long_h = short_h = short_entry = invested = 0.0
+    cash = float(initial_cash)
+    for i, (price, signal) in enumerate(zip(prices, sigs)):
+        # Monthly injection every ~20 trading days
+        if (i + 1) % inject_every == 0:
+            cash += monthly_budget
+            invested += monthly_budget
+
+        if signal == SIGNAL_LONG:
+            if short_h > 0:
+                cash += short_h * short_entry + (short_entry - price) * short_h
+                short_h = 0.0
+            if cash > MIN_CASH_TO_TRADE:
+                long_h += cash / price
+                cash = 0.0
+        elif signal == SIGNAL_SHORT:
+            if long_h > 0:
+                cash += long_h * price
+                long_h = 0.0
+            if cash > MIN_CASH_TO_TRADE:
+                added = cash / price
+                if blend_shorts:
+                    # Add to any open short at a blended entry so its value carries over
+                    short_entry = (short_h * short_entry + added * price) / (short_h + added)
+                    short_h += added
+                else:
+                    short_h, short_entry = added, price
+                cash = 0.0
+        elif signal == SIGNAL_HEDGE:
+            value = cash + long_h * price
+            if short_h > 0:
+                value += (short_entry - price) * short_h + short_h * short_entry
+            long_h = short_h = value * 0.5 / price
+            short_entry = price
+            cash = 0.0
+        else:
+            # Flat: close everything and hold cash
+            if long_h > 0:
+                cash += long_h * price
+                long_h = 0.0
+            if short_h > 0:
+                cash += short_h * short_entry + (short_entry - price) * short_h
+                short_h = 0.0
+
+        short_pnl = (short_entry - price) * short_h if short_h > 0 else 0.0
+        equity[i] = cash + long_h * price + short_h * short_entry + short_pnl
+        if positions:
+            long_pos[i] = long_h
+            short_pos[i] = short_h
+
+    out = {
+        "equity": equity,
+        "total_invested": invested,
+        "final_value": float(equity[-1]) if len(equity) else 0.0,
+    }
+    if positions:
+        out["long"], out["short"] = long_pos, short_pos
+    return out
+
+
+TRADE_ACTIONS = ("BUY", "SELL", "SHORT", "COVER")
+BUY, SELL, SHORT, COVER = range(4)
+
+def trade_log(close: np.ndarray, long_pos: np.ndarray, short_pos: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Orders implied by bar-to-bar position changes: long increases are BUY,
+    decreases SELL; short increases SHORT, decreases COVER. Columns bar,
+    action (index into TRADE_ACTIONS), shares and price, ordered by bar.
+    """
+    legs = []
+    for pos, up, down in ((long_pos, 0, 1), (short_pos, 2, 3)):
+        delta = np.diff(pos, prepend=0.0)
+        idx = np.flatnonzero(np.abs(delta) > 1e-9)
+        legs.append((idx, np.where(delta[idx] > 0, up, down), np.abs(delta[idx])))
+    bar = np.concatenate([l[0] for l in legs])
+    order = np.argsort(bar, kind="stable")
+    bar = bar[order]
+    return {
+        "bar": bar.astype(np.int32),
+        "action": np.concatenate([l[1] for l in legs])[order].astype(np.int8),
+        "shares": np.concatenate([l[2] for l in legs])[order],
+        "price": np.asarray(close, dtype=float)[bar],
+    }
+
+
+def _solve_sqrt_cubic(A: float, B: float, C: float) -> float:
+    """Shares q with A*q + B*q**1.5 = C (C > 0): Newton on x = sqrt(q) from the B = 0 root."""
+    x = (C / A) ** 0.5
+    if B:
+        for _ in range(8):
+            slope = 2 * A * x + 3 * B * x * x
+            if slope <= 0:
+                break
+            step = (A * x * x + B * x * x * x - C) / slope
+            x -= step
+            if abs(step) <= 1e-13 * x:
+                break
+    return x * x
+
+
+def _affordable_shares(cash: float, ref: float, impact: float, sign: float, commission: tuple) -> float:
+    """
+    Most shares whose fill value plus commission fits in `cash`, for a
+    fill of ref + sign * impact * sqrt(shares) (buys pay up, short sales
+    post the lower fill as collateral). The commission is a max of a linear
+    charge and a minimum, so solve each branch and keep the smaller size.
+    """
+    per_share, bps, per_order, minimum = commission
+    linear, floor = cash - per_order, cash - minimum
+    if linear <= 0 or floor <= 0:
+        return 0.0
+    return min(
+        _solve_sqrt_cubic(ref * (1 + bps) + per_share, sign * impact * (1 + bps), linear),
+        _solve_sqrt_cubic(ref, sign * impact, floor),
+    )
+
+
+def simulate_execution(
+    close: np.ndarray,
+    signals: np.ndarray,
+    monthly_budget: float,
+    arrays: dict,
+    model: dict,
+    inject_every: int = INJECT_EVERY,
+    initial_cash: float = 0.0,
+) -> dict:
+    """
+    The bidirectional strategy under an execution model (see
+    services.execution), sized by the same rules as simulate_bidirectional:
+    LONG covers the short and buys with free cash, SHORT sells the long and
+    adds free cash to the short at a blended entry, HEDGE rebalances the
+    account to equal long / short legs, FLAT closes both. Orders fill
+    `arrays["lag"]` bars after the signal at arrays["price"] with spread +
+    square-root impact slippage and the commission schedule, capped by the
+    bar's participation limit (partial fills drop the remainder). Buys and
+    short collateral are limited to free cash after costs. Equity is marked
+    at the close. With zero costs, min_trade_value 0 and close fills the
+    result matches simulate_bidirectional. Returns equity, total_invested,
+    final_value and the order list (bar, action, shares, fill_price,
+    slippage, commission) with fill counts.
+
+    Only bars that can trade are visited (signal changes, injections,
+    HEDGE rebalances, and bars after an unfinished order); positions are
+    carried forward in between and equity is marked in one pass. Order
+    costs for the log come from execution.order_costs over all orders.
+    """
+    marks = np.asarray(close, dtype=float)
+    n = marks.size
+    lag = arrays["lag"]
+    exec_sig = np.concatenate([np.full(lag, -99), np.asarray(signals)[:n - lag]]).astype(np.int64)
+    price = np.asarray(arrays["price"], dtype=float)
+    impact = np.asarray(arrays["impact"], dtype=float)
+    spread = model["slippage_bps"] / 10000.0
+    c = model["commission"]
+    commission = (c["per_share"], c["bps"] / 10000.0, c["per_order"], c["minimum"])
+    per_share, bps, per_order, minimum = commission
+    min_value = model["min_trade_value"]
+
+    # Per-bar fill references and impact per sqrt(share), in price terms
+    buy_ref, sell_ref, impact_px = price * (1 + spread), price * (1 - spread), price * impact
+    inject = (np.arange(n) + 1) % inject_every == 0
+    event = inject | (exec_sig == SIGNAL_HEDGE)
+    event[1:] |= exec_sig[1:] != exec_sig[:-1]
+    if n:
+        event[0] = True
+
+    prices, caps = price.tolist(), np.asarray(arrays["cap"], dtype=float).tolist()
+    sigs, buys, sells, imps = exec_sig.tolist(), buy_ref.tolist(), sell_ref.tolist(), impact_px.tolist()
+    touched = np.zeros(n, dtype=bool)
+    state = np.zeros((n, 4))   # cash, long, short, short entry after the bar
+    o_bar, o_action, o_shares = [], [], []
+    long_sh = short_sh = short_entry = invested = 0.0
+    cash = float(initial_cash)
+    partial = 0
+    unfilled = 0.0
+    pending = False
+    events, injects = event.tolist(), inject.tolist()
+    for i in range(n):
+        if not (pending or events[i]):
+            continue
+        if injects[i]:
+            cash += monthly_budget
+            invested += monthly_budget
+
+        signal, px = sigs[i], prices[i]
+        capped = False
+        if signal in SIGNAL_NAMES and px > 0:
+            # (action, shares wanted or None to deploy free cash, closes the leg)
+            if signal == SIGNAL_LONG:
+                orders = ((COVER, short_sh, True), (BUY, None, False))
+            elif signal == SIGNAL_SHORT:
+                orders = ((SELL, long_sh, True), (SHORT, None, False))
+            elif signal == SIGNAL_HEDGE:
+                # Re-mark the short at the fill price so its P&L sits in cash
+                value = cash + long_sh * px + short_sh * (2 * short_entry - px)
+                cash = value - (long_sh + short_sh) * px
+                short_entry = px
+                half = max(value * 0.5 / px, 0.0)
+                orders = ((SELL, long_sh - half, False), (COVER, short_sh - half, False),
+                          (SHORT, half - short_sh, False), (BUY, half - long_sh, False))
+            else:
+                orders = ((SELL, long_sh, True), (COVER, short_sh, True))
+
+            room = caps[i]
+            for action, want, closing in orders:
+                if want is None:
+                    if cash <= MIN_CASH_TO_TRADE:
+                        continue
+                    want = cash / px
+                if want <= 1e-12 or (want * px < min_value and not closing) or room <= 0:
+                    continue
+                qty = min(want, room)
+                if action == BUY:
+                    qty = min(qty, _affordable_shares(cash, buys[i], imps[i], 1.0, commission))
+                elif action == SHORT:
+                    qty = min(qty, _affordable_shares(cash, sells[i], imps[i], -1.0, commission))
+                if qty <= 1e-12 or (qty * px < min_value and not closing):
+                    continue
+                if room < want:
+                    capped = True
+                    partial += 1
+                    unfilled += want - room
+
+                if action == BUY or action == COVER:
+                    fill = buys[i] + imps[i] * qty ** 0.5
+                else:
+                    fill = sells[i] - imps[i] * qty ** 0.5
+                comm = max(qty * (per_share + fill * bps) + per_order, minimum)
+                if action == BUY:
+                    cash = max(cash - qty * fill - comm, 0.0)
+                    long_sh += qty
+                elif action == SELL:
+                    cash += qty * fill - comm
+                    long_sh -= qty
+                elif action == SHORT:
+                    cash = max(cash - qty * fill - comm, 0.0)
+                    short_entry = (short_sh * short_entry + qty * fill) / (short_sh + qty)
+                    short_sh += qty
+                else:
+                    cash += qty * (2 * short_entry - fill) - comm
+                    short_sh -= qty
+                room -= qty
+                o_bar.append(i)
+                o_action.append(action)
+                o_shares.append(qty)
+
+        # Revisit the next bar only if this signal still has work left
+        pending = capped or px <= 0 or (
+            (signal == SIGNAL_LONG and (short_sh > 0 or cash > MIN_CASH_TO_TRADE))
+            or (signal == SIGNAL_SHORT and (long_sh > 0 or cash > MIN_CASH_TO_TRADE))
+            or (signal == SIGNAL_FLAT and (long_sh > 0 or short_sh > 0))
+        )
+        touched[i] = True
+        state[i] = cash, long_sh, short_sh, short_entry
+
+    # Positions hold between visited bars: carry the last state forward and mark at the close
+    last = np.maximum.accumulate(np.where(touched, np.arange(n), 0))
+    s_cash, s_long, s_short, s_entry = state[last].T
+    equity = s_cash + s_long * marks + s_short * (2 * s_entry - marks)
+
+    bar = np.asarray(o_bar, dtype=np.int32)
+    action = np.asarray(o_action, dtype=np.int8)
+    shares = np.asarray(o_shares, dtype=float)
+    signed = np.where((action == BUY) | (action == COVER), shares, -shares)
+    costs = order_costs(np.asarray(arrays["price"], dtype=float)[bar], signed,
+                        np.asarray(arrays["impact"], dtype=float)[bar], model)
+    return {
+        "equity": equity,
+        "total_invested": invested,
+        "final_value": float(equity[-1]) if len(equity) else 0.0,
+        "trades": {"bar": bar, "action": action, "shares": shares, "price": costs["fill_price"],
+                   "slippage": costs["slippage"], "commission": costs["commission"]},
+        "partial_fills": partial,
+        "unfilled_shares": unfilled,
+    }
+
+
+def injection_flows(n: int, monthly_budget: float, inject_every: int = INJECT_EVERY) -> np.ndarray:
+    """Per-bar budget injections as simulate_bidirectional applies them."""
+    return np.where((np.arange(n) + 1) % inject_every == 0, monthly_budget, 0.0)
+
+
+def performance_metrics(
+    equity: np.ndarray,
+    monthly_budget: float,
+    inject_every: int = INJECT_EVERY,
+    flows: np.ndarray | None = None,
+) -> dict:
+    """
+    ROI on invested cash plus Sharpe and max drawdown of the time-weighted
+    return index (budget injections are stripped from daily returns).
+    `flows` overrides the injection schedule (e.g. for stitched curves).
+    """
+    if flows is None:
+        flows = injection_flows(len(equity), monthly_budget, inject_every)
+    invested = flows.sum()
+    prev = np.concatenate([[0.0], equity[:-1]])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rets = np.where(prev > 0, (equity - flows) / prev - 1, 0.0)
+    sd = rets.std()
+    index = np.cumprod(1 + rets)
+    drawdown = 1 - index / np.maximum.accumulate(index)
+    roi = 0.0
+    if invested > 0:
+        roi = round(float((equity[-1] - invested) / invested * 100), 2)
+    metrics = {
+        "roi": roi,
+        # A fully hedged book has float-noise returns; don't rank that as Sharpe
+        "sharpe": round(float(rets.mean() / sd * np.sqrt(TRADING_DAYS)), 3) if sd > 1e-9 else 0.0,
+        "max_drawdown": round(float(drawdown.max() * 100), 2),
+    }
+    # Rounding a tiny negative leaves -0.0; report it as 0
+    return {k: v or 0.0 for k, v in metrics.items()}
+
+
+def load_history(ticker: str, period: str) -> pd.DataFrame:
+    return yf.Ticker(ticker).history(period=period)
+
+
+def bars_from_history(hist: pd.DataFrame) -> dict[str, np.ndarray]:
+    """Lower-case OHLCV arrays from a yfinance history frame."""
+    return {f.lower(): hist[f].to_numpy(float) for f in ("Open", "High", "Low", "Close", "Volume") if f in hist}
+
+
+def history_hash(hist: pd.DataFrame) -> str:
+    """Content hash of a price history (dates + OHLCV), identifying the data a run used."""
+    h = hashlib.sha256()
+    h.update(hist.index.asi8.tobytes() if isinstance(hist.index, pd.DatetimeIndex) else str(list(hist.index)).encode())
+    for col in ("Open", "High", "Low", "Close", "Volume"):
+        if col in hist:
+            h.update(col.encode())
+            h.update(hist[col].to_numpy(float).tobytes())
+    return h.hexdigest()
+
+
+def prepare_arrays(close: np.ndarray, ema_span: int = 5, bb_window: int = 20) -> dict[str, np.ndarray]:
+    """Indicator arrays on the full series, trimmed to the bars after the BB warm-up."""
+    close = np.asarray(close, dtype=float)
+    width = bb_width(close, bb_window)
+    valid = ~np.isnan(width)
+    return {"close": close[valid], "ema": ema(close, ema_span)[valid], "bb_width": width[valid], "mask": valid}
+
 
 def run_backtest(
     ticker: str,
     period: str = "1y",
     monthly_budget: float = 300.0,
+    ema_span: int = DEFAULT_PARAMS["ema_span"],
+    bb_window: int = DEFAULT_PARAMS["bb_window"],
+    hedge_threshold: float = DEFAULT_PARAMS["hedge_threshold"],
+    hist: pd.DataFrame | None = None,
+    keep_columns: bool = False,
+    execution: dict | None = None,
 ) -> dict:
     """
     Run bi-directional backtest on a single ticker.
     Strategy: Long when price > EMA5, Short when price < EMA5,
     Hedge (50/50) when BB Width > 8%.
+    Pass `hist` to reuse an already loaded history; see backtest_report for
+    `keep_columns` and `execution`.
     """
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period=period)
+        if hist is None:
+            hist = load_history(ticker, period)
         if hist.empty or len(hist) < 30:
             return {"error": f"Insufficient data for {ticker}"}
 
-        df = hist.copy()
-        df["EMA_5"] = df["Close"].ewm(span=5, adjust=False).mean()
-        std_20 = df["Close"].rolling(20).std()
-        ma_20 = df["Close"].rolling(20).mean()
-        df["BB_Width"] = (4 * std_20) / ma_20
-        df.dropna(inplace=True)
-
-        if df.empty:
+        arrays = prepare_arrays(hist["Close"].to_numpy(float), ema_span, bb_window)
+        close = arrays["close"]
+        if close.size == 0:
             return {"error": "Not enough data after indicator computation"}
+        dates = hist.index[arrays["mask"]]
+
+        signals = bidirectional_signals(close, arrays["ema"], arrays["bb_width"], hedge_threshold)
+        bars = {k: v[arrays["mask"]] for k, v in bars_from_history(hist).items()}
+        return backtest_report(ticker, period, dates, close, signals, monthly_budget, keep_columns,
+                               bars=bars, execution=execution)
+
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def backtest_report(ticker: str, period: str, dates: pd.DatetimeIndex, close: np.ndarray,
+                    signals: np.ndarray, monthly_budget: float, keep_columns: bool = False,
+                    bars: dict[str, np.ndarray] | None = None, execution: dict | None = None) -> dict:
+    """
+    Simulate a signal array and build the standard backtest response.
+    With an `execution` model (services.execution.execution_model) orders
+    fill through simulate_execution using the OHLCV `bars`; otherwise the
+    legacy close-fill, cost-free engine runs. With `keep_columns` the result
+    also carries "columns": the full per-bar series and trade log as arrays,
+    for backtest_store to persist.
+    """
+    if execution is not None:
+        sim = simulate_execution(close, signals, monthly_budget,
+                                 execution_arrays(bars or {"close": close}, execution), execution)
+        trades = sim["trades"]
+    else:
+        sim = simulate_bidirectional(close, signals, monthly_budget, positions=True)
+        trades = trade_log(close, sim["long"], sim["short"])
+
+    total_invested = sim["total_invested"]
+    final_val = sim["final_value"]
+    profit = final_val - total_invested
+    roi = (profit / total_invested * 100) if total_invested > 0 else 0
+    bench_roi = ((close[-1] / close[0]) - 1) * 100
+    metrics = performance_metrics(sim["equity"], monthly_budget)
+
+    tail = slice(-60, None)  # last 60 data points
+    equity_curve = [
+        {"date": d, "equity": e, "signal": SIGNAL_NAMES[s]}
+        for d, e, s in zip(
+            dates[tail].strftime("%Y-%m-%d"),
+            np.round(sim["equity"][tail], 2).tolist(),
+            signals[tail].tolist(),
+        )
+    ]
+
+    report = {
+        "ticker": ticker,
+        "period": period,
+        "total_invested": round(total_invested, 2),
+        "final_value": round(final_val, 2),
+        "profit": round(profit, 2),
+        "strategy_roi": round(roi, 2),
+        "benchmark_roi": round(float(bench_roi), 2),
+        "alpha": round(float(roi - bench_roi), 2),
+        "bars": int(close.size),
+        "trades": int(trades["bar"].size),
+        "sharpe": metrics["sharpe"],
+        "max_drawdown": metrics["max_drawdown"],
+        "equity_curve": equity_curve,
+    }
+    if execution is not None:
+        report["execution"] = execution
+        report["costs"] = {
+            "slippage": round(float(trades["slippage"].sum()), 2),
+            "commission": round(float(trades["commission"].sum()), 2),
+            "turnover": round(float((trades["shares"] * trades["price"]).sum()), 2),
+            "partial_fills": sim["partial_fills"],
+            "unfilled_shares": round(sim["unfilled_shares"], 4),
+        }
+    if keep_columns:
+        report["columns"] = {
+            "date": (dates.tz_localize(None) if dates.tz is not None else dates).values.astype("datetime64[D]"),
+            "close": np.asarray(close, dtype=float),
+            "equity": sim["equity"],
+            "signal": np.asarray(signals, dtype=np.int8),
+            **{f"trade_{k}": v for k, v in trades.items()},
+        }
+    return report
 
-        # Simulation
-        cash = 0.0
-        long_holdings = 0.0
-        short_holdings = 0.0
-        short_entry = 0.0
-        total_invested = 0.0
-        equity_curve = []
-
-        for i, (date, row) in enumerate(df.iterrows()):
-            price = row["Close"]
-
-            # Monthly injection every ~20 trading days
-            if (i + 1) % 20 == 0:
-                cash += monthly_budget
-                total_invested += monthly_budget
-
-            # Signal
-            if row["BB_Width"] > 0.08:
-                signal = "HEDGE"
-            elif price > row["EMA_5"]:
-                signal = "LONG"
-            else:
-                signal = "SHORT"
-
-            # Execute
-            if signal == "LONG":
-                if short_holdings > 0:
-                    profit = (short_entry - price) * short_holdings
-                    cash += (short_holdings * short_entry) + profit
-                    short_holdings = 0
-                if cash > 10:
-                    long_holdings += cash / price
-                    cash = 0
-
-            elif signal == "SHORT":
-                if long_holdings > 0:
-                    cash += long_holdings * price
-                    long_holdings = 0
-                if cash > 10:
-                    short_holdings = cash / price
-                    short_entry = price
-                    cash = 0
-
-            elif signal == "HEDGE":
-                current_val = cash + (long_holdings * price)
-                if short_holdings > 0:
-                    current_val += (short_entry - price) * short_holdings + short_holdings * short_entry
-                cash = current_val
-                long_holdings = (cash * 0.5) / price
-                short_holdings = (cash * 0.5) / price
-                short_entry = price
-                cash = 0
-
-            # Track equity
-            short_pnl = (short_entry - price) * short_holdings if short_holdings > 0 else 0
-            equity = cash + (long_holdings * price) + (short_holdings * short_entry) + short_pnl
-            equity_curve.append({
-                "date": date.strftime("%Y-%m-%d"),
-                "equity": round(equity, 2),
-                "signal": signal,
-            })
 
-        # Final
-        final_price = df.iloc[-1]["Close"]
-        short_pnl = (short_entry - final_price) * short_holdings if short_holdings > 0 else 0
-        final_val = cash + (long_holdings * final_price) + (short_holdings * short_entry) + short_pnl
+# ══════════════════════════════════════════════════════════
+# PARAMETER SWEEP
+# ══════════════════════════════════════════════════════════
+
+def parameter_values(spec, cast=float) -> list:
+    """A sweep axis from a scalar, a list, or {start, stop, step} (stop inclusive)."""
+    if isinstance(spec, dict):
+        start, stop = float(spec["start"]), float(spec["stop"])
+        step = float(spec.get("step", 1))
+        if step <= 0:
+            raise ValueError("step must be positive")
+        vals = np.arange(start, stop + step / 2, step)
+        return sorted({cast(round(v, 10)) for v in vals})
+    if isinstance(spec, (list, tuple)):
+        return sorted({cast(v) for v in spec})
+    return [cast(spec)]
+
+
+def indicator_cache(close: np.ndarray, ema_spans, bb_windows) -> dict:
+    """
+    Every EMA and BB-width series a grid needs, computed once and trimmed to
+    a common start (after the longest BB warm-up) so all combinations are
+    scored over the same bars.
+    """
+    close = np.asarray(close, dtype=float)
+    start = max(bb_windows) - 1
+    return {
+        "close": close[start:],
+        "start": start,
+        "ema": {int(sp): ema(close, int(sp))[start:] for sp in ema_spans},
+        "bb_width": {int(w): bb_width(close, int(w))[start:] for w in bb_windows},
+    }
+
+
+def _evaluate_combos(cache: dict, combos: list[tuple], monthly_budget: float) -> list[dict]:
+    """Score (ema_span, bb_window, hedge_threshold) combos on cached indicators. Runs in workers."""
+    close = cache["close"]
+    rows = []
+    for span, window, threshold in combos:
+        signals = bidirectional_signals(close, cache["ema"][span], cache["bb_width"][window], threshold)
+        sim = simulate_bidirectional(close, signals, monthly_budget)
+        rows.append({
+            "ema_span": span, "bb_window": window, "hedge_threshold": threshold,
+            "final_value": round(sim["final_value"], 2),
+            **performance_metrics(sim["equity"], monthly_budget),
+        })
+    return rows
+
+
+def evaluate_grid(cache: dict, combos: list[tuple], monthly_budget: float) -> list[dict]:
+    """Score every combo, fanning chunks out over the process pool for large grids."""
+    if len(combos) < SWEEP_INLINE_COMBOS:
+        return _evaluate_combos(cache, combos, monthly_budget)
+    pool = _get_process_pool()
+    n_chunks = SWEEP_WORKERS * 4
+    chunks = [combos[i::n_chunks] for i in range(n_chunks) if combos[i::n_chunks]]
+    futures = [pool.submit(_evaluate_combos, cache, chunk, monthly_budget) for chunk in chunks]
+    return [row for f in futures for row in f.result()]
+
+
+def _heatmap(rows: list[dict], x: str, y: str, metric: str) -> dict:
+    """Best `metric` for each (x, y) cell over the remaining parameter."""
+    xs = sorted({r[x] for r in rows})
+    ys = sorted({r[y] for r in rows})
+    xi = {v: i for i, v in enumerate(xs)}
+    yi = {v: i for i, v in enumerate(ys)}
+    better = np.fmin if metric == "max_drawdown" else np.fmax
+    grid = np.full((len(ys), len(xs)), np.nan)
+    for r in rows:
+        i, j = yi[r[y]], xi[r[x]]
+        grid[i, j] = better(grid[i, j], r[metric])
+    return {
+        "x": x, "y": y, "metric": metric,
+        "x_values": xs, "y_values": ys,
+        "values": [[None if np.isnan(v) else float(v) for v in row] for row in grid],
+    }
+
+
+def run_sweep(
+    ticker: str,
+    period: str = "1y",
+    monthly_budget: float = 300.0,
+    ema_span=DEFAULT_PARAMS["ema_span"],
+    bb_window=DEFAULT_PARAMS["bb_window"],
+    hedge_threshold=DEFAULT_PARAMS["hedge_threshold"],
+    rank_by: str = "sharpe",
+    heatmap=("ema_span", "bb_window"),
+    top: int = 50,
+) -> dict:
+    """
+    Grid search over EMA span x BB window x hedge threshold on one data load.
+    Returns the ranked table (top rows), the best combo and a heatmap matrix.
+    """
+    try:
+        if rank_by not in SWEEP_METRICS:
+            return {"error": f"rank_by must be one of {SWEEP_METRICS}"}
+        spans = parameter_values(ema_span, int)
+        windows = parameter_values(bb_window, int)
+        thresholds = parameter_values(hedge_threshold, float)
+        if min(spans) < 1 or min(windows) < 2:
+            return {"error": "ema_span must be >= 1 and bb_window >= 2"}
+        combos = list(itertools.product(spans, windows, thresholds))
+        if len(combos) > MAX_SWEEP_COMBOS:
+            return {"error": f"Grid has {len(combos)} combinations (max {MAX_SWEEP_COMBOS})"}
 
-        profit = final_val - total_invested
-        roi = (profit / total_invested * 100) if total_invested > 0 else 0
+        hist = load_history(ticker, period)
+        if hist.empty or len(hist) < max(windows) + 10:
+            return {"error": f"Insufficient data for {ticker}"}
 
-        bench_start = df.iloc[0]["Close"]
-        bench_end = df.iloc[-1]["Close"]
-        bench_roi = ((bench_end / bench_start) - 1) * 100
+        cache = indicator_cache(hist["Close"].to_numpy(float), spans, windows)
+        rows = evaluate_grid(cache, combos, monthly_budget)
+        rows.sort(key=lambda r: r[rank_by], reverse=rank_by != "max_drawdown")
 
+        x, y = heatmap
         return {
             "ticker": ticker,
             "period": period,
-            "total_invested": round(total_invested, 2),
-            "final_value": round(final_val, 2),
-            "profit": round(profit, 2),
-            "strategy_roi": round(roi, 2),
-            "benchmark_roi": round(bench_roi, 2),
-            "alpha": round(roi - bench_roi, 2),
-            "trades": len(df),
-            "equity_curve": equity_curve[-60:],  # last 60 data points
+            "bars": int(cache["close"].size),
+            "start_date": hist.index[cache["start"]].strftime("%Y-%m-%d"),
+            "combinations": len(combos),
+            "rank_by": rank_by,
+            "best": rows[0],
+            "results": rows[:top],
+            "heatmap": _heatmap(rows, x, y, rank_by),
         }
+    except Exception as e:
+        return {"error": str(e)}
+
+
+# ══════════════════════════════════════════════════════════
+# WALK-FORWARD
+# ══════════════════════════════════════════════════════════
+
+def _slice_cache(cache: dict, start: int, stop: int) -> dict:
+    return {
+        "close": cache["close"][start:stop],
+        "ema": {k: v[start:stop] for k, v in cache["ema"].items()},
+        "bb_width": {k: v[start:stop] for k, v in cache["bb_width"].items()},
+    }
+
+
+def _optimize_window(cache: dict, combos: list[tuple], monthly_budget: float, rank_by: str) -> dict:
+    """Best combo on one train window (runs in a worker process)."""
+    rows = _evaluate_combos(cache, combos, monthly_budget)
+    if rank_by == "max_drawdown":
+        return min(rows, key=lambda r: r[rank_by])
+    return max(rows, key=lambda r: r[rank_by])
+
+
+def walk_forward_windows(n_bars: int, train_bars: int, test_bars: int, anchored: bool = False) -> list[tuple]:
+    """(train_start, train_end, test_end) index triples; test windows tile the history after the first train."""
+    windows = []
+    test_start = train_bars
+    while test_start < n_bars:
+        test_end = min(test_start + test_bars, n_bars)
+        windows.append((0 if anchored else test_start - train_bars, test_start, test_end))
+        test_start = test_end
+    return windows
+
+
+def run_walk_forward(
+    ticker: str,
+    period: str = "5y",
+    monthly_budget: float = 300.0,
+    train_bars: int = 252,
+    test_bars: int = 63,
+    anchored: bool = False,
+    ema_span=DEFAULT_PARAMS["ema_span"],
+    bb_window=DEFAULT_PARAMS["bb_window"],
+    hedge_threshold=DEFAULT_PARAMS["hedge_threshold"],
+    rank_by: str = "sharpe",
+) -> dict:
+    """
+    Walk-forward analysis: optimize the grid on each train window, trade the
+    winner on the following test window, and stitch the test windows into
+    one out-of-sample equity curve (each window starts flat with the
+    previous window's ending equity as cash).
+
+    Indicators are computed once on the full history and sliced per window;
+    the per-window optimizations run in parallel on the process pool.
+    """
+    try:
+        if rank_by not in SWEEP_METRICS:
+            return {"error": f"rank_by must be one of {SWEEP_METRICS}"}
+        if train_bars < 40 or test_bars < 5:
+            return {"error": "train_bars must be >= 40 and test_bars >= 5"}
+        spans = parameter_values(ema_span, int)
+        windows_ = parameter_values(bb_window, int)
+        thresholds = parameter_values(hedge_threshold, float)
+        combos = list(itertools.product(spans, windows_, thresholds))
+        if len(combos) > MAX_SWEEP_COMBOS:
+            return {"error": f"Grid has {len(combos)} combinations (max {MAX_SWEEP_COMBOS})"}
+
+        hist = load_history(ticker, period)
+        if hist.empty:
+            return {"error": f"Insufficient data for {ticker}"}
+        cache = indicator_cache(hist["Close"].to_numpy(float), spans, windows_)
+        dates = hist.index[cache["start"]:]
+        n = cache["close"].size
+        if n < train_bars + test_bars:
+            return {"error": f"Need at least {train_bars + test_bars} bars after warm-up, have {n}"}
+
+        windows = walk_forward_windows(n, train_bars, test_bars, anchored)
+        train_caches = [_slice_cache(cache, a, b) for a, b, _ in windows]
+        if len(windows) * len(combos) < SWEEP_INLINE_COMBOS:
+            best = [_optimize_window(c, combos, monthly_budget, rank_by) for c in train_caches]
+        else:
+            pool = _get_process_pool()
+            futures = [pool.submit(_optimize_window, c, combos, monthly_budget, rank_by) for c in train_caches]
+            best = [f.result() for f in futures]
+
+        # Out-of-sample: trade each window's winner, carrying equity forward
+        equity_parts, flow_parts, results = [], [], []
+        carry = 0.0
+        for (a, b, c), params in zip(windows, best):
+            test = _slice_cache(cache, b, c)
+            span, window, threshold = params["ema_span"], params["bb_window"], params["hedge_threshold"]
+            signals = bidirectional_signals(test["close"], test["ema"][span], test["bb_width"][window], threshold)
+            sim = simulate_bidirectional(test["close"], signals, monthly_budget, initial_cash=carry)
+            flows = injection_flows(c - b, monthly_budget)
+            equity_parts.append(sim["equity"])
+            flow_parts.append(flows)
+            start_value = carry
+            carry = sim["final_value"]
+            test_prev = np.concatenate([[start_value], sim["equity"][:-1]])
+            with np.errstate(divide="ignore", invalid="ignore"):
+                test_rets = np.where(test_prev > 0, (sim["equity"] - flows) / test_prev - 1, 0.0)
+            results.append({
+                "train": [dates[a].strftime("%Y-%m-%d"), dates[b - 1].strftime("%Y-%m-%d")],
+                "test": [dates[b].strftime("%Y-%m-%d"), dates[c - 1].strftime("%Y-%m-%d")],
+                "params": {"ema_span": span, "bb_window": window, "hedge_threshold": threshold},
+                "train_metrics": {k: params[k] for k in SWEEP_METRICS},
+                "test_return": round(float((np.prod(1 + test_rets) - 1) * 100), 2),
+                "test_end_equity": round(carry, 2),
+            })
 
+        equity = np.concatenate(equity_parts)
+        flows = np.concatenate(flow_parts)
+        oos_start = windows[0][1]
+        oos_dates = dates[oos_start:]
+        close = cache["close"]
+        return {
+            "ticker": ticker,
+            "period": period,
+            "anchored": anchored,
+            "train_bars": train_bars,
+            "test_bars": test_bars,
+            "combinations": len(combos),
+            "rank_by": rank_by,
+            "windows": results,
+            "oos_metrics": {
+                **performance_metrics(equity, monthly_budget, flows=flows),
+                "total_invested": round(float(flows.sum()), 2),
+                "final_value": round(float(equity[-1]), 2),
+                "benchmark_roi": round(float((close[-1] / close[oos_start] - 1) * 100), 2),
+            },
+            "oos_equity": {
+                "dates": list(oos_dates.strftime("%Y-%m-%d")),
+                "equity": np.round(equity, 2).tolist(),
+            },
+        }
     except Exception as e:
         return {"error": str(e)}
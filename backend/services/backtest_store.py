@@ -0,0 +1,233 @@
+"""
+FinanceIQ v6 — Backtest Result Store
+Persists single-ticker backtests as BacktestRun rows: the response summary,
+parameters, metrics and the full per-bar series plus trade log in a
+compact columnar blob. Runs are keyed by a hash of the configuration and
+of the price data they used, so an identical request over unchanged data
+returns the stored run instead of recomputing.
+
+Column encoding (one compressed .npz, no pickled objects):
+  date    int32 day offsets from the first bar, delta-encoded
+  equity  int64 cents, delta-encoded
+  close   float64, signal int8, trade_* as produced by trade_log or
+          simulate_execution (which adds slippage / commission)
+"""
+import asyncio
+import hashlib
+import io
+import json
+from typing import Callable, Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, func
+
+from core import AsyncSessionLocal, logger
+from models import BacktestRun
+from services.backtest_service import SIGNAL_NAMES, TRADE_ACTIONS, ENGINE_VERSION, history_hash
+
+MAX_PAGE = 5000
+MAX_POINTS = 5000
+
+
+# ══════════════════════════════════════════════════════════
+# COLUMNAR ENCODING
+# ══════════════════════════════════════════════════════════
+
+def encode_columns(columns: dict[str, np.ndarray]) -> bytes:
+    cols = dict(columns)
+    dates = cols.pop("date").astype("datetime64[D]")
+    days = (dates - dates[0]).astype(np.int32) if dates.size else np.zeros(0, np.int32)
+    cents = np.round(cols.pop("equity") * 100).astype(np.int64)
+    buf = io.BytesIO()
+    np.savez_compressed(
+        buf,
+        date_start=np.array([dates[0] if dates.size else np.datetime64(0, "D")]).astype(np.int64),
+        date_delta=np.diff(days, prepend=np.int32(0)),
+        equity_delta=np.diff(cents, prepend=np.int64(0)),
+        **cols,
+    )
+    return buf.getvalue()
+
+
+def decode_columns(blob: bytes) -> dict[str, np.ndarray]:
+    with np.load(io.BytesIO(blob), allow_pickle=False) as z:
+        cols = {k: z[k] for k in z.files}
+    start = cols.pop("date_start")[0]
+    cols["date"] = (np.cumsum(cols.pop("date_delta")) + start).astype("datetime64[D]")
+    cols["equity"] = np.cumsum(cols.pop("equity_delta")) / 100.0
+    return cols
+
+
+def config_hash(config: dict, data_hash: str) -> str:
+    payload = json.dumps({**config, "engine": ENGINE_VERSION}, sort_keys=True, default=str) + data_hash
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# ══════════════════════════════════════════════════════════
+# PERSISTENCE
+# ══════════════════════════════════════════════════════════
+
+def _summary(row: BacktestRun) -> dict:
+    return {
+        "run_id": row.id,
+        "ticker": row.ticker,
+        "kind": row.kind,
+        "params": json.loads(row.params_json or "{}"),
+        "metrics": json.loads(row.metrics_json or "{}"),
+        "bars": row.bars,
+        "trades": row.trades,
+        "data_hash": row.data_hash,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+async def find_run(cfg_hash: str) -> Optional[BacktestRun]:
+    try:
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(
+                select(BacktestRun).where(BacktestRun.config_hash == cfg_hash)
+            )).scalars().first()
+    except Exception as e:
+        logger.warning(f"Backtest run lookup failed: {e}")
+        return None
+
+
+async def save_run(kind: str, config: dict, data_hash: str, cfg_hash: str, report: dict, blob: bytes) -> Optional[int]:
+    """Insert a run; returns its id (None if the DB is unavailable)."""
+    metrics = {k: report.get(k) for k in ("strategy_roi", "benchmark_roi", "alpha", "sharpe", "max_drawdown")}
+    try:
+        async with AsyncSessionLocal() as db:
+            row = BacktestRun(
+                ticker=report.get("ticker", config.get("ticker", "")),
+                kind=kind,
+                config_hash=cfg_hash,
+                data_hash=data_hash,
+                params_json=json.dumps(config, default=str),
+                metrics_json=json.dumps(metrics),
+                report_json=json.dumps(report),
+                bars=int(report.get("bars", 0)),
+                trades=int(report.get("trades", 0)),
+                columns_blob=blob,
+            )
+            db.add(row)
+            await db.commit()
+            return row.id
+    except Exception as e:
+        # Most likely a concurrent identical run won the unique config_hash
+        logger.warning(f"Backtest run save failed: {e}")
+        existing = await find_run(cfg_hash)
+        return existing.id if existing else None
+
+
+async def run_or_load(kind: str, config: dict, hist: pd.DataFrame, compute: Callable[[], dict]) -> dict:
+    """
+    Stored result for (config, price data) if present, otherwise run
+    `compute` (a blocking callable returning a report with "columns") in the
+    executor, persist it and return the report with its run_id.
+    """
+    data_hash = await asyncio.get_event_loop().run_in_executor(None, history_hash, hist)
+    cfg_hash = config_hash(config, data_hash)
+
+    row = await find_run(cfg_hash)
+    if row is not None:
+        return {**json.loads(row.report_json), "run_id": row.id, "stored": True}
+
+    report = await asyncio.get_event_loop().run_in_executor(None, compute)
+    if "error" in report:
+        return report
+    columns = report.pop("columns")
+    blob = await asyncio.get_event_loop().run_in_executor(None, encode_columns, columns)
+    run_id = await save_run(kind, config, data_hash, cfg_hash, report, blob)
+    return {**report, "run_id": run_id, "stored": False}
+
+
+async def list_runs(ticker: Optional[str] = None, kind: Optional[str] = None,
+                    limit: int = 50, offset: int = 0) -> dict:
+    """Run summaries, newest first (columns are not loaded)."""
+    limit = max(1, min(limit, 500))
+    query = select(BacktestRun).order_by(BacktestRun.created_at.desc(), BacktestRun.id.desc())
+    count = select(func.count(BacktestRun.id))
+    if ticker:
+        query = query.where(BacktestRun.ticker == ticker.upper())
+        count = count.where(BacktestRun.ticker == ticker.upper())
+    if kind:
+        query = query.where(BacktestRun.kind == kind)
+        count = count.where(BacktestRun.kind == kind)
+    async with AsyncSessionLocal() as db:
+        total = (await db.execute(count)).scalar_one()
+        rows = (await db.execute(query.offset(max(offset, 0)).limit(limit))).scalars().all()
+    return {"total": total, "offset": offset, "limit": limit, "runs": [_summary(r) for r in rows]}
+
+
+async def get_run(run_id: int) -> Optional[BacktestRun]:
+    async with AsyncSessionLocal() as db:
+        return await db.get(BacktestRun, run_id)
+
+
+def run_detail(row: BacktestRun) -> dict:
+    return {**_summary(row), "report": json.loads(row.report_json or "{}")}
+
+
+# ══════════════════════════════════════════════════════════
+# PAGING / DOWNSAMPLING
+# ══════════════════════════════════════════════════════════
+
+def minmax_downsample(values: np.ndarray, points: int) -> np.ndarray:
+    """
+    Indices of a chart-faithful subset of at most ~`points` samples: the
+    first and last bar plus the min and max of each bucket, so drawdowns
+    and peaks survive the reduction.
+    """
+    n = len(values)
+    if n <= points:
+        return np.arange(n)
+    buckets = max(1, (points - 2) // 2)
+    bucket = np.arange(n) * buckets // n
+    s = pd.Series(values).groupby(bucket)
+    keep = np.concatenate([[0, n - 1], s.idxmin().to_numpy(), s.idxmax().to_numpy()])
+    return np.unique(keep)
+
+
+def equity_series(row: BacktestRun, offset: int = 0, limit: Optional[int] = None,
+                  points: Optional[int] = None) -> dict:
+    """Full-resolution page of the equity curve, or a downsampled view of the whole (or paged) curve."""
+    cols = decode_columns(row.columns_blob)
+    n = len(cols["equity"])
+    offset = max(0, min(offset, n))
+    stop = n if limit is None else min(n, offset + max(1, min(limit, MAX_PAGE)))
+    idx = np.arange(offset, stop)
+    if points:
+        idx = idx[minmax_downsample(cols["equity"][offset:stop], max(4, min(points, MAX_POINTS)))]
+    elif limit is None and len(idx) > MAX_PAGE:
+        idx = idx[:MAX_PAGE]
+    return {
+        "run_id": row.id,
+        "total": n,
+        "offset": offset,
+        "count": int(idx.size),
+        "downsampled": bool(points) and idx.size < stop - offset,
+        "dates": np.datetime_as_string(cols["date"][idx], unit="D").tolist(),
+        "equity": np.round(cols["equity"][idx], 2).tolist(),
+        "close": np.round(cols["close"][idx], 4).tolist(),
+        "signal": [SIGNAL_NAMES[s] for s in cols["signal"][idx].tolist()],
+    }
+
+
+def trade_page(row: BacktestRun, offset: int = 0, limit: int = 500) -> dict:
+    cols = decode_columns(row.columns_blob)
+    bars = cols["trade_bar"]
+    n = len(bars)
+    offset = max(0, min(offset, n))
+    sl = slice(offset, min(n, offset + max(1, min(limit, MAX_PAGE))))
+    dates = np.datetime_as_string(cols["date"][bars[sl]], unit="D").tolist()
+    trades = [
+        {"bar": int(b), "date": d, "action": TRADE_ACTIONS[a], "shares": round(s, 6), "price": round(p, 4)}
+        for b, d, a, s, p in zip(bars[sl].tolist(), dates, cols["trade_action"][sl].tolist(),
+                                 cols["trade_shares"][sl].tolist(), cols["trade_price"][sl].tolist())
+    ]
+    # Runs with an execution model also carry per-order costs
+    for key in ("slippage", "commission"):
+        if f"trade_{key}" in cols:
+            for t, v in zip(trades, cols[f"trade_{key}"][sl].tolist()):
+                t[key] = round(v, 4)
+    return {"run_id": row.id, "total": n, "offset": offset, "trades": trades}
@@ -0,0 +1,99 @@
+"""
+FinanceIQ v6 — Option Chain Loader
+Fetches option chains for many expirations in parallel on a bounded pool,
+with a short per-expiry cache, and converts them column-wise for JSON.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+_chain_pool = ThreadPoolExecutor(max_workers=8)
+
+CHAIN_TTL_SECONDS = 60
+_chain_cache: dict[tuple[str, str], tuple[float, pd.DataFrame, pd.DataFrame]] = {}
+_chain_cache_lock = threading.Lock()
+
+
+def spot_price(stock: yf.Ticker) -> float:
+    """Latest underlying price for option math (fast_info, then recent close)."""
+    try:
+        price = stock.fast_info.get("lastPrice")
+        if price:
+            return float(price)
+    except Exception:
+        pass
+    try:
+        hist = stock.history(period="5d")
+        return float(hist["Close"].iloc[-1]) if not hist.empty else 0.0
+    except Exception:
+        return 0.0
+
+
+def _fetch_expiry(ticker: str, expiry: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    key = (ticker, expiry)
+    with _chain_cache_lock:
+        hit = _chain_cache.get(key)
+    if hit and time.time() - hit[0] < CHAIN_TTL_SECONDS:
+        return hit[1], hit[2]
+
+    chain = yf.Ticker(ticker).option_chain(expiry)
+    with _chain_cache_lock:
+        _chain_cache[key] = (time.time(), chain.calls, chain.puts)
+        if len(_chain_cache) > 2000:
+            cutoff = time.time() - CHAIN_TTL_SECONDS
+            for k in [k for k, v in _chain_cache.items() if v[0] < cutoff]:
+                del _chain_cache[k]
+    return chain.calls, chain.puts
+
+
+def load_chains(
+    ticker: str,
+    expirations: Optional[list[str]] = None,
+) -> tuple[float, list[str], dict[str, tuple[pd.DataFrame, pd.DataFrame]]]:
+    """
+    Fetch (calls, puts) for the given expirations (default: all) concurrently.
+    Returns (spot, all_expirations, {expiry: (calls, puts)}); expiries that
+    fail to load are omitted.
+    """
+    ticker = ticker.upper()
+    stock = yf.Ticker(ticker)
+    all_exps = list(stock.options or [])
+    wanted = [e for e in (expirations or all_exps) if e in all_exps]
+
+    futures = {exp: _chain_pool.submit(_fetch_expiry, ticker, exp) for exp in wanted}
+    spot = spot_price(stock)
+
+    chains = {}
+    for exp, fut in futures.items():
+        try:
+            chains[exp] = fut.result(timeout=30)
+        except Exception:
+            continue
+    return spot, all_exps, chains
+
+
+def frame_columns(df: pd.DataFrame, limit: int = 0) -> dict[str, list]:
+    """Column-oriented, JSON-safe dict (NaN -> None, timestamps -> ISO strings)."""
+    if limit:
+        df = df.head(limit)
+    out = {}
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            out[col] = [None if pd.isna(v) else v.isoformat() for v in series]
+        elif pd.api.types.is_float_dtype(series):
+            arr = series.to_numpy(float)
+            out[col] = np.where(np.isnan(arr), None, arr).tolist()
+        else:
+            out[col] = series.astype(object).where(series.notna(), None).tolist()
+    return out
+
+
+def columns_to_rows(columns: dict[str, list], **extra) -> list[dict]:
+    """Row dicts from a column dict (for clients that want records)."""
+    keys = list(columns)
+    return [{**dict(zip(keys, vals)), **extra} for vals in zip(*columns.values())]
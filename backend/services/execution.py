@@ -0,0 +1,163 @@
+"""
+FinanceIQ v6 — Execution Cost Model
+Slippage and commission model of the legacy portfolio_engine.py, in array
+form so a whole rebalance (or a whole trade list) is costed at once.
+
+Slippage moves the fill against the trader by a fixed number of basis
+points, plus (when bar volume is known) a square-root market-impact term
+that grows with volatility and volume participation:
+
+    slippage fraction = spread_bps / 1e4 + impact_coef * sigma * sqrt(shares / volume)
+
+Commission follows a schedule: per share, percent of notional and per
+order, floored at a minimum. Bar-level execution inputs (fill reference
+price, participation cap, impact coefficient) are built for a whole
+history at once by execution_arrays.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_SLIPPAGE_BPS = 5      # 0.05% default slippage
+DEFAULT_COMMISSION_PER_SHARE = 0.005  # $0.005 per share (IBKR-style)
+MIN_COMMISSION = 1.00          # $1 minimum per trade
+DEFAULT_IMPACT_COEF = 0.5      # square-root impact constant
+DEFAULT_PARTICIPATION = 0.10   # max fraction of a bar's volume one strategy can trade
+VOL_WINDOW = 20                # bars of returns behind the volatility estimate
+
+FILL_MODELS = ("close", "next_open", "vwap")
+COMMISSION_SCHEDULES = {
+    "per_share": {"per_share": DEFAULT_COMMISSION_PER_SHARE, "bps": 0.0, "per_order": 0.0, "minimum": MIN_COMMISSION},
+    "percent": {"per_share": 0.0, "bps": 10.0, "per_order": 0.0, "minimum": 0.0},
+    "flat": {"per_share": 0.0, "bps": 0.0, "per_order": 4.95, "minimum": 0.0},
+    "none": {"per_share": 0.0, "bps": 0.0, "per_order": 0.0, "minimum": 0.0},
+}
+
+
+def fill_prices(price, shares, slippage_bps: float = DEFAULT_SLIPPAGE_BPS) -> np.ndarray:
+    """Execution prices for signed share quantities (buys pay up, sells receive less)."""
+    price = np.asarray(price, dtype=float)
+    return price * (1 + np.sign(shares) * slippage_bps / 10000.0)
+
+
+def commissions(shares, per_share: float = DEFAULT_COMMISSION_PER_SHARE,
+                minimum: float = MIN_COMMISSION) -> np.ndarray:
+    """Per-order commission with a minimum; zero where nothing trades."""
+    qty = np.abs(np.asarray(shares, dtype=float))
+    return np.where(qty > 0, np.maximum(qty * per_share, minimum), 0.0)
+
+
+def trade_costs(price, shares, slippage_bps: float = DEFAULT_SLIPPAGE_BPS,
+                per_share: float = DEFAULT_COMMISSION_PER_SHARE,
+                minimum: float = MIN_COMMISSION) -> dict[str, np.ndarray]:
+    """
+    Cash impact of signed trades: `cash_delta` (negative for buys), plus the
+    slippage and commission components, all per order.
+    """
+    shares = np.asarray(shares, dtype=float)
+    px = np.asarray(price, dtype=float)
+    fills = fill_prices(px, shares, slippage_bps)
+    comm = commissions(shares, per_share, minimum)
+    return {
+        "fill_price": fills,
+        "slippage": np.abs(fills - px) * np.abs(shares),
+        "commission": comm,
+        "cash_delta": -shares * fills - comm,
+    }
+
+
+# ══════════════════════════════════════════════════════════
+# BAR-LEVEL EXECUTION MODEL
+# ══════════════════════════════════════════════════════════
+
+def execution_model(spec: dict | bool | None = None) -> dict:
+    """
+    Validated execution settings from an API spec (True / {} = defaults):
+      fill            close (same bar), next_open, or vwap (next bar's
+                      typical price (H+L+C)/3 as a VWAP proxy)
+      slippage_bps    fixed half-spread cost
+      impact_coef     square-root impact constant (0 disables)
+      participation   max fraction of bar volume filled; the rest is dropped
+      commission      schedule name or {per_share, bps, per_order, minimum}
+      min_trade_value orders smaller than this notional are skipped
+    """
+    spec = {} if spec is True or spec is None else dict(spec)
+    fill = spec.get("fill", "next_open")
+    if fill not in FILL_MODELS:
+        raise ValueError(f"fill must be one of {FILL_MODELS}")
+    commission = spec.get("commission", "per_share")
+    if isinstance(commission, str):
+        if commission not in COMMISSION_SCHEDULES:
+            raise ValueError(f"commission must be one of {list(COMMISSION_SCHEDULES)} or a schedule object")
+        commission = COMMISSION_SCHEDULES[commission]
+    else:
+        commission = {**COMMISSION_SCHEDULES["none"], **{k: float(v) for k, v in commission.items()
+                                                          if k in COMMISSION_SCHEDULES["none"]}}
+    model = {
+        "fill": fill,
+        "slippage_bps": float(spec.get("slippage_bps", DEFAULT_SLIPPAGE_BPS)),
+        "impact_coef": float(spec.get("impact_coef", DEFAULT_IMPACT_COEF)),
+        "participation": float(spec.get("participation", DEFAULT_PARTICIPATION)),
+        "commission": dict(commission),
+        "min_trade_value": float(spec.get("min_trade_value", 10.0)),
+    }
+    if min(model["slippage_bps"], model["impact_coef"], model["min_trade_value"], *model["commission"].values()) < 0:
+        raise ValueError("Execution costs must be non-negative")
+    if not 0 < model["participation"] <= 1:
+        raise ValueError("participation must be in (0, 1]")
+    return model
+
+
+def bar_volatility(close: np.ndarray, window: int = VOL_WINDOW) -> np.ndarray:
+    """Daily log-return stdev known before each bar (trailing window, back-filled at the start)."""
+    rets = pd.Series(np.log(np.asarray(close, dtype=float))).diff()
+    return rets.rolling(window, min_periods=2).std().shift(1).bfill().fillna(0.0).to_numpy()
+
+
+def execution_arrays(bars: dict[str, np.ndarray], model: dict) -> dict[str, np.ndarray]:
+    """
+    Per-bar execution inputs for a history, aligned to the bar the fill
+    happens on. `lag` is how many bars after the decision the fill occurs
+    (0 for close fills, 1 otherwise).
+      price    reference fill price
+      cap      max shares fillable (inf when volume is unknown)
+      impact   slippage fraction per sqrt(share): impact_coef * sigma / sqrt(volume)
+    """
+    close = np.asarray(bars["close"], dtype=float)
+    if model["fill"] == "close":
+        price = close
+    elif model["fill"] == "next_open":
+        price = np.asarray(bars.get("open", close), dtype=float)
+    else:
+        price = (np.asarray(bars.get("high", close), dtype=float)
+                 + np.asarray(bars.get("low", close), dtype=float) + close) / 3
+    volume = np.asarray(bars.get("volume", np.zeros_like(close)), dtype=float)
+    known = np.isfinite(volume) & (volume > 0)
+    safe_vol = np.where(known, volume, 1.0)
+    return {
+        "price": price,
+        "cap": np.where(known, model["participation"] * volume, np.inf),
+        "impact": np.where(known, model["impact_coef"] * bar_volatility(close) / np.sqrt(safe_vol), 0.0),
+        "lag": 0 if model["fill"] == "close" else 1,
+    }
+
+
+def order_costs(price, shares, impact, model: dict) -> dict[str, np.ndarray]:
+    """
+    Vectorized fills and costs for signed orders under an execution model;
+    `impact` is the per-order coefficient from execution_arrays. Matches
+    what the backtest engine charges order by order.
+    """
+    shares = np.asarray(shares, dtype=float)
+    px = np.asarray(price, dtype=float)
+    qty = np.abs(shares)
+    frac = model["slippage_bps"] / 10000.0 + np.asarray(impact, dtype=float) * np.sqrt(qty)
+    fills = px * (1 + np.sign(shares) * frac)
+    c = model["commission"]
+    comm = np.where(qty > 0, np.maximum(qty * c["per_share"] + qty * fills * c["bps"] / 10000.0 + c["per_order"],
+                                        c["minimum"]), 0.0)
+    return {
+        "fill_price": fills,
+        "slippage": np.abs(fills - px) * qty,
+        "commission": comm,
+        "cash_delta": -shares * fills - comm,
+    }
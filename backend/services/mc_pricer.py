@@ -0,0 +1,226 @@
+"""
+FinanceIQ v6 — Monte Carlo Option Pricer
+Risk-neutral GBM pricing for European, American (Longstaff-Schwartz),
+arithmetic Asian and barrier options.
+
+Paths are simulated in chunks sized to a memory budget and only running
+sums are kept, so millions of paths run in bounded memory. Antithetic
+variates pair each path with its mirror; the discounted terminal price
+(known mean S0) is used as a control variate. Large jobs fan the chunks
+out over a process pool.
+"""
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from services.simulation_service import gbm_paths
+
+STYLES = ("european", "american", "asian", "barrier")
+BARRIER_KINDS = ("up-and-out", "up-and-in", "down-and-out", "down-and-in")
+
+MAX_CHUNK_BYTES = 64 * 1024 * 1024
+PROCESS_POOL_THRESHOLD = 5_000_000  # paths * steps above which chunks go to processes
+LSM_TRAIN_PATHS = 50_000
+PRICER_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+_process_pool = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=PRICER_WORKERS)
+    return _process_pool
+
+
+def _payoff(S, K, is_call):
+    return np.maximum(S - K, 0.0) if is_call else np.maximum(K - S, 0.0)
+
+
+def _lsm_basis(x: np.ndarray) -> np.ndarray:
+    """Quadratic polynomial basis in normalized spot (S / K)."""
+    return np.stack([np.ones_like(x), x, x * x], axis=-1)
+
+
+def _discounted_payoffs(paths: np.ndarray, spec: dict, coeffs) -> np.ndarray:
+    """Discounted payoff per path for the option in `spec`."""
+    K, r, T, steps = spec["strike"], spec["rate"], spec["T"], spec["steps"]
+    is_call = spec["is_call"]
+    dt = T / steps
+    style = spec["style"]
+
+    if style == "european":
+        return math.exp(-r * T) * _payoff(paths[:, -1], K, is_call)
+
+    if style == "asian":
+        avg = paths[:, 1:].mean(axis=1)
+        return math.exp(-r * T) * _payoff(avg, K, is_call)
+
+    if style == "barrier":
+        level, kind = spec["barrier"], spec["barrier_kind"]
+        crossed = (paths.max(axis=1) >= level) if kind.startswith("up") else (paths.min(axis=1) <= level)
+        alive = ~crossed if kind.endswith("out") else crossed
+        return math.exp(-r * T) * _payoff(paths[:, -1], K, is_call) * alive
+
+    # American: apply the exercise rule fitted by _fit_lsm (coeffs[t] per step)
+    n = paths.shape[0]
+    exercise_t = np.full(n, steps)
+    undecided = np.ones(n, dtype=bool)
+    for t in range(1, steps):
+        beta = coeffs[t]
+        if beta is None:
+            continue
+        ex_val = _payoff(paths[:, t], K, is_call)
+        cand = undecided & (ex_val > 0)
+        if not cand.any():
+            continue
+        cont = _lsm_basis(paths[cand, t] / K) @ beta
+        go = np.zeros(n, dtype=bool)
+        go[cand] = ex_val[cand] > cont
+        exercise_t[go] = t
+        undecided &= ~go
+    S_ex = paths[np.arange(n), exercise_t]
+    return np.exp(-r * dt * exercise_t) * _payoff(S_ex, K, is_call)
+
+
+def _fit_lsm(spec: dict, seed) -> list:
+    """Longstaff-Schwartz regression coefficients per exercise step, from a training set."""
+    K, r, T, steps = spec["strike"], spec["rate"], spec["T"], spec["steps"]
+    dt = T / steps
+    rng = np.random.default_rng(seed)
+    n = min(spec["paths"], LSM_TRAIN_PATHS)
+    n -= n % 2
+    paths = gbm_paths(spec["spot"], (r - 0.5 * spec["sigma"] ** 2) * dt,
+                      spec["sigma"] * math.sqrt(dt), steps, n, rng, antithetic=True)
+
+    cash = _payoff(paths[:, -1], K, spec["is_call"])
+    coeffs = [None] * steps
+    for t in range(steps - 1, 0, -1):
+        cash *= math.exp(-r * dt)
+        ex_val = _payoff(paths[:, t], K, spec["is_call"])
+        itm = ex_val > 0
+        if itm.sum() < 10:
+            continue
+        X = _lsm_basis(paths[itm, t] / K)
+        beta, *_ = np.linalg.lstsq(X, cash[itm], rcond=None)
+        coeffs[t] = beta
+        cont = X @ beta
+        ex_now = ex_val[itm] > cont
+        idx = np.flatnonzero(itm)[ex_now]
+        cash[idx] = ex_val[idx]
+    return coeffs
+
+
+def _simulate_chunks(spec: dict, chunk_sizes: list[int], seed, coeffs) -> np.ndarray:
+    """
+    Simulate the given chunks and return sufficient statistics
+    [n, sum Y, sum X, sum Y^2, sum X^2, sum XY] where Y is the discounted
+    payoff and X the discounted terminal price (antithetic pairs averaged).
+    Top-level so it can run in a worker process.
+    """
+    r, T, steps, sigma = spec["rate"], spec["T"], spec["steps"], spec["sigma"]
+    dt = T / steps
+    drift = (r - 0.5 * sigma ** 2) * dt
+    vol = sigma * math.sqrt(dt)
+    rng = np.random.default_rng(seed)
+    stats = np.zeros(6)
+
+    for size in chunk_sizes:
+        paths = gbm_paths(spec["spot"], drift, vol, steps, size, rng, antithetic=spec["antithetic"])
+        Y = _discounted_payoffs(paths, spec, coeffs)
+        X = math.exp(-r * T) * paths[:, -1]
+        if spec["antithetic"]:
+            h = size // 2
+            Y = 0.5 * (Y[:h] + Y[h:])
+            X = 0.5 * (X[:h] + X[h:])
+        stats += [len(Y), Y.sum(), X.sum(), (Y * Y).sum(), (X * X).sum(), (X * Y).sum()]
+    return stats
+
+
+def _summarize(stats: np.ndarray, spot: float, control_variate: bool) -> tuple[float, float, float]:
+    n, sy, sx, syy, sxx, sxy = stats
+    mean_y, mean_x = sy / n, sx / n
+    var_y = max(syy / n - mean_y ** 2, 0.0) * n / max(n - 1, 1)
+    plain_se = math.sqrt(var_y / n)
+    if not control_variate:
+        return mean_y, plain_se, plain_se
+    var_x = max(sxx / n - mean_x ** 2, 0.0) * n / max(n - 1, 1)
+    cov = (sxy / n - mean_x * mean_y) * n / max(n - 1, 1)
+    if var_x <= 0:
+        return mean_y, plain_se, plain_se
+    beta = cov / var_x
+    est = mean_y - beta * (mean_x - spot)
+    var_cv = max(var_y - cov * cov / var_x, 0.0)
+    return est, math.sqrt(var_cv / n), plain_se
+
+
+def price_option_mc(
+    spot: float,
+    strike: float,
+    T: float,
+    rate: float,
+    sigma: float,
+    opt_type: str = "call",
+    style: str = "european",
+    paths: int = 100_000,
+    steps: int = 50,
+    antithetic: bool = True,
+    control_variate: bool = True,
+    barrier: float | None = None,
+    barrier_kind: str = "up-and-out",
+    seed: int | None = None,
+) -> dict:
+    """Monte Carlo price with standard error. Raises ValueError on bad input."""
+    style = style.lower()
+    if style not in STYLES:
+        raise ValueError(f"style must be one of {STYLES}")
+    if style == "barrier" and (barrier is None or barrier_kind not in BARRIER_KINDS):
+        raise ValueError(f"barrier style needs a barrier level and kind in {BARRIER_KINDS}")
+    if min(spot, strike, T, sigma) <= 0 or paths < 2 or steps < 1:
+        raise ValueError("spot, strike, expiry, sigma must be positive; paths >= 2, steps >= 1")
+
+    paths = int(paths) + (int(paths) % 2 if antithetic else 0)
+    spec = {
+        "spot": float(spot), "strike": float(strike), "T": float(T), "rate": float(rate),
+        "sigma": float(sigma), "is_call": opt_type == "call", "style": style,
+        "paths": paths, "steps": int(steps), "antithetic": antithetic,
+        "barrier": barrier, "barrier_kind": barrier_kind,
+    }
+
+    seeds = np.random.SeedSequence(seed)
+    lsm_seed, sim_seed = seeds.spawn(2)
+    coeffs = _fit_lsm(spec, lsm_seed) if style == "american" else None
+
+    # Chunk sizes bounded by the memory budget (even sizes for antithetic pairing)
+    chunk = max(1000, MAX_CHUNK_BYTES // (8 * (steps + 1) * 2))
+    chunk -= chunk % 2
+    sizes = [chunk] * (paths // chunk) + ([paths % chunk] if paths % chunk else [])
+
+    use_pool = paths * steps > PROCESS_POOL_THRESHOLD and len(sizes) > 1
+    if use_pool:
+        pool = _get_process_pool()
+        n_workers = min(len(sizes), PRICER_WORKERS)
+        groups = [sizes[i::n_workers] for i in range(n_workers)]
+        futures = [pool.submit(_simulate_chunks, spec, g, s, coeffs)
+                   for g, s in zip(groups, sim_seed.spawn(n_workers))]
+        stats = sum(f.result() for f in futures)
+    else:
+        stats = _simulate_chunks(spec, sizes, sim_seed, coeffs)
+
+    price, se, plain_se = (float(v) for v in _summarize(stats, spot, control_variate))
+    if style == "american":
+        price = max(price, float(_payoff(np.array(spot), strike, spec["is_call"])))
+
+    return {
+        "price": round(price, 6),
+        "std_error": round(se, 6),
+        "ci95": [round(price - 1.96 * se, 6), round(price + 1.96 * se, 6)],
+        "std_error_plain": round(plain_se, 6),
+        "paths": paths,
+        "steps": int(steps),
+        "chunks": len(sizes),
+        "process_pool": use_pool,
+        "style": style,
+        "type": opt_type,
+    }
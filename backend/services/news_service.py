@@ -4,8 +4,9 @@ Uses Google News RSS + FinBERT for financial sentiment analysis.
 """
 import feedparser
 import re
-from datetime import datetime
+from datetime import datetime, timezone
 from core.logging import logger
+from services.alphamath import parse_published_ts
 
 def _strip_html(text: str) -> str:
     """Remove HTML tags and decode entities from a string."""
@@ -25,10 +26,12 @@ def fetch_news(ticker: str, limit: int = 10) -> list[dict]:
         items = []
         for entry in feed.entries[:limit]:
             raw_summary = entry.get("description", "")
+            published = entry.get("published") or datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
             items.append({
                 "title": entry.title,
                 "link": entry.link,
-                "published": entry.get("published", datetime.now().strftime("%a, %d %b %Y %H:%M:%S GMT")),
+                "published": published,
+                "published_ts": parse_published_ts(published),
                 "summary": _strip_html(raw_summary),
             })
         return items
@@ -49,6 +52,51 @@ def get_finbert():
         _finbert_pipeline = pipeline("sentiment-analysis", model="ProsusAI/finbert")
     return _finbert_pipeline
 
+def _article_text(item: dict) -> str:
+    # FinBERT has a 512 token limit. Truncating text to be safe.
+    return f"{item['title']}. {item.get('summary', '')}"[:1000]
+
+
+def _compound_scores(analyzer, texts: list[str], batch_size: int = 16) -> list[float]:
+    """Run FinBERT over all texts in batches; map to -1..1 compound scores."""
+    try:
+        results = analyzer(texts, batch_size=batch_size)
+    except Exception:
+        # Fall back to per-text scoring so one bad input doesn't sink the batch
+        results = []
+        for text in texts:
+            try:
+                results.append(analyzer(text)[0])
+            except Exception:
+                results.append(None)
+
+    scores = []
+    for result in results:
+        if not result:
+            scores.append(0.0)
+            continue
+        label = result['label'].lower()
+        # Map FinBERT probabilities to a -1 to 1 compound score
+        if label == 'positive':
+            scores.append(result['score'])
+        elif label == 'negative':
+            scores.append(-result['score'])
+        else:
+            scores.append(0.0)
+    return scores
+
+
+def _summarize(news_items: list[dict], compounds: list[float]) -> dict:
+    scored = [{**item, "sentiment_score": round(c, 4)} for item, c in zip(news_items, compounds)]
+    avg = sum(compounds) / len(news_items)
+    overall_label = "Positive" if avg >= 0.05 else "Negative" if avg <= -0.05 else "Neutral"
+    return {
+        "average_score": round(avg, 4),
+        "sentiment_label": overall_label,
+        "scored_news": scored,
+    }
+
+
 def analyze_sentiment(news_items: list[dict]) -> dict:
     """Analyze sentiment of news items using FinBERT."""
     if not news_items:
@@ -60,36 +108,34 @@ def analyze_sentiment(news_items: list[dict]) -> dict:
         logger.error(f"FinBERT load error: {e}")
         return {"average_score": 0, "sentiment_label": "Neutral", "scored_news": news_items}
 
-    total = 0
-    scored = []
-    for item in news_items:
-        text = f"{item['title']}. {item.get('summary', '')}"
-        
-        # FinBERT has a 512 token limit. Truncating text to be safe.
-        text = text[:1000] 
-        try:
-            result = analyzer(text)[0]
-            label = result['label'].lower()
-            score = result['score']
-            
-            # Map FinBERT probabilities to a -1 to 1 compound score
-            if label == 'positive':
-                compound = score
-            elif label == 'negative':
-                compound = -score
-            else:
-                compound = 0.0
-                
-            total += compound
-            scored.append({**item, "sentiment_score": round(compound, 4)})
-        except Exception as e:
-            scored.append({**item, "sentiment_score": 0.0})
-
-    avg = total / len(news_items)
-    overall_label = "Positive" if avg >= 0.05 else "Negative" if avg <= -0.05 else "Neutral"
+    compounds = _compound_scores(analyzer, [_article_text(item) for item in news_items])
+    return _summarize(news_items, compounds)
 
-    return {
-        "average_score": round(avg, 4),
-        "sentiment_label": overall_label,
-        "scored_news": scored,
-    }
+
+def analyze_sentiment_batch(news_by_ticker: dict[str, list[dict]]) -> dict[str, dict]:
+    """
+    Score news for many tickers with a single batched FinBERT pass.
+    Returns {ticker: analyze_sentiment-shaped dict}.
+    """
+    empty = {"average_score": 0, "sentiment_label": "Neutral", "scored_news": []}
+    results = {t: dict(empty) for t, items in news_by_ticker.items() if not items}
+    pending = {t: items for t, items in news_by_ticker.items() if items}
+    if not pending:
+        return results
+
+    try:
+        analyzer = get_finbert()
+    except Exception as e:
+        logger.error(f"FinBERT load error: {e}")
+        for t, items in pending.items():
+            results[t] = {**empty, "scored_news": items}
+        return results
+
+    texts = [_article_text(item) for items in pending.values() for item in items]
+    compounds = _compound_scores(analyzer, texts)
+
+    offset = 0
+    for t, items in pending.items():
+        results[t] = _summarize(items, compounds[offset:offset + len(items)])
+        offset += len(items)
+    return results
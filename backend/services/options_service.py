@@ -4,6 +4,8 @@ Ported from legacy options_engine.py. Black-Scholes, Greeks, IV, payoff diagrams
 """
 import math
 from datetime import datetime
+import numpy as np
+from scipy.special import ndtr
 
 
 def _norm_cdf(x: float) -> float:
@@ -68,28 +70,346 @@ def greeks(S, K, T, r, sigma, opt_type="call") -> dict:
     }.items()}
 
 
+# ══════════════════════════════════════════════════════════
+# VECTORIZED (whole chains in one pass)
+# ══════════════════════════════════════════════════════════
+
+_INV_SQRT_2PI = 1.0 / math.sqrt(2 * math.pi)
+
+
+def _broadcast(S, K, T, r, sigma, is_call):
+    S, K, T, r, sigma = (np.asarray(x, dtype=float) for x in (S, K, T, r, sigma))
+    is_call = np.asarray(is_call, dtype=bool)
+    return np.broadcast_arrays(S, K, T, r, sigma, is_call)
+
+
+def bs_price_vec(S, K, T, r, sigma, is_call=True) -> np.ndarray:
+    """Black-Scholes prices for arrays of contracts (calls and puts may be mixed)."""
+    return greeks_vec(S, K, T, r, sigma, is_call)["price"]
+
+
+def greeks_vec(S, K, T, r, sigma, is_call=True) -> dict[str, np.ndarray]:
+    """
+    Price and all Greeks over broadcast arrays of S, K, T, r, sigma.
+    d1/d2, pdf(d1) and the CDFs are computed once per contract. Units match
+    greeks(): theta per day, vega and rho per 1%. Expired or zero-vol
+    contracts get intrinsic value and zero Greeks.
+    """
+    S, K, T, r, sigma, is_call = _broadcast(S, K, T, r, sigma, is_call)
+    live = (T > 0) & (sigma > 0) & (S > 0) & (K > 0)
+    sign = np.where(is_call, 1.0, -1.0)
+
+    T_ = np.where(live, T, 1.0)
+    sig_ = np.where(live, sigma, 1.0)
+    S_ = np.where(live, S, 1.0)
+    K_ = np.where(live, K, 1.0)
+
+    sqrt_T = np.sqrt(T_)
+    vol_sqrt_T = sig_ * sqrt_T
+    _d1 = (np.log(S_ / K_) + (r + 0.5 * sig_ ** 2) * T_) / vol_sqrt_T
+    _d2 = _d1 - vol_sqrt_T
+    pdf_d1 = np.exp(-0.5 * _d1 * _d1) * _INV_SQRT_2PI
+    cdf_d1 = ndtr(sign * _d1)     # N(d1) for calls, N(-d1) for puts
+    cdf_d2 = ndtr(sign * _d2)
+    disc_K = K_ * np.exp(-r * T_)
+
+    price = sign * (S_ * cdf_d1 - disc_K * cdf_d2)
+    delta = sign * cdf_d1         # N(d1) - 1 == -N(-d1) for puts
+    gamma = pdf_d1 / (S_ * vol_sqrt_T)
+    theta = (-(S_ * pdf_d1 * sig_) / (2 * sqrt_T) - sign * r * disc_K * cdf_d2) / 365
+    vega = S_ * sqrt_T * pdf_d1 / 100
+    rho = sign * disc_K * T_ * cdf_d2 / 100
+
+    intrinsic = np.maximum(sign * (S - K), 0.0)
+    zero = np.zeros_like(price)
+    return {
+        "delta": np.where(live, delta, zero),
+        "gamma": np.where(live, gamma, zero),
+        "theta": np.where(live, theta, zero),
+        "vega": np.where(live, vega, zero),
+        "rho": np.where(live, rho, zero),
+        "price": np.where(live, price, intrinsic),
+    }
+
+
+def years_to_expiry(expiry: str, now: datetime | None = None) -> float:
+    """Year fraction from now to a 'YYYY-MM-DD' expiry (expiring at 16:00), floored at one hour."""
+    now = now or datetime.now()
+    exp = datetime.strptime(expiry, "%Y-%m-%d").replace(hour=16)
+    return max((exp - now).total_seconds() / (365 * 86400), 1 / (365 * 24))
+
+
+def enrich_chain_frame(df, spot: float, T: float, r: float = 0.05, opt_type: str = "call"):
+    """Add bs_price and Greek columns to a yfinance chain DataFrame in one vectorized pass."""
+    if df.empty:
+        return df
+    g = greeks_vec(spot, df["strike"].to_numpy(float), T, r,
+                   np.nan_to_num(df["impliedVolatility"].to_numpy(float)), opt_type == "call")
+    df = df.copy()
+    df["bs_price"] = np.round(g.pop("price"), 4)
+    for k, v in g.items():
+        df[k] = np.round(v, 6 if k == "gamma" else 4)
+    return df
+
+
+IV_MIN, IV_MAX = 1e-4, 5.0
+
+# Reason codes returned alongside NaN implied vols
+IV_OK = "ok"
+IV_INVALID = "invalid_input"          # non-positive price/spot/strike/expiry
+IV_BELOW_INTRINSIC = "below_intrinsic"  # price under the no-arbitrage floor
+IV_ABOVE_MAX = "above_max"            # price needs vol > IV_MAX (or breaks upper bound)
+IV_NO_CONVERGENCE = "no_convergence"
+
+
+def _price_vega(S, K, T, r, sigma, sign):
+    """Lean BS price and raw vega (per 1.00 vol) for the IV solver."""
+    sqrt_T = np.sqrt(T)
+    vol_sqrt_T = sigma * sqrt_T
+    _d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / vol_sqrt_T
+    _d2 = _d1 - vol_sqrt_T
+    price = sign * (S * ndtr(sign * _d1) - K * np.exp(-r * T) * ndtr(sign * _d2))
+    vega = S * sqrt_T * np.exp(-0.5 * _d1 * _d1) * _INV_SQRT_2PI
+    return price, vega
+
+
+def implied_vol_vec(market_price, S, K, T, r, is_call=True, tol: float = 1e-8,
+                    max_iter: int = 40) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Solve implied volatility for whole arrays of option prices at once.
+
+    Starts from the Corrado-Miller approximation and runs Newton steps that
+    fall back to bisection whenever a step leaves the [lo, hi] bracket, so
+    deep ITM/OTM contracts cannot diverge. Only unconverged contracts are
+    re-evaluated each iteration. Returns (iv, reason) where iv is NaN and
+    reason explains why whenever no solution exists.
+    """
+    price, S, K, T, r, is_call = _broadcast(market_price, S, K, T, r, is_call)
+    price, S, K, T, r = (x.astype(float).copy() for x in (price, S, K, T, r))
+    sign = np.where(is_call, 1.0, -1.0)
+    n = price.size
+    shape = price.shape
+    price, S, K, T, r, sign = (x.ravel() for x in (price, S, K, T, r, sign))
+
+    iv = np.full(n, np.nan)
+    reason = np.full(n, IV_NO_CONVERGENCE, dtype=object)
+
+    valid = (price > 0) & (S > 0) & (K > 0) & (T > 0) & np.isfinite(price)
+    reason[~valid] = IV_INVALID
+    Tv = np.where(valid, T, 1.0)
+    disc_K = K * np.exp(-r * Tv)
+
+    # No-arbitrage bounds (no dividends)
+    lower = np.maximum(sign * (S - disc_K), 0.0)
+    upper = np.where(sign > 0, S, disc_K)
+    below = valid & (price < lower - tol)
+    above = valid & (price >= upper)
+    reason[below] = IV_BELOW_INTRINSIC
+    reason[above] = IV_ABOVE_MAX
+    active = valid & ~below & ~above
+
+    idx = np.flatnonzero(active)
+    if idx.size:
+        p, s_, k, t, rr, sg = price[idx], S[idx], K[idx], Tv[idx], r[idx], sign[idx]
+        dk = disc_K[idx]
+        p_hi, _ = _price_vega(s_, k, t, rr, np.full(idx.size, IV_MAX), sg)
+        too_high = p > p_hi
+        reason[idx[too_high]] = IV_ABOVE_MAX
+
+        # Corrado-Miller initial guess on the call-equivalent price
+        call_px = np.where(sg > 0, p, p + s_ - dk)
+        half = call_px - (s_ - dk) / 2
+        disc = np.maximum(half ** 2 - (s_ - dk) ** 2 / np.pi, 0.0)
+        sigma = np.sqrt(2 * np.pi / t) / (s_ + dk) * (half + np.sqrt(disc))
+        sigma = np.where(np.isfinite(sigma) & (sigma > IV_MIN), sigma, 0.3)
+        sigma = np.clip(sigma, IV_MIN * 10, IV_MAX * 0.9)
+
+        lo = np.full(idx.size, IV_MIN)
+        hi = np.full(idx.size, IV_MAX)
+        done = too_high.copy()
+        for _ in range(max_iter):
+            live = np.flatnonzero(~done)
+            if not live.size:
+                break
+            sig = sigma[live]
+            model, vega = _price_vega(s_[live], k[live], t[live], rr[live], sig, sg[live])
+            diff = model - p[live]
+
+            conv = np.abs(diff) < tol * np.maximum(1.0, p[live])
+            hi[live] = np.where(diff > 0, sig, hi[live])
+            lo[live] = np.where(diff <= 0, sig, lo[live])
+            conv |= (hi[live] - lo[live]) < 1e-10
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                newton = sig - diff / vega
+            bisect = 0.5 * (lo[live] + hi[live])
+            ok_step = np.isfinite(newton) & (newton > lo[live]) & (newton < hi[live])
+            sigma[live] = np.where(conv, sig, np.where(ok_step, newton, bisect))
+            done[live] = conv
+
+        solved = done & ~too_high
+        iv[idx[solved]] = sigma[solved]
+        reason[idx[solved]] = IV_OK
+
+    return iv.reshape(shape), reason.reshape(shape)
+
+
 def implied_vol(market_price, S, K, T, r, opt_type="call") -> float:
-    """Newton-Raphson implied volatility solver."""
+    """Implied volatility for a single option (safeguarded Newton). 0.0 if unsolvable."""
     if T <= 0 or market_price <= 0: return 0.0
-    sigma = 0.3
-    for _ in range(100):
-        price = bs_call(S, K, T, r, sigma) if opt_type == "call" else bs_put(S, K, T, r, sigma)
-        diff = price - market_price
-        if abs(diff) < 1e-6: return round(sigma, 6)
-        v = S * math.sqrt(T) * _norm_pdf(d1(S, K, T, r, sigma))
-        if v < 1e-12: break
-        sigma = max(sigma - diff / v, 0.001)
-    return round(sigma, 6)
+    iv, _ = implied_vol_vec(market_price, S, K, T, r, opt_type == "call")
+    iv = float(iv)
+    return 0.0 if math.isnan(iv) else round(iv, 6)
+
+
+def solve_chain_iv(df, spot: float, T: float, r: float = 0.05, opt_type: str = "call"):
+    """
+    Add 'iv_calc' and 'iv_status' columns solved from the quote mid
+    (falling back to lastPrice when there is no two-sided market).
+    """
+    if df.empty:
+        return df
+    bid = df["bid"].to_numpy(float) if "bid" in df else np.zeros(len(df))
+    ask = df["ask"].to_numpy(float) if "ask" in df else np.zeros(len(df))
+    last = df["lastPrice"].to_numpy(float)
+    two_sided = (bid > 0) & (ask > 0)
+    px = np.where(two_sided, 0.5 * (bid + ask), last)
+    iv, reason = implied_vol_vec(px, spot, df["strike"].to_numpy(float), T, r, opt_type == "call")
+    df = df.copy()
+    df["iv_calc"] = np.round(iv, 6)
+    df["iv_status"] = reason
+    return df
 
 
 def payoff_diagram(K, premium, opt_type="call", is_long=True, n=50) -> list[dict]:
     """Generate payoff diagram data points."""
-    low, high = K * 0.7, K * 1.3
-    step = (high - low) / n
-    pts = []
-    for i in range(n + 1):
-        px = low + i * step
-        payoff = max(px - K, 0) if opt_type == "call" else max(K - px, 0)
-        profit = (payoff - premium) if is_long else (premium - payoff)
-        pts.append({"price": round(px, 2), "payoff": round(payoff, 2), "profit": round(profit, 2)})
-    return pts
+    px = np.linspace(K * 0.7, K * 1.3, n + 1)
+    payoff = np.maximum(px - K, 0) if opt_type == "call" else np.maximum(K - px, 0)
+    profit = (payoff - premium) if is_long else (premium - payoff)
+    return [
+        {"price": p, "payoff": v, "profit": pl}
+        for p, v, pl in zip(np.round(px, 2).tolist(), np.round(payoff, 2).tolist(), np.round(profit, 2).tolist())
+    ]
+
+
+# ══════════════════════════════════════════════════════════
+# MULTI-LEG STRATEGIES
+# ══════════════════════════════════════════════════════════
+
+LEG_TYPES = ("call", "put", "stock")
+
+
+def _parse_legs(legs: list[dict], spot: float, r: float) -> dict[str, np.ndarray]:
+    """
+    Normalize leg dicts into column arrays. Each leg: type (call/put/stock),
+    quantity (signed, or positive with side="short"), strike, expiry_years or
+    expiry ("YYYY-MM-DD"), iv, and optional premium (entry price per unit;
+    defaults to the current Black-Scholes value, or spot for stock).
+    """
+    if not legs:
+        raise ValueError("At least one leg is required")
+    cols = {k: [] for k in ("is_stock", "is_call", "qty", "K", "T", "iv", "premium")}
+    for leg in legs:
+        kind = leg.get("type", "call").lower()
+        if kind not in LEG_TYPES:
+            raise ValueError(f"Leg type must be one of {LEG_TYPES}")
+        qty = float(leg.get("quantity", 1))
+        if leg.get("side", "long").lower() == "short":
+            qty = -abs(qty)
+        is_stock = kind == "stock"
+        if is_stock:
+            K, T, iv = spot, 0.0, 0.0
+        else:
+            K = float(leg["strike"])
+            T = float(leg["expiry_years"]) if "expiry_years" in leg else years_to_expiry(leg["expiry"])
+            iv = float(leg["iv"])
+        cols["is_stock"].append(is_stock)
+        cols["is_call"].append(kind == "call")
+        cols["qty"].append(qty)
+        cols["K"].append(K)
+        cols["T"].append(T)
+        cols["iv"].append(iv)
+        cols["premium"].append(leg.get("premium"))
+
+    out = {k: np.asarray(v, dtype=bool if k.startswith("is_") else float)
+           for k, v in cols.items() if k != "premium"}
+    fair = np.where(out["is_stock"], spot,
+                    bs_price_vec(spot, out["K"], out["T"], r, out["iv"], out["is_call"]))
+    out["premium"] = np.array([fair[i] if p is None else float(p) for i, p in enumerate(cols["premium"])])
+    return out
+
+
+def _breakevens(grid: np.ndarray, pnl: np.ndarray) -> list[float]:
+    """Prices where P&L crosses zero, linearly interpolated between grid points."""
+    s = np.sign(pnl)
+    idx = np.flatnonzero(s[:-1] * s[1:] < 0)
+    x0, x1, y0, y1 = grid[idx], grid[idx + 1], pnl[idx], pnl[idx + 1]
+    return np.round(x0 - y0 * (x1 - x0) / (y1 - y0), 4).tolist()
+
+
+def strategy_profile(
+    legs: list[dict],
+    spot: float,
+    r: float = 0.05,
+    points: int = 1000,
+    low: float | None = None,
+    high: float | None = None,
+    horizons: list[float] | None = None,
+    multiplier: float = 1.0,
+) -> dict:
+    """
+    Aggregate value, P&L and net Greeks of a multi-leg position over a price grid.
+
+    Everything is one broadcast over (horizon, price, leg): legs are valued
+    with Black-Scholes at each horizon's remaining time (intrinsic once a leg
+    has expired) and summed. "expiry" is the P&L at the first option expiry;
+    `horizons` (years from now) add intermediate-date curves. Net Greeks are
+    for today across the grid.
+    """
+    L = _parse_legs(legs, spot, r)
+    option_T = L["T"][~L["is_stock"]]
+    first_expiry = float(option_T.min()) if option_T.size else 0.0
+
+    strikes = L["K"][~L["is_stock"]]
+    ref_lo = min(spot, strikes.min()) if strikes.size else spot
+    ref_hi = max(spot, strikes.max()) if strikes.size else spot
+    grid = np.linspace(low if low is not None else ref_lo * 0.7,
+                       high if high is not None else ref_hi * 1.3, points)
+
+    times = [0.0] + sorted(float(h) for h in (horizons or []) if 0 < h < first_expiry) + [first_expiry]
+    H = np.asarray(times)[:, None, None]
+    T_rem = np.maximum(L["T"] - H, 0.0)                               # (H, 1, legs)
+    S = grid[None, :, None]                                           # (1, P, 1)
+    g = greeks_vec(S, L["K"], T_rem, r, L["iv"], L["is_call"])        # (H, P, legs)
+
+    stock = L["is_stock"]
+    unit_value = np.where(stock, S, g["price"])
+    scale = L["qty"] * multiplier
+    value = (unit_value * scale).sum(axis=-1)                         # (H, P)
+    cost = float((L["premium"] * scale).sum())
+    pnl = value - cost
+
+    net = {}
+    for k in ("delta", "gamma", "theta", "vega", "rho"):
+        per_leg = np.where(stock, 1.0 if k == "delta" else 0.0, g[k][0])
+        net[k] = np.round((per_leg * scale).sum(axis=-1), 6).tolist()
+
+    expiry_pnl = pnl[-1]
+    return {
+        "spot": spot,
+        "net_premium": round(cost, 4),
+        "prices": np.round(grid, 4).tolist(),
+        "expiry": {
+            "t_years": round(first_expiry, 6),
+            "value": np.round(value[-1], 4).tolist(),
+            "pnl": np.round(expiry_pnl, 4).tolist(),
+        },
+        "horizons": [
+            {"t_years": round(t, 6), "pnl": np.round(pnl[i], 4).tolist()}
+            for i, t in enumerate(times[:-1])
+        ],
+        "greeks": net,
+        "breakevens": _breakevens(grid, expiry_pnl),
+        "max_profit": round(float(expiry_pnl.max()), 4),
+        "max_loss": round(float(expiry_pnl.min()), 4),
+    }
@@ -0,0 +1,226 @@
+"""
+FinanceIQ v6 — Portfolio Backtester
+Universe-level backtest on a (dates x tickers) close matrix with one shared
+cash account, rule-based target weights, periodic rebalancing and the
+portfolio_engine slippage/commission model.
+
+Holdings only change on rebalance dates, so each holding period is valued
+with a single matrix product and each rebalance is one vectorized order
+batch across all names.
+"""
+import numpy as np
+import pandas as pd
+
+from services.portfolio_risk import download_closes
+from services.backtest_service import performance_metrics
+from services.execution import (
+    trade_costs, DEFAULT_SLIPPAGE_BPS, DEFAULT_COMMISSION_PER_SHARE, MIN_COMMISSION,
+)
+
+ALLOCATIONS = ("equal", "inverse_vol", "momentum")
+REBALANCE_BARS = {"weekly": 5, "monthly": 21, "quarterly": 63}
+MAX_UNIVERSE = 500
+INITIAL_CASH = 100_000.0
+
+
+def target_weights(
+    closes: pd.DataFrame,
+    allocation: str = "equal",
+    lookback: int = 63,
+    top_n: int | None = None,
+) -> np.ndarray:
+    """
+    (dates x tickers) long-only target weights known at each bar's close.
+      equal        1/N across names with a price
+      inverse_vol  proportional to 1 / rolling stdev of daily returns
+      momentum     equal weight in the top_n names by lookback return
+    Rows without enough history are all zero (stay in cash).
+    """
+    if allocation not in ALLOCATIONS:
+        raise ValueError(f"allocation must be one of {ALLOCATIONS}")
+    P = closes.to_numpy(float)
+    valid = np.isfinite(P) & (P > 0)
+
+    if allocation == "equal":
+        raw = valid.astype(float)
+    elif allocation == "inverse_vol":
+        vol = closes.pct_change().rolling(lookback).std().to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            raw = np.where(valid & (vol > 0), 1.0 / vol, 0.0)
+    else:
+        mom = closes.pct_change(lookback).to_numpy()
+        mom = np.where(valid & np.isfinite(mom), mom, -np.inf)
+        n = min(top_n or max(1, P.shape[1] // 5), P.shape[1])
+        # rank each row once: the n largest momentum values get weight
+        cutoff = -np.sort(-mom, axis=1)[:, n - 1:n]
+        raw = ((mom >= cutoff) & np.isfinite(mom)).astype(float)
+
+    raw = np.nan_to_num(raw)
+    total = raw.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total > 0, raw / total, 0.0)
+
+
+def _buy_cost(px: np.ndarray, qty: np.ndarray, cost_args: tuple) -> float:
+    return float(-trade_costs(px, qty, *cost_args)["cash_delta"].sum())
+
+
+def _affordable_scale(px: np.ndarray, qty: np.ndarray, available: float, cost_args: tuple) -> float:
+    """
+    Largest fraction of the buy orders `qty` whose fills plus commissions fit
+    in `available`. Cost rises with the scale but not proportionally (the
+    minimum commission is a fixed charge per order), so bisect on it.
+    """
+    if _buy_cost(px, qty, cost_args) <= available:
+        return 1.0
+    lo, hi = 0.0, 1.0
+    for _ in range(50):
+        mid = 0.5 * (lo + hi)
+        if _buy_cost(px, qty * mid, cost_args) <= available:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def simulate_portfolio(
+    prices: np.ndarray,
+    weights: np.ndarray,
+    rebalance_every: int,
+    initial_cash: float = INITIAL_CASH,
+    slippage_bps: float = DEFAULT_SLIPPAGE_BPS,
+    commission_per_share: float = DEFAULT_COMMISSION_PER_SHARE,
+    min_commission: float = MIN_COMMISSION,
+    min_trade_value: float = 0.0,
+) -> dict:
+    """
+    Rebalance to `weights` every `rebalance_every` bars at the close.
+    Orders for all names are sized and costed together; buys are scaled
+    down (minimum commissions included) so cash never goes negative.
+    Returns equity (array), holdings and cash at the end, and cost /
+    turnover totals.
+    """
+    n_bars, n_assets = prices.shape
+    shares = np.zeros(n_assets)
+    cash = float(initial_cash)
+    equity = np.empty(n_bars)
+    totals = {"slippage": 0.0, "commission": 0.0, "turnover": 0.0, "orders": 0, "rebalances": 0}
+
+    rebalance_at = np.arange(0, n_bars, rebalance_every)
+    bounds = np.append(rebalance_at, n_bars)
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        px = prices[start]
+        value = cash + px @ shares
+        trade = weights[start] * value / np.where(px > 0, px, np.inf) - shares
+        trade[np.abs(trade * px) < max(min_trade_value, 1e-9)] = 0.0
+
+        buys, sells = trade > 0, trade < 0
+        cost_args = (slippage_bps, commission_per_share, min_commission)
+        # Cash after sells (their costs don't depend on how much is bought)
+        available = cash + trade_costs(px[sells], trade[sells], *cost_args)["cash_delta"].sum()
+        if available < 0:
+            # Sell commissions alone would overdraw: skip this rebalance
+            trade[:] = 0.0
+            new_cash = cash
+        else:
+            scale = _affordable_scale(px[buys], trade[buys], available, cost_args)
+            trade[buys] *= scale
+            new_cash = available - _buy_cost(px[buys], trade[buys], cost_args)
+            if new_cash < 0:
+                trade[buys] = 0.0
+                new_cash = available
+        costs = trade_costs(px, trade, *cost_args)
+
+        shares = shares + trade
+        cash = new_cash
+        totals["slippage"] += float(costs["slippage"].sum())
+        totals["commission"] += float(costs["commission"].sum())
+        totals["turnover"] += float(np.abs(trade * px).sum())
+        totals["orders"] += int((trade != 0).sum())
+        totals["rebalances"] += 1
+
+        # Holdings are fixed until the next rebalance: value the block in one product
+        equity[start:stop] = cash + prices[start:stop] @ shares
+
+    return {"equity": equity, "shares": shares, "cash": cash, **totals}
+
+
+def run_portfolio_backtest(
+    tickers: list[str],
+    period: str = "2y",
+    allocation: str = "equal",
+    rebalance: str | int = "monthly",
+    lookback: int = 63,
+    top_n: int | None = None,
+    initial_cash: float = INITIAL_CASH,
+    slippage_bps: float = DEFAULT_SLIPPAGE_BPS,
+    commission_per_share: float = DEFAULT_COMMISSION_PER_SHARE,
+    min_commission: float = MIN_COMMISSION,
+    min_trade_value: float = 0.0,
+) -> dict:
+    """Backtest a rebalanced portfolio over a ticker universe; see target_weights for allocation rules."""
+    try:
+        tickers = list(dict.fromkeys(t.upper().strip() for t in tickers if t.strip()))
+        if not tickers:
+            return {"error": "At least one ticker is required"}
+        if len(tickers) > MAX_UNIVERSE:
+            return {"error": f"Universe is limited to {MAX_UNIVERSE} tickers"}
+        every = REBALANCE_BARS.get(rebalance) if isinstance(rebalance, str) else int(rebalance)
+        if not every or every < 1:
+            return {"error": f"rebalance must be one of {list(REBALANCE_BARS)} or a bar count"}
+
+        closes = download_closes(tickers, period)
+        if closes.empty:
+            return {"error": "No price history for the universe"}
+        missing = [t for t in tickers if t not in closes.columns]
+        closes = closes[[t for t in tickers if t in closes.columns]]
+
+        weights = target_weights(closes, allocation, lookback, top_n)
+        # Rules needing history start once the lookback is available
+        warmup = 0 if allocation == "equal" else lookback
+        closes, weights = closes.iloc[warmup:], weights[warmup:]
+        if len(closes) < 2:
+            return {"error": "Not enough history after the allocation lookback"}
+
+        P = closes.to_numpy(float)
+        sim = simulate_portfolio(P, weights, every, initial_cash, slippage_bps,
+                                 commission_per_share, min_commission, min_trade_value)
+        equity = sim["equity"]
+        flows = np.zeros(len(equity))
+        flows[0] = initial_cash
+
+        bench = initial_cash * (P / P[0]).mean(axis=1)  # equal-weight buy & hold, no costs
+        final_px = P[-1]
+        holdings = sorted(
+            ({"ticker": t, "shares": round(float(s), 4), "value": round(float(s * p), 2)}
+             for t, s, p in zip(closes.columns, sim["shares"], final_px) if s > 0),
+            key=lambda h: -h["value"],
+        )
+        return {
+            "tickers": list(closes.columns),
+            "missing": missing,
+            "allocation": allocation,
+            "rebalance_every": every,
+            "start_date": closes.index[0].strftime("%Y-%m-%d"),
+            "end_date": closes.index[-1].strftime("%Y-%m-%d"),
+            "initial_cash": initial_cash,
+            "final_value": round(float(equity[-1]), 2),
+            "metrics": performance_metrics(equity, 0.0, flows=flows),
+            "benchmark_roi": round(float((bench[-1] / initial_cash - 1) * 100), 2),
+            "costs": {
+                "slippage": round(sim["slippage"], 2),
+                "commission": round(sim["commission"], 2),
+                "turnover": round(sim["turnover"], 2),
+                "orders": sim["orders"],
+                "rebalances": sim["rebalances"],
+            },
+            "cash": round(sim["cash"], 2),
+            "holdings": holdings[:50],
+            "equity_curve": {
+                "dates": list(closes.index.strftime("%Y-%m-%d")),
+                "equity": np.round(equity, 2).tolist(),
+                "benchmark": np.round(bench, 2).tolist(),
+            },
+        }
+    except Exception as e:
+        return {"error": str(e)}
@@ -0,0 +1,150 @@
+"""
+FinanceIQ v6 — Return Models
+Pluggable daily log-return models for the price simulator:
+  gbm        i.i.d. normal returns, constant volatility
+  bootstrap  moving-block bootstrap of historical returns
+  garch      GARCH(1,1) conditional volatility (MLE fit)
+  jump       Merton jump diffusion (threshold-detected jumps)
+
+fit_model() returns a small JSON-safe parameter dict so fits can be cached
+per ticker; simulate_log_returns() draws (paths, steps) increments with
+batched array operations (GARCH recurses over steps, vectorized across paths).
+"""
+import numpy as np
+from scipy.optimize import minimize
+from scipy.signal import lfilter
+
+from services.simulation_service import estimate_gbm_params, standard_normals
+
+RETURN_MODELS = ("gbm", "bootstrap", "garch", "jump")
+
+JUMP_THRESHOLD_SIGMAS = 3.0
+
+
+def _log_returns(closes) -> np.ndarray:
+    closes = np.asarray(closes, dtype=float)
+    return np.diff(np.log(closes[closes > 0]))
+
+
+# ── GARCH(1,1) ───────────────────────────────────────────
+
+def _garch_variance(eps: np.ndarray, omega: float, alpha: float, beta: float) -> np.ndarray:
+    """Conditional variances h_t = omega + alpha * eps_{t-1}^2 + beta * h_{t-1}, h_0 = sample var."""
+    h0 = eps.var()
+    x = np.empty_like(eps)
+    x[0] = h0
+    x[1:] = omega + alpha * eps[:-1] ** 2
+    # h_t = x_t + beta * h_{t-1} as a linear filter; x_0 = h_0 seeds the recursion
+    return lfilter([1.0], [1.0, -beta], x)
+
+
+def _garch_nll(params: np.ndarray, eps: np.ndarray) -> float:
+    omega, alpha, beta = params
+    if omega <= 0 or alpha < 0 or beta < 0 or alpha + beta >= 0.999:
+        return 1e10
+    h = _garch_variance(eps, omega, alpha, beta)
+    return 0.5 * float(np.sum(np.log(h) + eps ** 2 / h))
+
+
+def fit_garch(returns: np.ndarray) -> dict:
+    mu = float(returns.mean())
+    eps = returns - mu
+    var = float(eps.var())
+    x0 = [var * 0.05, 0.08, 0.9]
+    res = minimize(_garch_nll, x0, args=(eps,), method="Nelder-Mead",
+                   options={"xatol": 1e-8, "fatol": 1e-6, "maxiter": 2000})
+    omega, alpha, beta = (float(v) for v in res.x)
+    if _garch_nll(res.x, eps) >= 1e10:
+        omega, alpha, beta = var, 0.0, 0.0   # degenerate fit: constant variance
+    h = _garch_variance(eps, omega, alpha, beta)
+    h_next = omega + alpha * eps[-1] ** 2 + beta * h[-1]
+    return {"mu": mu, "omega": omega, "alpha": alpha, "beta": beta, "h_next": float(h_next),
+            "long_run_vol": float(np.sqrt(omega / max(1 - alpha - beta, 1e-6)))}
+
+
+# ── Merton jump diffusion ────────────────────────────────
+
+def fit_jump(returns: np.ndarray) -> dict:
+    """
+    Moment-style fit: returns beyond JUMP_THRESHOLD_SIGMAS robust (MAD)
+    standard deviations are jumps; the rest is the diffusion.
+    """
+    med = np.median(returns)
+    robust_sd = 1.4826 * np.median(np.abs(returns - med))
+    is_jump = np.abs(returns - med) > JUMP_THRESHOLD_SIGMAS * robust_sd
+    diffusion = returns[~is_jump]
+    jumps = returns[is_jump] - diffusion.mean()
+    return {
+        "mu": float(diffusion.mean()),
+        "sigma": float(diffusion.std()),
+        "lam": float(is_jump.mean()),                       # jumps per day
+        "jump_mu": float(jumps.mean()) if jumps.size else 0.0,
+        "jump_sigma": float(jumps.std()) if jumps.size > 1 else 0.0,
+        "n_jumps": int(is_jump.sum()),
+    }
+
+
+# ── Dispatch ─────────────────────────────────────────────
+
+def fit_model(model: str, closes) -> dict:
+    """Fit `model` to a close series. The dict is JSON-safe for caching."""
+    if model not in RETURN_MODELS:
+        raise ValueError(f"model must be one of {RETURN_MODELS}")
+    closes = np.asarray(closes, dtype=float)
+    returns = _log_returns(closes)
+    if returns.size < 30:
+        raise ValueError("Need at least 30 returns to fit a return model")
+
+    if model == "gbm":
+        drift, stdev = estimate_gbm_params(closes)
+        params = {"drift": drift, "stdev": stdev}
+    elif model == "bootstrap":
+        params = {"returns": np.round(returns, 8).tolist(),
+                  "block": int(max(2, round(returns.size ** (1 / 3))))}
+    elif model == "garch":
+        params = fit_garch(returns)
+    else:
+        params = fit_jump(returns)
+    return {"model": model, "S0": float(closes[-1]), **params}
+
+
+def simulate_log_returns(
+    fit: dict,
+    steps: int,
+    n_paths: int,
+    rng: np.random.Generator,
+    method: str = "pseudo",
+    dtype=np.float64,
+) -> np.ndarray:
+    """(n_paths, steps) daily log returns under a fitted model."""
+    model = fit["model"]
+
+    if model == "bootstrap":
+        # Moving-block bootstrap: random block starts, contiguous runs of history
+        hist = np.asarray(fit["returns"], dtype=dtype)
+        block = min(fit["block"], hist.size)
+        n_blocks = -(-steps // block)
+        starts = rng.integers(0, hist.size - block + 1, size=(n_paths, n_blocks))
+        idx = (starts[:, :, None] + np.arange(block)).reshape(n_paths, -1)[:, :steps]
+        return hist[idx]
+
+    Z = standard_normals(n_paths, steps, rng, method, dtype)
+    n_paths = Z.shape[0]  # sobol may round up
+
+    if model == "gbm":
+        return fit["drift"] + fit["stdev"] * Z
+
+    if model == "garch":
+        omega, alpha, beta = fit["omega"], fit["alpha"], fit["beta"]
+        h = np.full(n_paths, fit["h_next"], dtype=dtype)
+        out = np.empty_like(Z)
+        for t in range(steps):
+            eps = np.sqrt(h) * Z[:, t]
+            out[:, t] = fit["mu"] + eps
+            h = omega + alpha * eps * eps + beta * h
+        return out
+
+    # Merton: diffusion plus compound-Poisson normal jumps (sum of N jumps in closed form)
+    N = rng.poisson(fit["lam"], size=(n_paths, steps))
+    jumps = N * fit["jump_mu"] + np.sqrt(N) * fit["jump_sigma"] * rng.standard_normal((n_paths, steps))
+    return (fit["mu"] + fit["sigma"] * Z + jumps).astype(dtype, copy=False)
@@ -0,0 +1,332 @@
+"""
+FinanceIQ v6 — Simulation Core
+Shared Geometric Brownian Motion setup for the Monte Carlo endpoints and the
+option pricer: parameter estimation from closes and vectorized path generation.
+"""
+import time
+from functools import lru_cache
+import numpy as np
+from scipy.special import ndtri
+from scipy.stats import qmc
+
+TRADING_DAYS = 252
+SAMPLING_METHODS = ("pseudo", "antithetic", "sobol", "halton")
+
+
+def estimate_gbm_params(closes: np.ndarray) -> tuple[float, float]:
+    """
+    Daily GBM parameters from a close series.
+    Returns (drift, stdev) of daily log returns, drift = mean - var/2.
+    """
+    closes = np.asarray(closes, dtype=float)
+    log_returns = np.diff(np.log(closes))
+    u = log_returns.mean()
+    var = log_returns.var()
+    return float(u - 0.5 * var), float(log_returns.std())
+
+
+def gbm_paths(
+    S0: float,
+    drift: float,
+    vol: float,
+    steps: int,
+    n_paths: int,
+    rng: np.random.Generator,
+    antithetic: bool = False,
+    dtype=np.float64,
+    method: str | None = None,
+) -> np.ndarray:
+    """
+    (n_paths, steps + 1) price paths starting at S0, built with one cumsum
+    over per-step log increments drift + vol * Z. Z comes from
+    standard_normals(); antithetic=True is shorthand for method="antithetic".
+    """
+    Z = standard_normals(n_paths, steps, rng, method or ("antithetic" if antithetic else "pseudo"), dtype)
+    return paths_from_log_returns(S0, drift + vol * Z)
+
+
+def paths_from_log_returns(S0: float, log_inc: np.ndarray) -> np.ndarray:
+    """(n, steps + 1) price paths from (n, steps) log increments via one cumsum."""
+    n, steps = log_inc.shape
+    paths = np.empty((n, steps + 1), dtype=log_inc.dtype)
+    paths[:, 0] = S0
+    np.cumsum(log_inc, axis=1, out=paths[:, 1:])
+    np.exp(paths[:, 1:], out=paths[:, 1:])
+    paths[:, 1:] *= S0
+    return paths
+
+
+@lru_cache(maxsize=32)
+def _bridge_schedule(steps: int) -> tuple[np.ndarray, ...]:
+    """
+    Brownian-bridge fill order on a unit-step grid 0..steps: the first normal
+    sets W(steps), each following one bisects the largest remaining gap.
+    Returns (target, left, right, w_left, w_right, sd) arrays, one row per normal.
+    """
+    target, left, right = [steps], [0], [0]
+    wl, wr, sd = [0.0], [0.0], [float(np.sqrt(steps))]
+    gaps = [(0, steps)]
+    while gaps:
+        nxt = []
+        for lo, hi in gaps:
+            if hi - lo < 2:
+                continue
+            mid = (lo + hi) // 2
+            a, b = mid - lo, hi - mid
+            target.append(mid)
+            left.append(lo)
+            right.append(hi)
+            wl.append(b / (a + b))
+            wr.append(a / (a + b))
+            sd.append(float(np.sqrt(a * b / (a + b))))
+            nxt += [(lo, mid), (mid, hi)]
+        gaps = nxt
+    return tuple(np.asarray(x) for x in (target, left, right, wl, wr, sd))
+
+
+def brownian_bridge(Z: np.ndarray) -> np.ndarray:
+    """
+    Map (n, steps) i.i.d. normals to unit-variance Brownian increments using
+    the bridge construction, so the leading (best-distributed) quasi-random
+    dimensions drive the coarse shape of each path.
+    """
+    n, steps = Z.shape
+    target, left, right, wl, wr, sd = _bridge_schedule(steps)
+    W = np.zeros((n, steps + 1), dtype=Z.dtype)
+    for k in range(steps):
+        W[:, target[k]] = wl[k] * W[:, left[k]] + wr[k] * W[:, right[k]] + sd[k] * Z[:, k]
+    return np.diff(W, axis=1)
+
+
+def standard_normals(
+    n_paths: int,
+    steps: int,
+    rng: np.random.Generator,
+    method: str = "pseudo",
+    dtype=np.float64,
+) -> np.ndarray:
+    """
+    (n_paths, steps) standard normal increments.
+      pseudo      i.i.d. draws from rng
+      antithetic  second half is -Z of the first half (n_paths even)
+      sobol       scrambled Sobol points + Brownian bridge (n_paths rounded
+                  up to a power of two to keep the sequence balanced)
+      halton      scrambled Halton points + Brownian bridge
+    """
+    if method not in SAMPLING_METHODS:
+        raise ValueError(f"method must be one of {SAMPLING_METHODS}")
+    if method == "pseudo":
+        return rng.standard_normal((n_paths, steps), dtype=dtype)
+    if method == "antithetic":
+        half = rng.standard_normal((n_paths // 2, steps), dtype=dtype)
+        return np.concatenate([half, -half])
+
+    if method == "sobol":
+        U = qmc.Sobol(steps, scramble=True, seed=rng).random_base2(int(np.ceil(np.log2(max(n_paths, 2)))))
+    else:
+        U = qmc.Halton(steps, scramble=True, seed=rng).random(n_paths)
+    Z = ndtri(np.clip(U, 1e-12, 1 - 1e-12))
+    return brownian_bridge(Z).astype(dtype, copy=False)
+
+
+def request_seed(seed: int | None) -> int:
+    """The caller's seed, or a fresh one to echo back so the run can be reproduced."""
+    if seed is not None:
+        return int(seed)
+    return int(np.random.SeedSequence().generate_state(1)[0])
+
+
+CONVERGENCE_PERCENTILES = (10, 50, 90)
+
+
+def band_convergence(
+    drift: float,
+    vol: float,
+    steps: int,
+    path_counts=(256, 1024, 4096, 16384),
+    methods=SAMPLING_METHODS,
+    reps: int = 8,
+    seed: int = 0,
+) -> dict:
+    """
+    Benchmark: RMS relative error of the terminal p10/p50/p90 (in units of
+    S0 = 1) against the exact lognormal quantiles, for each sampling method
+    and path count, over `reps` independently seeded runs, plus mean runtime.
+    """
+    z = ndtri(np.asarray(CONVERGENCE_PERCENTILES) / 100)
+    exact = np.exp(drift * steps + vol * np.sqrt(steps) * z)
+
+    rows = []
+    for method in methods:
+        for n in path_counts:
+            rng = np.random.default_rng(seed)
+            errs, elapsed, n_used = [], 0.0, n
+            for _ in range(reps):
+                t0 = time.perf_counter()
+                paths = gbm_paths(1.0, drift, vol, steps, n, rng, method=method)
+                est = np.percentile(paths[:, -1], CONVERGENCE_PERCENTILES)
+                elapsed += time.perf_counter() - t0
+                errs.append((est - exact) / exact)
+                n_used = paths.shape[0]
+            rmse = np.sqrt(np.mean(np.square(errs), axis=0))
+            rows.append({
+                "method": method,
+                "paths": int(n_used),
+                **{f"p{p}_rel_rmse": round(float(e), 6) for p, e in zip(CONVERGENCE_PERCENTILES, rmse)},
+                "ms": round(elapsed / reps * 1000, 2),
+            })
+    return {"steps": steps, "reps": reps, "exact": np.round(exact, 6).tolist(), "results": rows}
+
+
+BAND_PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+
+
+def percentile_bands(paths: np.ndarray, percentiles=BAND_PERCENTILES) -> dict[str, list[float]]:
+    """Per-step percentile bands across paths (one np.percentile call)."""
+    bands = np.percentile(paths, percentiles, axis=0)
+    return {f"p{p}": np.round(band.astype(float), 2).tolist() for p, band in zip(percentiles, bands)}
+
+
+def final_price_stats(paths: np.ndarray, S0: float) -> dict[str, float]:
+    """Summary statistics of the terminal prices."""
+    final = paths[:, -1].astype(float)
+    p5, p10, p50, p90, p95 = np.percentile(final, [5, 10, 50, 90, 95])
+    return {
+        "mean": round(float(final.mean()), 2),
+        "median": round(float(p50), 2),
+        "std": round(float(final.std()), 2),
+        "p5": round(float(p5), 2),
+        "p10": round(float(p10), 2),
+        "p90": round(float(p90), 2),
+        "p95": round(float(p95), 2),
+        "pct_up": round(float((final > S0).mean() * 100), 2),
+    }
+
+
+# ── Streaming (constant-memory) statistics ───────────────
+
+SKETCH_RELATIVE_ACCURACY = 0.001
+
+
+class StreamingBands:
+    """
+    Per-step quantile sketches plus running mean / variance over path chunks,
+    so band statistics never need the full (paths x steps) matrix.
+
+    The sketch is DDSketch-style: positive values fall into logarithmic
+    buckets of ratio gamma = (1 + a) / (1 - a), and a quantile is reported as
+    the bucket's midpoint estimate, which is within relative error
+    a = SKETCH_RELATIVE_ACCURACY (0.1%) of the exact (nearest-rank) value.
+    The bucket window is sized from the first chunk with generous headroom;
+    values beyond it are clamped into the edge buckets (counted in
+    `clamped`), which only affects extreme tails. Each chunk update is a
+    single bincount over all steps, and sketches from different workers can
+    be merged by adding counts.
+    """
+
+    def __init__(self, n_steps: int, accuracy: float = SKETCH_RELATIVE_ACCURACY, max_buckets: int = 8192):
+        self.n_steps = n_steps
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = np.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.counts: np.ndarray | None = None
+        self.offset = 0
+        self.n = 0
+        self.mean = np.zeros(n_steps)
+        self.m2 = np.zeros(n_steps)
+        self.clamped = 0
+        self.above: dict[float, int] = {}
+
+    def _init_window(self, chunk: np.ndarray) -> None:
+        lo, hi = np.log(chunk.min()), np.log(chunk.max())
+        pad = max(hi - lo, 0.1)
+        k_lo = int(np.floor((lo - pad) / self.log_gamma))
+        k_hi = int(np.ceil((hi + pad) / self.log_gamma))
+        n_buckets = min(k_hi - k_lo + 1, self.max_buckets)
+        centre = (k_lo + k_hi) // 2
+        self.offset = centre - n_buckets // 2
+        self.counts = np.zeros((self.n_steps, n_buckets), dtype=np.int64)
+
+    def update(self, chunk: np.ndarray, thresholds=()) -> None:
+        """Add a (paths, n_steps) block. `thresholds` count final values above each level."""
+        chunk = np.asarray(chunk, dtype=float)
+        if self.counts is None:
+            self._init_window(chunk)
+        n_buckets = self.counts.shape[1]
+
+        keys = np.ceil(np.log(np.maximum(chunk, 1e-300)) / self.log_gamma).astype(np.int64) - self.offset
+        out = (keys < 0) | (keys >= n_buckets)
+        self.clamped += int(out.sum())
+        np.clip(keys, 0, n_buckets - 1, out=keys)
+        keys += np.arange(self.n_steps) * n_buckets
+        self.counts += np.bincount(keys.ravel(), minlength=self.counts.size).reshape(self.counts.shape)
+
+        # Chan et al. parallel merge of running mean / M2
+        m = chunk.shape[0]
+        c_mean = chunk.mean(axis=0)
+        c_m2 = ((chunk - c_mean) ** 2).sum(axis=0)
+        total = self.n + m
+        delta = c_mean - self.mean
+        self.mean += delta * m / total
+        self.m2 += c_m2 + delta * delta * self.n * m / total
+        self.n = total
+        for level in thresholds:
+            self.above[level] = self.above.get(level, 0) + int((chunk[:, -1] > level).sum())
+
+    def quantiles(self, qs) -> np.ndarray:
+        """(len(qs), n_steps) quantile estimates, qs in [0, 1]."""
+        cum = np.cumsum(self.counts, axis=1)
+        out = np.empty((len(qs), self.n_steps))
+        for i, q in enumerate(qs):
+            rank = q * (self.n - 1)
+            k = (cum <= rank).sum(axis=1) + self.offset
+            out[i] = 2 * self.gamma ** k / (self.gamma + 1)
+        return out
+
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.m2 / max(self.n - 1, 1))
+
+    def bands(self, percentiles=BAND_PERCENTILES) -> dict[str, list[float]]:
+        est = self.quantiles([p / 100 for p in percentiles])
+        return {f"p{p}": np.round(band, 2).tolist() for p, band in zip(percentiles, est)}
+
+    def final_stats(self, S0: float) -> dict[str, float]:
+        p5, p10, p50, p90, p95 = self.quantiles([0.05, 0.10, 0.50, 0.90, 0.95])[:, -1]
+        return {
+            "mean": round(float(self.mean[-1]), 2),
+            "median": round(float(p50), 2),
+            "std": round(float(self.std()[-1]), 2),
+            "p5": round(float(p5), 2),
+            "p10": round(float(p10), 2),
+            "p90": round(float(p90), 2),
+            "p95": round(float(p95), 2),
+            "pct_up": round(self.above.get(S0, 0) / max(self.n, 1) * 100, 2),
+        }
+
+
+def stream_simulation(
+    simulate_chunk,
+    n_paths: int,
+    n_steps: int,
+    S0: float,
+    chunk_bytes: int = 32 * 1024 * 1024,
+    power_of_two: bool = False,
+) -> StreamingBands:
+    """
+    Run `simulate_chunk(size) -> (size', n_steps) paths` repeatedly until
+    n_paths are covered, folding each block into a StreamingBands sketch.
+    Peak memory is about chunk_bytes regardless of n_paths. power_of_two
+    keeps every block size a power of two (rounded down), so Sobol chunks
+    are not padded past the memory budget or the requested count.
+    """
+    sketch = StreamingBands(n_steps)
+    chunk = max(1024, chunk_bytes // (8 * n_steps * 4))
+    done = 0
+    while done < n_paths:
+        size = min(chunk, n_paths - done)
+        if power_of_two:
+            size = 1 << (size.bit_length() - 1)
+        paths = simulate_chunk(size)
+        sketch.update(paths, thresholds=(S0,))
+        done += paths.shape[0]
+    return sketch
@@ -5,7 +5,8 @@ import os
 import praw
 from core.logging import logger
 from ntscraper import Nitter
-from datetime import datetime
+from datetime import datetime, timezone
+from services.alphamath import parse_published_ts
 
 def fetch_reddit_sentiment(ticker: str, limit: int = 15) -> list[dict]:
     """Fetch recent posts from Reddit mentioning the ticker."""
@@ -35,7 +36,8 @@ def fetch_reddit_sentiment(ticker: str, limit: int = 15) -> list[dict]:
                         items.append({
                             "title": submission.title,
                             "summary": submission.selftext[:500],
-                            "published": datetime.fromtimestamp(submission.created_utc).strftime("%a, %d %b %Y %H:%M:%S GMT"),
+                            "published": datetime.fromtimestamp(submission.created_utc, timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT"),
+                            "published_ts": float(submission.created_utc),
                             "source": f"Reddit (r/{sub})",
                             "link": f"https://reddit.com{submission.permalink}"
                         })
@@ -60,6 +62,7 @@ def fetch_twitter_sentiment(ticker: str, limit: int = 10) -> list[dict]:
                     "title": f"Tweet by {t['user']['username']}",
                     "summary": t['text'],
                     "published": t['date'],
+                    "published_ts": parse_published_ts(t['date']),
                     "source": "Twitter / X",
                     "link": t['link']
                 })
@@ -0,0 +1,363 @@
+"""
+FinanceIQ v6 — Pluggable Backtest Strategies
+Strategies turn a bar dict (open/high/low/close/volume arrays) into the
+engine's signal array. Two ways to define one:
+
+  * Python classes registered with @register_strategy, implementing a
+    vectorized signals(bars) hook (used for built-ins and in-repo plugins).
+  * Declarative rules submitted over the API: boolean expressions for
+    "long", "short" and optionally "hedge", e.g.
+        {"long": "close > ema(close, 20) and rsi(close, 14) < 70",
+         "short": "close < ema(close, 20)"}
+
+Expressions are parsed with `ast`, checked against a whitelist (numbers,
+bar names, arithmetic / comparison / boolean operators, and calls to the
+indicator library below — no attributes, subscripts, keywords or
+arbitrary names), then compiled once into a tree of NumPy closures and
+cached. Nothing is passed to eval(). Indicator calls are memoized per run,
+so a sub-expression like ema(close, 20) used twice is computed once.
+"""
+import ast
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Callable
+import numpy as np
+import pandas as pd
+
+from services.backtest_service import (
+    SIGNAL_SHORT, SIGNAL_HEDGE, SIGNAL_LONG, SIGNAL_FLAT, DEFAULT_PARAMS,
+    ema, bb_width, bidirectional_signals, backtest_report, load_history, bars_from_history,
+)
+
+BAR_FIELDS = ("open", "high", "low", "close", "volume")
+MAX_EXPRESSION_LENGTH = 500
+MAX_EXPRESSION_NODES = 200
+MAX_WINDOW = 1000
+
+
+# ══════════════════════════════════════════════════════════
+# INDICATOR LIBRARY
+# ══════════════════════════════════════════════════════════
+
+def _rolling(x: np.ndarray, n: int):
+    return pd.Series(x).rolling(n)
+
+
+def _rsi(x: np.ndarray, n: int) -> np.ndarray:
+    delta = np.diff(x, prepend=np.nan)
+    gain = pd.Series(np.where(delta > 0, delta, 0.0)).ewm(alpha=1 / n, adjust=False).mean()
+    loss = pd.Series(np.where(delta < 0, -delta, 0.0)).ewm(alpha=1 / n, adjust=False).mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = 100 - 100 / (1 + gain.to_numpy() / loss.to_numpy())
+    out[:n] = np.nan
+    return out
+
+
+def _shift(x: np.ndarray, n: int) -> np.ndarray:
+    out = np.full_like(x, np.nan, dtype=float)
+    if n < len(x):
+        out[n:] = x[:len(x) - n]
+    return out
+
+
+def _cross_above(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a, b = np.broadcast_arrays(a, b)
+    return (a > b) & (_shift(a, 1) <= _shift(b, 1))
+
+
+def _cross_below(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return _cross_above(b, a)
+
+
+# name -> (function, argument kinds); "s" = series, "w" = integer window
+INDICATORS: dict[str, tuple[Callable, str]] = {
+    "sma": (lambda x, n: _rolling(x, n).mean().to_numpy(), "sw"),
+    "ema": (lambda x, n: ema(x, n), "sw"),
+    "std": (lambda x, n: _rolling(x, n).std().to_numpy(), "sw"),
+    "highest": (lambda x, n: _rolling(x, n).max().to_numpy(), "sw"),
+    "lowest": (lambda x, n: _rolling(x, n).min().to_numpy(), "sw"),
+    "rsi": (_rsi, "sw"),
+    "bb_width": (lambda x, n: bb_width(x, n), "sw"),
+    "roc": (lambda x, n: x / _shift(x, n) - 1, "sw"),
+    "shift": (_shift, "sw"),
+    "cross_above": (_cross_above, "ss"),
+    "cross_below": (_cross_below, "ss"),
+    "abs": (np.abs, "s"),
+    "log": (np.log, "s"),
+    "max": (np.maximum, "ss"),
+    "min": (np.minimum, "ss"),
+}
+
+_BINOPS = {
+    ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply,
+    ast.Div: np.divide, ast.Mod: np.mod, ast.Pow: np.power,
+}
+_CMPOPS = {
+    ast.Gt: np.greater, ast.GtE: np.greater_equal, ast.Lt: np.less,
+    ast.LtE: np.less_equal, ast.Eq: np.equal, ast.NotEq: np.not_equal,
+}
+
+
+# ══════════════════════════════════════════════════════════
+# EXPRESSION COMPILER (sandboxed)
+# ══════════════════════════════════════════════════════════
+
+class StrategyError(ValueError):
+    """Invalid or unsafe strategy definition."""
+
+
+def _compile_node(node: ast.AST) -> Callable[[dict], np.ndarray]:
+    """Compile a validated AST node into a closure over the per-run context."""
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise StrategyError(f"Only numeric constants are allowed, got {node.value!r}")
+        value = float(node.value)
+        return lambda ctx: value
+
+    if isinstance(node, ast.Name):
+        if node.id not in BAR_FIELDS:
+            raise StrategyError(f"Unknown name '{node.id}' (bars: {', '.join(BAR_FIELDS)})")
+        name = node.id
+        return lambda ctx: ctx["bars"][name]
+
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile_node(node.operand)
+        if isinstance(node.op, ast.USub):
+            return lambda ctx: np.negative(operand(ctx))
+        if isinstance(node.op, (ast.Not, ast.Invert)):
+            return lambda ctx: np.logical_not(operand(ctx))
+        raise StrategyError("Unsupported unary operator")
+
+    if isinstance(node, ast.BinOp):
+        op = _BINOPS.get(type(node.op))
+        if op is None:
+            raise StrategyError("Unsupported arithmetic operator")
+        left, right = _compile_node(node.left), _compile_node(node.right)
+        if isinstance(node.op, ast.Pow) and not (
+            isinstance(node.right, ast.Constant) and abs(node.right.value) <= 10
+        ):
+            raise StrategyError("Exponents must be numeric constants up to 10")
+        return lambda ctx: op(left(ctx), right(ctx))
+
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile_node(v) for v in node.values]
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+
+        def _bool(ctx):
+            out = parts[0](ctx)
+            for p in parts[1:]:
+                out = combine(out, p(ctx))
+            return out
+        return _bool
+
+    if isinstance(node, ast.Compare):
+        terms = [_compile_node(node.left)] + [_compile_node(c) for c in node.comparators]
+        ops = []
+        for op in node.ops:
+            if type(op) not in _CMPOPS:
+                raise StrategyError("Unsupported comparison")
+            ops.append(_CMPOPS[type(op)])
+
+        def _cmp(ctx):
+            vals = [t(ctx) for t in terms]
+            out = ops[0](vals[0], vals[1])
+            for i in range(1, len(ops)):
+                out = np.logical_and(out, ops[i](vals[i], vals[i + 1]))
+            return out
+        return _cmp
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in INDICATORS:
+            raise StrategyError(f"Unknown function (available: {', '.join(sorted(INDICATORS))})")
+        if node.keywords:
+            raise StrategyError("Keyword arguments are not supported")
+        name = node.func.id
+        fn, kinds = INDICATORS[name]
+        if len(node.args) != len(kinds):
+            raise StrategyError(f"{name}() takes {len(kinds)} argument(s)")
+        args = []
+        for arg, kind in zip(node.args, kinds):
+            if kind == "w":
+                if not (isinstance(arg, ast.Constant) and isinstance(arg.value, int)
+                        and not isinstance(arg.value, bool) and 1 <= arg.value <= MAX_WINDOW):
+                    raise StrategyError(f"{name}() window must be an integer from 1 to {MAX_WINDOW}")
+                window = arg.value
+                args.append(lambda ctx, w=window: w)
+            else:
+                args.append(_compile_node(arg))
+        key = ast.dump(node)
+
+        def _call(ctx):
+            memo = ctx["memo"]
+            if key not in memo:
+                vals = [a(ctx) for a in args]
+                vals = [np.broadcast_to(v, ctx["shape"]).astype(float) if k == "s" else v
+                        for v, k in zip(vals, kinds)]
+                memo[key] = fn(*vals)
+            return memo[key]
+        return _call
+
+    raise StrategyError(f"Unsupported syntax: {type(node).__name__}")
+
+
+@lru_cache(maxsize=256)
+def compile_expression(expr: str) -> Callable[[dict], np.ndarray]:
+    """Validate and compile one rule expression (cached by source text)."""
+    if not isinstance(expr, str) or not expr.strip():
+        raise StrategyError("Expression must be a non-empty string")
+    if len(expr) > MAX_EXPRESSION_LENGTH:
+        raise StrategyError(f"Expression longer than {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        tree = ast.parse(expr.strip(), mode="eval")
+    except SyntaxError as e:
+        raise StrategyError(f"Syntax error: {e.msg}") from None
+    if sum(1 for _ in ast.walk(tree)) > MAX_EXPRESSION_NODES:
+        raise StrategyError("Expression is too complex")
+    return _compile_node(tree.body)
+
+
+# ══════════════════════════════════════════════════════════
+# STRATEGY INTERFACE
+# ══════════════════════════════════════════════════════════
+
+class Strategy(ABC):
+    """Base class: map bars (dict of equal-length arrays) to a signal array."""
+
+    name = "base"
+    description = ""
+
+    @abstractmethod
+    def signals(self, bars: dict[str, np.ndarray]) -> np.ndarray:
+        ...
+
+    def warmup(self, bars: dict[str, np.ndarray]) -> int:
+        """Bars to skip before the strategy's indicators are defined."""
+        return 0
+
+    def run(self, bars: dict[str, np.ndarray]) -> tuple[np.ndarray, int]:
+        """(signals, warm-up bars); override when both come from one evaluation."""
+        return self.signals(bars), self.warmup(bars)
+
+
+STRATEGIES: dict[str, type[Strategy]] = {}
+
+
+def register_strategy(cls: type[Strategy]) -> type[Strategy]:
+    STRATEGIES[cls.name] = cls
+    return cls
+
+
+@register_strategy
+class Bidirectional(Strategy):
+    """The built-in EMA / Bollinger-width long-short-hedge rule."""
+
+    name = "bidirectional"
+    description = "Long above EMA, short below, 50/50 hedge when BB width exceeds a threshold"
+
+    def __init__(self, ema_span: int = DEFAULT_PARAMS["ema_span"], bb_window: int = DEFAULT_PARAMS["bb_window"],
+                 hedge_threshold: float = DEFAULT_PARAMS["hedge_threshold"]):
+        self.ema_span, self.bb_window, self.hedge_threshold = int(ema_span), int(bb_window), float(hedge_threshold)
+
+    def signals(self, bars):
+        close = bars["close"]
+        return bidirectional_signals(close, ema(close, self.ema_span),
+                                     bb_width(close, self.bb_window), self.hedge_threshold)
+
+    def warmup(self, bars):
+        return self.bb_window - 1
+
+
+class ExpressionStrategy(Strategy):
+    """Rules given as expressions; precedence hedge > long > short, otherwise flat."""
+
+    name = "expression"
+
+    def __init__(self, long: str, short: str | None = None, hedge: str | None = None):
+        if not isinstance(long, str) or not long.strip():
+            raise StrategyError("long rule is required")
+        self.rules = {k: v for k, v in (("hedge", hedge), ("long", long), ("short", short)) if v}
+        self.compiled = {k: compile_expression(v) for k, v in self.rules.items()}
+
+    def _evaluate(self, bars) -> tuple[dict[str, np.ndarray], dict]:
+        n = len(bars["close"])
+        ctx = {"bars": bars, "memo": {}, "shape": (n,)}
+        with np.errstate(all="ignore"):
+            out = {k: np.broadcast_to(np.asarray(fn(ctx), dtype=bool), (n,)) for k, fn in self.compiled.items()}
+        return out, ctx["memo"]
+
+    def run(self, bars):
+        rules, memo = self._evaluate(bars)
+        n = len(bars["close"])
+        false = np.zeros(n, dtype=bool)
+        sig = np.full(n, SIGNAL_FLAT, dtype=np.int8)
+        sig[rules.get("short", false)] = SIGNAL_SHORT
+        sig[rules["long"]] = SIGNAL_LONG
+        sig[rules.get("hedge", false)] = SIGNAL_HEDGE
+
+        # Warm-up ends at the first bar where every referenced indicator is defined
+        start = 0
+        for arr in memo.values():
+            finite = np.flatnonzero(np.isfinite(np.asarray(arr, dtype=float)))
+            start = max(start, int(finite[0]) if finite.size else n)
+        return sig, start
+
+    def signals(self, bars):
+        return self.run(bars)[0]
+
+    def warmup(self, bars):
+        return self.run(bars)[1]
+
+
+def build_strategy(spec) -> Strategy:
+    """
+    Strategy from an API spec: a registered name, {"name": ..., "params": {...}},
+    or expression rules {"long": ..., "short": ..., "hedge": ...}.
+    """
+    if isinstance(spec, str):
+        spec = {"name": spec}
+    if not isinstance(spec, dict):
+        raise StrategyError("Strategy must be a name or an object")
+    if "long" in spec:
+        unknown = set(spec) - {"long", "short", "hedge"}
+        if unknown:
+            raise StrategyError(f"Unknown rule keys: {', '.join(sorted(unknown))}")
+        return ExpressionStrategy(spec["long"], spec.get("short"), spec.get("hedge"))
+    cls = STRATEGIES.get(spec.get("name", ""))
+    if cls is None:
+        raise StrategyError(f"Unknown strategy (registered: {', '.join(STRATEGIES)})")
+    try:
+        return cls(**spec.get("params", {}))
+    except TypeError as e:
+        raise StrategyError(f"Bad parameters for {cls.name}: {e}") from None
+
+
+def describe_strategies() -> dict:
+    return {
+        "strategies": [{"name": c.name, "description": c.description} for c in STRATEGIES.values()],
+        "functions": {name: kinds.replace("s", "series ").replace("w", "window ").split() for name, (_, kinds) in INDICATORS.items()},
+        "bars": list(BAR_FIELDS),
+    }
+
+
+def run_strategy_backtest(ticker: str, strategy, period: str = "1y", monthly_budget: float = 300.0,
+                          hist: pd.DataFrame | None = None, keep_columns: bool = False,
+                          execution: dict | None = None) -> dict:
+    """Backtest any registered or expression strategy with the standard engine and report."""
+    try:
+        strat = build_strategy(strategy)
+        if hist is None:
+            hist = load_history(ticker, period)
+        if hist.empty or len(hist) < 30:
+            return {"error": f"Insufficient data for {ticker}"}
+
+        bars = bars_from_history(hist)
+        signals, start = strat.run(bars)
+        if start >= len(signals):
+            return {"error": "Not enough data after indicator computation"}
+        result = backtest_report(ticker, period, hist.index[start:], bars["close"][start:],
+                                 signals[start:], monthly_budget, keep_columns,
+                                 bars={k: v[start:] for k, v in bars.items()}, execution=execution)
+        result["strategy"] = strategy if isinstance(strategy, (str, dict)) else strat.name
+        return result
+    except Exception as e:
+        return {"error": str(e)}
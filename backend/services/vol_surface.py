@@ -0,0 +1,142 @@
+"""
+FinanceIQ v6 — Implied Volatility Surface
+Solves IVs for every listed expiry, fits a raw-SVI smile per slice and
+evaluates the surface at arbitrary strikes / maturities.
+
+Raw SVI total variance:  w(k) = a + b * (rho * (k - m) + sqrt((k - m)^2 + s^2))
+with k = ln(K / F) and F = S * e^(rT). Between slices total variance is
+interpolated linearly in T at fixed k; outside the listed range implied
+vol is held flat.
+"""
+import time
+import numpy as np
+import pandas as pd
+from scipy.optimize import least_squares
+
+from services.options_service import implied_vol_vec, greeks_vec, years_to_expiry, IV_OK
+
+MIN_POINTS_PER_SLICE = 5
+_SVI_KEYS = ("a", "b", "rho", "m", "sigma")
+
+
+def svi_total_variance(k: np.ndarray, a, b, rho, m, sigma) -> np.ndarray:
+    d = k - m
+    return a + b * (rho * d + np.sqrt(d * d + sigma * sigma))
+
+
+def _otm_quotes(calls: pd.DataFrame, puts: pd.DataFrame, spot: float, T: float, r: float):
+    """Log-moneyness and IVs from OTM quotes (puts below forward, calls above)."""
+    fwd = spot * np.exp(r * T)
+    ks, ivs = [], []
+    for df, is_call in ((calls, True), (puts, False)):
+        if df is None or df.empty:
+            continue
+        K = df["strike"].to_numpy(float)
+        bid = df["bid"].to_numpy(float) if "bid" in df else np.zeros(len(df))
+        ask = df["ask"].to_numpy(float) if "ask" in df else np.zeros(len(df))
+        last = df["lastPrice"].to_numpy(float)
+        px = np.where((bid > 0) & (ask > 0), 0.5 * (bid + ask), last)
+        otm = (K >= fwd) if is_call else (K < fwd)
+        iv, reason = implied_vol_vec(px, spot, K, T, r, is_call)
+        keep = otm & (reason == IV_OK) & (iv > 0.01) & (iv < 3.0)
+        ks.append(np.log(K[keep] / fwd))
+        ivs.append(iv[keep])
+    if not ks:
+        return np.array([]), np.array([])
+    k, iv = np.concatenate(ks), np.concatenate(ivs)
+    order = np.argsort(k)
+    return k[order], iv[order]
+
+
+def fit_svi_slice(k: np.ndarray, iv: np.ndarray, T: float) -> dict | None:
+    """Least-squares raw-SVI fit of one expiry's smile in total variance."""
+    if len(k) < MIN_POINTS_PER_SLICE:
+        return None
+    w = iv * iv * T
+    k_span = max(float(np.abs(k).max()), 0.05)
+    x0 = [float(w.min()) * 0.9, 0.1, -0.3, 0.0, 0.1]
+    lb = [-float(w.max()), 1e-6, -0.999, -2 * k_span, 1e-4]
+    ub = [float(w.max()) * 2, 5.0, 0.999, 2 * k_span, 2.0]
+
+    res = least_squares(
+        lambda p: svi_total_variance(k, *p) - w,
+        x0, bounds=(lb, ub), method="trf", max_nfev=200,
+    )
+    fitted = svi_total_variance(k, *res.x)
+    iv_fit = np.sqrt(np.maximum(fitted, 1e-12) / T)
+    params = dict(zip(_SVI_KEYS, (float(v) for v in res.x)))
+    params.update({
+        "T": T,
+        "n_points": int(len(k)),
+        "rmse_iv": float(np.sqrt(np.mean((iv_fit - iv) ** 2))),
+        "k_min": float(k.min()),
+        "k_max": float(k.max()),
+    })
+    return params
+
+
+def build_surface(spot: float, chains: dict, r: float = 0.05) -> dict:
+    """Fit every expiry slice. `chains` maps expiry -> (calls_df, puts_df)."""
+    slices = []
+    for exp in sorted(chains):
+        calls, puts = chains[exp]
+        T = years_to_expiry(exp)
+        k, iv = _otm_quotes(calls, puts, spot, T, r)
+        params = fit_svi_slice(k, iv, T)
+        if params is not None:
+            slices.append({"expiry": exp, **params})
+    return {"spot": spot, "rate": r, "quote_time": int(time.time()), "slices": slices}
+
+
+def surface_iv(surface: dict, K, T) -> np.ndarray:
+    """
+    Implied vol from a fitted surface for broadcast arrays of strikes and
+    maturities (years). Pure array math on cached parameters.
+    """
+    slices = surface["slices"]
+    if not slices:
+        raise ValueError("Surface has no fitted slices")
+    K, T = np.broadcast_arrays(np.asarray(K, dtype=float), np.asarray(T, dtype=float))
+    spot, r = surface["spot"], surface["rate"]
+
+    Ts = np.array([s["T"] for s in slices])
+    P = {key: np.array([s[key] for s in slices]) for key in _SVI_KEYS}
+    T_c = np.clip(T, Ts[0], Ts[-1])
+    k = np.log(K / (spot * np.exp(r * T_c)))
+
+    # Total variance at the bracketing slices, then linear in T
+    hi = np.clip(np.searchsorted(Ts, T_c, side="left"), 0, len(Ts) - 1)
+    lo = np.clip(hi - 1, 0, len(Ts) - 1)
+
+    def w_at(i):
+        return svi_total_variance(k, *(P[key][i] for key in _SVI_KEYS))
+
+    w_lo, w_hi = w_at(lo), w_at(hi)
+    span = Ts[hi] - Ts[lo]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frac = np.where(span > 0, (T_c - Ts[lo]) / span, 1.0)
+    w = np.maximum(w_lo + frac * (w_hi - w_lo), 1e-12)
+    return np.sqrt(w / T_c)
+
+
+def price_from_surface(surface: dict, K, T, is_call=True) -> dict[str, np.ndarray]:
+    """IV lookup plus Black-Scholes price and Greeks for arbitrary contracts."""
+    iv = surface_iv(surface, K, T)
+    out = greeks_vec(surface["spot"], K, T, surface["rate"], iv, is_call)
+    out["iv"] = iv
+    return out
+
+
+def surface_grid(surface: dict, n_moneyness: int = 21, n_maturity: int = 12) -> dict:
+    """Heatmap-ready IV grid over moneyness (K/S) x maturity."""
+    Ts = [s["T"] for s in surface["slices"]]
+    if not Ts:
+        return {"moneyness": [], "maturity": [], "iv": []}
+    moneyness = np.linspace(0.7, 1.3, n_moneyness)
+    maturity = np.linspace(Ts[0], Ts[-1], n_maturity)
+    iv = surface_iv(surface, surface["spot"] * moneyness[None, :], maturity[:, None])
+    return {
+        "moneyness": np.round(moneyness, 4).tolist(),
+        "maturity": np.round(maturity, 4).tolist(),
+        "iv": np.round(iv, 4).tolist(),
+    }
@@ -57,7 +57,14 @@ def simulate_market_neutral(data, ticker):
     """
     Simulates Bi-Directional strategy.
     Can be Long, Short, or Hedged.
+    Signals are computed for all days at once; the accounting runs as one
+    tight loop over plain float lists instead of DataFrame rows.
     """
+    close = data['Close'].to_numpy(dtype=float)
+    # 1 = LONG, -1 = SHORT, 0 = HEDGE (high volatility, >8% BB width)
+    signals = np.where(data['BB_Width'].to_numpy(dtype=float) > 0.08, 0,
+                       np.where(close > data['EMA_5'].to_numpy(dtype=float), 1, -1))
+
     cash = 0
     long_holdings = 0
     short_holdings = 0
@@ -66,29 +73,13 @@ def simulate_market_neutral(data, ticker):
     total_invested = 0
     budget_per_month = MONTHLY_BUDGET / len(TICKERS)
     
-    day_count = 0
-    for date, row in data.iterrows():
-        day_count += 1
-        price = row['Close']
-        
+    for day_count, (price, signal) in enumerate(zip(close.tolist(), signals.tolist()), start=1):
         # Monthly Injection
         if day_count % 20 == 0:
             cash += budget_per_month
             total_invested += budget_per_month
             
-        # 1. EXIT CURRENT POSITIONS IF SIGNAL CHANGES
-        # (Simplified: check daily if we should switch)
-        
-        signal = "NEUTRAL"
-        if row['BB_Width'] > 0.08: # Hedge if high volatility (>8% width)
-            signal = "HEDGE"
-        elif price > row['EMA_5']:
-            signal = "LONG"
-        else:
-            signal = "SHORT"
-            
-        # 2. EXECUTE
-        if signal == "LONG":
+        if signal == 1:
             # Close Short if any
             if short_holdings > 0:
                 profit = (short_entry_price - price) * short_holdings
@@ -99,18 +90,19 @@ def simulate_market_neutral(data, ticker):
                 long_holdings += cash / price
                 cash = 0
                 
-        elif signal == "SHORT":
+        elif signal == -1:
             # Close Long if any
             if long_holdings > 0:
                 cash += long_holdings * price
                 long_holdings = 0
-            # Open Short
+            # Open Short (adding to an open one at a blended entry price)
             if cash > 10:
-                short_holdings = cash / price
-                short_entry_price = price
+                added = cash / price
+                short_entry_price = (short_holdings * short_entry_price + added * price) / (short_holdings + added)
+                short_holdings += added
                 cash = 0
                 
-        elif signal == "HEDGE":
+        else:
             # Split 50/50
             current_val = cash + (long_holdings * price) + (short_holdings * price if short_holdings > 0 else 0)
             # Flatten everything first for simplicity in simulation
@@ -125,7 +117,7 @@ def simulate_market_neutral(data, ticker):
             cash = 0
 
     # Final Liquidation
-    final_price = data.iloc[-1]['Close']
+    final_price = close[-1]
     short_profit = (short_entry_price - final_price) * short_holdings if short_holdings > 0 else 0
     final_val = cash + (long_holdings * final_price) + (short_holdings * short_entry_price) + short_profit
     
@@ -133,8 +125,8 @@ def simulate_market_neutral(data, ticker):
     roi = profit / total_invested if total_invested > 0 else 0
     
     # Bench
-    start = data.iloc[0]['Close']
-    end = data.iloc[-1]['Close']
+    start = close[0]
+    end = close[-1]
     bench_roi = (end / start) - 1
     
     return {
@@ -3,6 +3,7 @@ FinanceIQ v5.1 — Options Analytics Engine
 Black-Scholes pricing, Greeks, implied volatility, and payoff diagrams.
 """
 import math
+import numpy as np
 from scipy.stats import norm
 
 
@@ -92,6 +93,34 @@ def calculate_greeks(S, K, T, r, sigma, option_type="call"):
     }
 
 
+def calculate_greeks_vectorized(S, K, T, r, sigma, is_call=True):
+    """
+    Array version of calculate_greeks for whole chains.
+    Inputs broadcast against each other; contracts must have T > 0 and sigma > 0.
+    d1/d2, pdf and cdf are evaluated once per contract.
+    """
+    S, K, T, r, sigma = (np.asarray(x, dtype=float) for x in (S, K, T, r, sigma))
+    sign = np.where(np.asarray(is_call, dtype=bool), 1.0, -1.0)
+
+    sqrt_T = np.sqrt(T)
+    vol_sqrt_T = sigma * sqrt_T
+    _d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / vol_sqrt_T
+    _d2 = _d1 - vol_sqrt_T
+    pdf_d1 = norm.pdf(_d1)
+    cdf_d1 = norm.cdf(sign * _d1)
+    cdf_d2 = norm.cdf(sign * _d2)
+    disc_K = K * np.exp(-r * T)
+
+    return {
+        "delta": sign * cdf_d1,
+        "gamma": pdf_d1 / (S * vol_sqrt_T),
+        "theta": (-(S * pdf_d1 * sigma) / (2 * sqrt_T) - sign * r * disc_K * cdf_d2) / 365,
+        "vega": S * sqrt_T * pdf_d1 / 100,
+        "rho": sign * disc_K * T * cdf_d2 / 100,
+        "price": sign * (S * cdf_d1 - disc_K * cdf_d2),
+    }
+
+
 def implied_volatility(market_price, S, K, T, r, option_type="call", tol=1e-6, max_iter=100):
     """
     Calculate implied volatility using Newton-Raphson method.
@@ -164,22 +193,25 @@ def enrich_chain_with_greeks(chain_data, current_price, expiry_date_str, risk_fr
     except:
         T = 0.1  # fallback
 
-    for opt in chain_data:
-        strike = opt.get("strike", 0)
-        last_price = opt.get("lastPrice", 0)
-        iv = opt.get("impliedVolatility", 0.3)
-        opt_type = "call" if opt.get("_type", "call") == "call" else "put"
-
-        if strike > 0 and current_price > 0 and iv > 0:
-            greeks = calculate_greeks(current_price, strike, T, risk_free_rate, iv, opt_type)
-            opt["delta"] = greeks["delta"]
-            opt["gamma"] = greeks["gamma"]
-            opt["theta"] = greeks["theta"]
-            opt["vega"] = greeks["vega"]
-            opt["rho"] = greeks["rho"]
-            opt["bs_price"] = greeks["price"]
-        else:
-            opt["delta"] = opt["gamma"] = opt["theta"] = opt["vega"] = opt["rho"] = 0
-            opt["bs_price"] = 0
+    if not chain_data:
+        return chain_data
+
+    strikes = np.array([float(opt.get("strike", 0) or 0) for opt in chain_data])
+    ivs = np.array([float(opt.get("impliedVolatility", 0.3) or 0) for opt in chain_data])
+    is_call = np.array([opt.get("_type", "call") == "call" for opt in chain_data])
+    valid = (strikes > 0) & (ivs > 0) & (current_price > 0)
+
+    # Masked rows get harmless placeholder inputs; their results are zeroed below
+    g = calculate_greeks_vectorized(
+        np.where(valid, current_price, 1.0), np.where(valid, strikes, 1.0), T, risk_free_rate,
+        np.where(valid, ivs, 1.0), is_call,
+    )
+    decimals = {"delta": 4, "gamma": 6, "theta": 4, "vega": 4, "rho": 4, "price": 2}
+    cols = {k: np.where(valid, np.round(v, decimals[k]), 0.0).tolist() for k, v in g.items()}
+
+    for i, opt in enumerate(chain_data):
+        for k in ("delta", "gamma", "theta", "vega", "rho"):
+            opt[k] = cols[k][i]
+        opt["bs_price"] = cols["price"][i]
 
     return chain_data
@@ -0,0 +1,107 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from services.backtest_service import (
+    prepare_arrays, bidirectional_signals, simulate_bidirectional, SIGNAL_NAMES,
+)
+
+
+def reference_backtest(hist, monthly_budget):
+    """
+    The row-by-row iterrows engine the vectorized run_backtest replaced,
+    unchanged: a SHORT with free cash replaces any open short.
+    """
+    df = hist.copy()
+    df["EMA_5"] = df["Close"].ewm(span=5, adjust=False).mean()
+    std_20 = df["Close"].rolling(20).std()
+    ma_20 = df["Close"].rolling(20).mean()
+    df["BB_Width"] = (4 * std_20) / ma_20
+    df.dropna(inplace=True)
+
+    cash = 0.0
+    long_holdings = 0.0
+    short_holdings = 0.0
+    short_entry = 0.0
+    total_invested = 0.0
+    equity_curve, signals = [], []
+    for i, (date, row) in enumerate(df.iterrows()):
+        price = row["Close"]
+        if (i + 1) % 20 == 0:
+            cash += monthly_budget
+            total_invested += monthly_budget
+
+        if row["BB_Width"] > 0.08:
+            signal = "HEDGE"
+        elif price > row["EMA_5"]:
+            signal = "LONG"
+        else:
+            signal = "SHORT"
+
+        if signal == "LONG":
+            if short_holdings > 0:
+                profit = (short_entry - price) * short_holdings
+                cash += (short_holdings * short_entry) + profit
+                short_holdings = 0
+            if cash > 10:
+                long_holdings += cash / price
+                cash = 0
+        elif signal == "SHORT":
+            if long_holdings > 0:
+                cash += long_holdings * price
+                long_holdings = 0
+            if cash > 10:
+                short_holdings = cash / price
+                short_entry = price
+                cash = 0
+        elif signal == "HEDGE":
+            current_val = cash + (long_holdings * price)
+            if short_holdings > 0:
+                current_val += (short_entry - price) * short_holdings + short_holdings * short_entry
+            cash = current_val
+            long_holdings = (cash * 0.5) / price
+            short_holdings = (cash * 0.5) / price
+            short_entry = price
+            cash = 0
+
+        short_pnl = (short_entry - price) * short_holdings if short_holdings > 0 else 0
+        equity_curve.append(cash + (long_holdings * price) + (short_holdings * short_entry) + short_pnl)
+        signals.append(signal)
+
+    return np.array(equity_curve), signals, total_invested
+
+
+try:
+    rng = np.random.default_rng(3)
+    mismatches = 0
+    for trial in range(20):
+        n = int(rng.integers(60, 1300))
+        close = 50 * np.exp(np.cumsum(rng.normal(0.0003, rng.uniform(0.01, 0.04), n)))
+        hist = pd.DataFrame({"Close": close}, index=pd.bdate_range("2019-01-02", periods=n))
+        budget = float(rng.choice([100, 300, 1000]))
+
+        # The vectorized pieces run_backtest is built from, with the original short handling
+        arrays = prepare_arrays(close)
+        signals = bidirectional_signals(arrays["close"], arrays["ema"], arrays["bb_width"])
+        sim = simulate_bidirectional(arrays["close"], signals, budget, blend_shorts=False)
+
+        ref_equity, ref_signals, ref_invested = reference_backtest(hist, budget)
+        same = ([SIGNAL_NAMES[s] for s in signals.tolist()] == ref_signals
+                and sim["total_invested"] == ref_invested
+                and np.allclose(sim["equity"], ref_equity, rtol=1e-12, atol=1e-9))
+        if not same:
+            mismatches += 1
+            print(f"Trial {trial}: final value {sim['final_value']:.2f} vs reference {ref_equity[-1]:.2f}")
+
+    if mismatches == 0:
+        print("✅ Backtest Parity Test PASSED (20 random histories)")
+    else:
+        print(f"❌ {mismatches} of 20 histories differ from the reference engine")
+        sys.exit(1)
+
+except Exception as e:
+    print(f"❌ Test FAILED with error: {e}")
+    sys.exit(1)
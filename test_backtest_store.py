@@ -0,0 +1,57 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from services.backtest_service import run_backtest
+from services.backtest_store import encode_columns, decode_columns
+from services.execution import execution_model
+
+
+def round_trips(columns):
+    decoded = decode_columns(encode_columns(columns))
+    if set(decoded) != set(columns):
+        return False
+    for k, v in columns.items():
+        if k == "equity":
+            # Equity is stored in whole cents
+            ok = np.allclose(decoded[k], np.round(v, 2), rtol=0, atol=1e-9)
+        else:
+            ok = decoded[k].dtype == v.dtype and np.array_equal(decoded[k], v)
+        if not ok:
+            print(f"Column {k} did not round-trip")
+            return False
+    return True
+
+
+try:
+    rng = np.random.default_rng(9)
+    n = 1000
+    close = 80 * np.exp(np.cumsum(rng.normal(0.0002, 0.02, n)))
+    # Calendar gaps (weekends, holidays) exercise the delta-encoded dates
+    hist = pd.DataFrame(
+        {"Open": close * (1 + rng.normal(0, 0.004, n)), "High": close * 1.01, "Low": close * 0.99,
+         "Close": close, "Volume": rng.integers(1e5, 1e7, n).astype(float)},
+        index=pd.bdate_range("2021-01-04", periods=n, tz="America/New_York").delete(slice(100, 110)).append(
+            pd.bdate_range("2025-01-06", periods=10, tz="America/New_York")),
+    )
+
+    plain = run_backtest("TEST", "5y", 300, hist=hist, keep_columns=True)["columns"]
+    with_costs = run_backtest("TEST", "5y", 300, hist=hist, keep_columns=True,
+                              execution=execution_model(True))["columns"]
+    print(f"Bars: {plain['equity'].size}, trades: {plain['trade_bar'].size} / {with_costs['trade_bar'].size}")
+
+    # An empty trade log must survive too
+    empty = {**plain, **{k: v[:0] for k, v in plain.items() if k.startswith("trade_")}}
+
+    if round_trips(plain) and round_trips(with_costs) and round_trips(empty):
+        print("✅ Backtest Column Encoding Test PASSED")
+    else:
+        print("❌ Backtest columns did not round-trip")
+        sys.exit(1)
+
+except Exception as e:
+    print(f"❌ Test FAILED with error: {e}")
+    sys.exit(1)
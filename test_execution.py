@@ -0,0 +1,55 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from services.backtest_service import (
+    simulate_bidirectional, simulate_execution, injection_flows,
+    SIGNAL_SHORT, SIGNAL_HEDGE, SIGNAL_LONG, SIGNAL_FLAT,
+)
+from services.execution import execution_model, execution_arrays
+
+SIGNALS = np.array([SIGNAL_SHORT, SIGNAL_HEDGE, SIGNAL_LONG, SIGNAL_FLAT])
+
+
+def random_run(rng, n):
+    close = 40 * np.exp(np.cumsum(rng.normal(0.0002, 0.025, n)))
+    # Signals persist for a few bars, so SHORT runs keep adding to an open short
+    signals = np.repeat(rng.choice(SIGNALS, n // 4 + 1), 4)[:n]
+    return close, signals
+
+
+try:
+    rng = np.random.default_rng(13)
+    worst_flow = worst_cost_free = 0.0
+    for trial in range(20):
+        n = int(rng.integers(50, 2000))
+        close, signals = random_run(rng, n)
+        budget = float(rng.choice([100, 300, 1000]))
+
+        # Trades never create or destroy value: each bar's equity change is the
+        # injection plus the price move on the positions held coming into it
+        sim = simulate_bidirectional(close, signals, budget, positions=True)
+        net = sim["long"][:-1] - sim["short"][:-1]
+        expected = injection_flows(n, budget)[1:] + net * np.diff(close)
+        flow_err = np.abs(np.diff(sim["equity"]) - expected) / np.maximum(1.0, sim["equity"][1:])
+        worst_flow = max(worst_flow, float(flow_err.max()))
+
+        # A cost-free execution model filling at the close is the plain engine
+        model = execution_model({"fill": "close", "slippage_bps": 0, "impact_coef": 0,
+                                 "commission": "none", "min_trade_value": 0})
+        executed = simulate_execution(close, signals, budget, execution_arrays({"close": close}, model), model)
+        cost_free_err = np.abs(executed["equity"] - sim["equity"]) / np.maximum(1.0, sim["equity"])
+        worst_cost_free = max(worst_cost_free, float(cost_free_err.max()))
+
+    print(f"Worst value-flow error: {worst_flow:.2e}, worst cost-free execution error: {worst_cost_free:.2e}")
+    if worst_flow < 1e-9 and worst_cost_free < 1e-9:
+        print("✅ Execution Test PASSED (20 random runs)")
+    else:
+        print("❌ Trades changed account value or cost-free execution drifted from the engine")
+        sys.exit(1)
+
+except Exception as e:
+    print(f"❌ Test FAILED with error: {e}")
+    sys.exit(1)
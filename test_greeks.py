@@ -0,0 +1,55 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from options_engine import calculate_greeks, calculate_greeks_vectorized
+from services.options_service import greeks, greeks_vec
+
+# Scalar functions round their output; vectorized ones must agree to that precision
+ENGINE_DECIMALS = {"delta": 4, "gamma": 6, "theta": 4, "vega": 4, "rho": 4, "price": 2}
+SERVICE_DECIMALS = {k: 4 for k in ENGINE_DECIMALS}
+
+
+def worst_mismatch(vec, scalars, decimals):
+    worst = {}
+    for k, d in decimals.items():
+        err = np.abs(vec[k] - np.array([s[k] for s in scalars])) - 0.5 * 10 ** -d
+        worst[k] = float(err.max())
+    return worst
+
+
+try:
+    rng = np.random.default_rng(7)
+    n = 2000
+    S = rng.uniform(5, 800, n)
+    K = S * rng.uniform(0.4, 1.8, n)
+    T = rng.uniform(1 / 365, 3, n)
+    sigma = rng.uniform(0.03, 2.0, n)
+    r = 0.045
+    is_call = rng.random(n) < 0.5
+    kinds = np.where(is_call, "call", "put")
+
+    vec = calculate_greeks_vectorized(S, K, T, r, sigma, is_call)
+    scalars = [calculate_greeks(*args, r, v, k) for args, v, k in zip(zip(S, K, T), sigma, kinds)]
+    engine = worst_mismatch(vec, scalars, ENGINE_DECIMALS)
+    print(f"options_engine worst excess error: {engine}")
+
+    # The service version also handles expired and zero-vol contracts
+    T[:50] = 0.0
+    sigma[50:100] = 0.0
+    vec = greeks_vec(S, K, T, r, sigma, is_call)
+    scalars = [greeks(*args, r, v, k) for args, v, k in zip(zip(S, K, T), sigma, kinds)]
+    service = worst_mismatch(vec, scalars, SERVICE_DECIMALS)
+    print(f"options_service worst excess error: {service}")
+
+    if max(*engine.values(), *service.values()) <= 1e-9:
+        print("✅ Vectorized Greeks Test PASSED")
+    else:
+        print("❌ Vectorized Greeks differ from the scalar formulas")
+        sys.exit(1)
+
+except Exception as e:
+    print(f"❌ Test FAILED with error: {e}")
+    sys.exit(1)
@@ -0,0 +1,54 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from services.options_service import (
+    bs_price_vec, greeks_vec, implied_vol_vec, IV_OK, IV_INVALID, IV_BELOW_INTRINSIC, IV_ABOVE_MAX,
+)
+
+try:
+    rng = np.random.default_rng(11)
+    n = 20000
+    S = rng.uniform(5, 800, n)
+    K = S * rng.uniform(0.5, 1.6, n)
+    T = rng.uniform(7 / 365, 2, n)
+    sigma = rng.uniform(0.05, 1.5, n)
+    r = 0.045
+    is_call = rng.random(n) < 0.5
+
+    # Price with known vols, then solve them back
+    prices = bs_price_vec(S, K, T, r, sigma, is_call)
+    iv, reason = implied_vol_vec(prices, S, K, T, r, is_call)
+
+    # Solved vols must reprice the contract; they pin down sigma itself only
+    # where the price is sensitive to vol (vega at least a cent per 1%).
+    # Contracts worth nothing at all are rejected as invalid input.
+    priced = prices > 0
+    solved = reason == IV_OK
+    price_err = np.abs(bs_price_vec(S, K, T, r, np.where(solved, iv, 0.0), is_call) - prices) / S
+    sensitive = greeks_vec(S, K, T, r, sigma, is_call)["vega"] > 0.01
+    vol_err = np.abs(iv - sigma)[sensitive]
+    print(f"Solved {solved[priced].mean():.2%} of {priced.sum()} priced contracts")
+    print(f"Max repricing error: {price_err.max():.2e} of spot")
+    print(f"Max vol error ({sensitive.sum()} vol-sensitive contracts): {vol_err.max():.2e}")
+
+    # Impossible prices come back NaN with a reason instead of a bogus vol
+    bad_iv, bad_reason = implied_vol_vec(
+        np.array([-1.0, 0.5, 150.0]), np.array([100.0, 100.0, 100.0]),
+        np.array([100.0, 50.0, 100.0]), 0.5, r, True,
+    )
+    print(f"Edge cases: {bad_reason.tolist()}")
+    edges_ok = (np.isnan(bad_iv).all()
+                and bad_reason.tolist() == [IV_INVALID, IV_BELOW_INTRINSIC, IV_ABOVE_MAX])
+
+    if solved[priced].all() and price_err.max() < 1e-7 and vol_err.max() < 1e-5 and edges_ok:
+        print("✅ Implied Vol Round-Trip Test PASSED")
+    else:
+        print("❌ Implied vols did not round-trip")
+        sys.exit(1)
+
+except Exception as e:
+    print(f"❌ Test FAILED with error: {e}")
+    sys.exit(1)
@@ -0,0 +1,47 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from services.portfolio_backtest import simulate_portfolio
+
+
+def random_universe(rng, n_bars, n_assets):
+    vols = rng.uniform(0.005, 0.05, n_assets)
+    prices = rng.uniform(2, 900, n_assets) * np.exp(np.cumsum(rng.normal(0, 1, (n_bars, n_assets)) * vols, axis=0))
+    weights = rng.random((n_bars, n_assets)) * (rng.random((n_bars, n_assets)) < 0.6)
+    total = weights.sum(axis=1, keepdims=True)
+    return prices, np.where(total > 0, weights / np.maximum(total, 1e-12), 0.0)
+
+
+try:
+    rng = np.random.default_rng(21)
+    lowest = np.inf
+
+    # Small accounts, where $1 minimum commissions dominate the order sizes.
+    # simulate_portfolio only reports the final cash, so replay each prefix
+    # to see the cash left after every rebalance.
+    for initial_cash in (15.0, 50.0, 500.0):
+        prices, weights = random_universe(rng, 120, 20)
+        for stop in range(1, 121, 5):
+            sim = simulate_portfolio(prices[:stop], weights[:stop], 5, initial_cash=initial_cash)
+            lowest = min(lowest, sim["cash"])
+
+    # Large universes with heavy turnover and slippage
+    for n_assets in (100, 500):
+        prices, weights = random_universe(rng, 250, n_assets)
+        sim = simulate_portfolio(prices, weights, 5, initial_cash=100_000.0, slippage_bps=50,
+                                 min_commission=5.0)
+        lowest = min(lowest, sim["cash"])
+
+    print(f"Lowest cash after a rebalance: {lowest:.6f}")
+    if lowest >= 0:
+        print("✅ Portfolio Cash Test PASSED")
+    else:
+        print("❌ Portfolio cash went negative")
+        sys.exit(1)
+
+except Exception as e:
+    print(f"❌ Test FAILED with error: {e}")
+    sys.exit(1)
@@ -0,0 +1,41 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from services.simulation_service import StreamingBands, BAND_PERCENTILES, SKETCH_RELATIVE_ACCURACY
+
+try:
+    rng = np.random.default_rng(5)
+    n_paths, n_steps, S0 = 200_000, 30, 150.0
+    log_returns = rng.normal(0.0004, 0.025, (n_paths, n_steps - 1))
+    paths = S0 * np.exp(np.concatenate([np.zeros((n_paths, 1)), np.cumsum(log_returns, axis=1)], axis=1))
+
+    # Feed the sketch in uneven chunks, as stream_simulation does
+    sketch = StreamingBands(n_steps)
+    for block in np.array_split(paths, [1000, 50_000, 120_000]):
+        sketch.update(block, thresholds=(S0,))
+
+    qs = np.array(BAND_PERCENTILES)
+    est = sketch.quantiles(qs / 100)
+    # The sketch reports the bucket of the nearest-rank value (rank q * (n - 1), rounded down)
+    exact = np.percentile(paths, qs, axis=0, method="lower")
+    rel_err = np.abs(est - exact) / exact
+    print(f"Max quantile relative error: {rel_err.max():.2e} (bound {SKETCH_RELATIVE_ACCURACY})")
+
+    mean_err = np.abs(sketch.mean - paths.mean(axis=0)).max()
+    std_err = np.abs(sketch.std() - paths.std(axis=0, ddof=1)).max()
+    pct_up = sketch.final_stats(S0)["pct_up"]
+    print(f"Mean / std max abs error: {mean_err:.2e} / {std_err:.2e}, clamped: {sketch.clamped}")
+
+    if (rel_err.max() <= SKETCH_RELATIVE_ACCURACY + 1e-12 and mean_err < 1e-8 and std_err < 1e-8
+            and sketch.clamped == 0 and pct_up == round((paths[:, -1] > S0).mean() * 100, 2)):
+        print("✅ Streaming Bands Test PASSED")
+    else:
+        print("❌ Streaming bands disagree with np.percentile")
+        sys.exit(1)
+
+except Exception as e:
+    print(f"❌ Test FAILED with error: {e}")
+    sys.exit(1)